@@ -0,0 +1,85 @@
+from asgiref.sync import markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.http import Http404
+from rest_framework.response import Response
+
+
+class AsyncReadMixin:
+    """
+    Serve the actions named in `async_handlers` (action, or method for
+    plain views, to the name of an async handler) on the event loop with
+    the async ORM and cache, so a worker isn't tied up while they wait on
+    the database. Authentication, permissions and throttling still run
+    in `initial()`, in a thread. Every other action keeps the regular
+    dispatch, run in a thread as Django does for any sync view.
+
+    Only active with ASYNC_VIEWS, which the ASGI entry point switches on.
+    Under WSGI the views stay synchronous rather than paying for an event
+    loop per request.
+    """
+
+    async_handlers = {}
+    async_dispatch = False
+
+    @classmethod
+    def as_view(cls, *args, **initkwargs):
+        initkwargs.setdefault("async_dispatch", settings.ASYNC_VIEWS)
+        view = super().as_view(*args, **initkwargs)
+        if initkwargs["async_dispatch"]:
+            markcoroutinefunction(view)
+        return view
+
+    def dispatch(self, request, *args, **kwargs):
+        if not self.async_dispatch:
+            return super().dispatch(request, *args, **kwargs)
+        return self.adispatch(request, *args, **kwargs)
+
+    async def adispatch(self, request, *args, **kwargs):
+        method = "get" if request.method == "HEAD" else request.method.lower()
+        action = getattr(self, "action_map", {}).get(method, method)
+        handler = self.async_handlers.get(action)
+        if handler is None:
+            dispatch = super().dispatch
+            return await sync_to_async(dispatch)(request, *args, **kwargs)
+
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+        try:
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+            response = await getattr(self, handler)(request, *args, **kwargs)
+        except Exception as exc:
+            response = self.handle_exception(exc)
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+    async def aget_queryset(self):
+        """Override when building the queryset itself needs a query."""
+        return self.get_queryset()
+
+    async def aget_object(self):
+        queryset = self.filter_queryset(await self.aget_queryset())
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        try:
+            obj = await queryset.aget(
+                **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+            )
+        except (queryset.model.DoesNotExist, TypeError, ValueError, ValidationError):
+            raise Http404
+        self.check_object_permissions(self.request, obj)
+        return obj
+
+    async def alist(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(await self.aget_queryset())
+        if self.paginator is None:
+            rows = [row async for row in queryset]
+            return Response(self.get_serializer(rows, many=True).data)
+        page = await self.paginator.apaginate_queryset(queryset, request, view=self)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    async def aretrieve(self, request, *args, **kwargs):
+        return Response(self.get_serializer(await self.aget_object()).data)
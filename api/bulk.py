@@ -0,0 +1,161 @@
+from django.contrib.auth import get_user_model
+from django.db import connections, router, transaction
+from django.db.models import F
+from django.db.models.functions import Greatest, Now
+
+from .cache import invalidate, POST, PROFILE
+from .feed import backfill_timelines, purge_timelines
+from .models import Post, Like, Follow
+
+FOLLOWED = "followed"
+ALREADY_FOLLOWING = "already_following"
+UNFOLLOWED = "unfollowed"
+NOT_FOLLOWING = "not_following"
+LIKED = "liked"
+ALREADY_LIKED = "already_liked"
+SELF = "self"
+NOT_FOUND = "not_found"
+
+
+def _move_follow_counters(follower, followed_ids, delta) -> None:
+    """
+    Bulk writes skip the per-row signals, so the counters move in SQL by
+    the edges actually written, as `_bump_follow_counters` does per row,
+    with one UPDATE per side. rebuild_follow_counters recounts them exactly.
+    """
+    if not followed_ids:
+        return
+    users = get_user_model().objects
+    changed = dict(version=F("version") + 1, updated_at=Now())
+    users.filter(pk=follower.id).update(
+        following_count=Greatest(F("following_count") + delta * len(followed_ids), 0),
+        **changed,
+    )
+    users.filter(pk__in=followed_ids).update(
+        followers_count=Greatest(F("followers_count") + delta, 0), **changed
+    )
+    usernames = users.filter(pk__in=[follower.id, *followed_ids]).values_list(
+        "username", flat=True
+    )
+    for username in usernames:
+        invalidate(PROFILE, username)
+
+
+def _delete_follows(follower, followed_ids) -> list:
+    """
+    One DELETE without the per-row signals of QuerySet.delete(). Return
+    the followed user ids of the rows actually deleted.
+    """
+    meta = Follow._meta
+    connection = connections[router.db_for_write(Follow)]
+    quote = connection.ops.quote_name
+    followed_user = quote(meta.get_field("followed_user").column)
+    sql = (
+        f"DELETE FROM {quote(meta.db_table)} "
+        f"WHERE {quote(meta.get_field('follower').column)} = %s "
+        f"AND {followed_user} IN ({', '.join(['%s'] * len(followed_ids))}) "
+        f"RETURNING {followed_user}"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [follower.id, *followed_ids])
+        return [user_id for user_id, in cursor.fetchall()]
+
+
+def _resolve_usernames(usernames) -> dict:
+    return dict(
+        get_user_model()
+        .objects.filter(username__in=usernames)
+        .values_list("username", "id")
+    )
+
+
+def follow_many(follower, usernames) -> dict:
+    """Follow every resolvable username, return an outcome per username."""
+    user_ids = _resolve_usernames(usernames)
+    followed = set(
+        Follow.objects.filter(
+            follower=follower, followed_user_id__in=user_ids.values()
+        ).values_list("followed_user_id", flat=True)
+    )
+    outcomes, new_ids = {}, []
+    for username in usernames:
+        user_id = user_ids.get(username)
+        if user_id is None:
+            outcomes[username] = NOT_FOUND
+        elif user_id == follower.id:
+            outcomes[username] = SELF
+        elif user_id in followed:
+            outcomes[username] = ALREADY_FOLLOWING
+        else:
+            outcomes[username] = FOLLOWED
+            followed.add(user_id)
+            new_ids.append(user_id)
+    if new_ids:
+        with transaction.atomic():
+            inserted = Follow.objects.bulk_create_or_ignore(
+                [
+                    Follow(follower=follower, followed_user_id=user_id)
+                    for user_id in new_ids
+                ],
+                returning="followed_user",
+            )
+            _move_follow_counters(follower, inserted, 1)
+            backfill_timelines(follower, inserted)
+    return outcomes
+
+
+def unfollow_many(follower, usernames) -> dict:
+    user_ids = _resolve_usernames(usernames)
+    follows = Follow.objects.filter(
+        follower=follower, followed_user_id__in=user_ids.values()
+    )
+    followed = set(follows.values_list("followed_user_id", flat=True))
+    outcomes = {}
+    for username in usernames:
+        user_id = user_ids.get(username)
+        if user_id is None:
+            outcomes[username] = NOT_FOUND
+        elif user_id in followed:
+            outcomes[username] = UNFOLLOWED
+        else:
+            outcomes[username] = NOT_FOLLOWING
+    if followed:
+        with transaction.atomic():
+            deleted = _delete_follows(follower, followed)
+            _move_follow_counters(follower, deleted, -1)
+            purge_timelines(follower, deleted)
+    return outcomes
+
+
+def like_many(user, post_ids) -> dict:
+    """Like every existing post, return an outcome per post id."""
+    existing = set(Post.objects.filter(pk__in=post_ids).values_list("id", flat=True))
+    liked = set(
+        Like.objects.filter(user=user, post_id__in=existing).values_list(
+            "post_id", flat=True
+        )
+    )
+    outcomes, new_ids = {}, []
+    for post_id in post_ids:
+        if post_id not in existing:
+            outcomes[post_id] = NOT_FOUND
+        elif post_id in liked:
+            outcomes[post_id] = ALREADY_LIKED
+        else:
+            outcomes[post_id] = LIKED
+            liked.add(post_id)
+            new_ids.append(post_id)
+    if new_ids:
+        with transaction.atomic():
+            inserted = Like.objects.bulk_create_or_ignore(
+                [Like(user=user, post_id=post_id) for post_id in new_ids],
+                returning="post",
+            )
+            Post.objects.filter(pk__in=inserted).update(
+                likes_count=F("likes_count") + 1,
+                version=F("version") + 1,
+                updated_at=Now(),
+            )
+        for post_id in inserted:
+            invalidate(POST, post_id)
+    return outcomes
@@ -0,0 +1,120 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .db.routers import primary_reads
+
+POSTS = "posts"
+POST = "post"
+COMMENTS = "comments"
+PROFILE = "profile"
+
+# Post lists embed every post's like and comment counts, yet bumping POSTS
+# on each like or comment would leave the shared list entries, and the list
+# ETags built from its version, almost never hitting under write load. So
+# POSTS only moves when a post is created, edited, deleted or its upload is
+# processed: counter-only changes (likes, comments) move POST alone and
+# reach the lists when their entries expire, at most API_CACHE_TIMEOUT
+# later. Versions of these namespaces also roll over every
+# API_CACHE_TIMEOUT, so a 304 on a list ETag can't keep older counts alive.
+ROLLING_NAMESPACES = {POSTS}
+
+
+def _initial_version() -> int:
+    """
+    Versions start from the clock rather than 1, so a flushed cache can't
+    hand out a version (and ETag) that clients have already seen.
+    """
+    return time.time_ns() // 1000
+
+
+def _version_key(namespace: str, key) -> str:
+    return f"version:{namespace}:{key}"
+
+
+def _rolled(namespace: str, version: int):
+    if namespace not in ROLLING_NAMESPACES:
+        return version
+    window = int(time.time() // max(settings.API_CACHE_TIMEOUT, 1))
+    return f"{version}.{window}"
+
+
+def get_version(namespace: str, key=""):
+    version_key = _version_key(namespace, key)
+    version = cache.get(version_key)
+    if version is None:
+        cache.add(version_key, _initial_version(), timeout=None)
+        version = cache.get(version_key)
+    return _rolled(namespace, version)
+
+
+async def aget_version(namespace: str, key=""):
+    version_key = _version_key(namespace, key)
+    version = await cache.aget(version_key)
+    if version is None:
+        await cache.aadd(version_key, _initial_version(), timeout=None)
+        version = await cache.aget(version_key)
+    return _rolled(namespace, version)
+
+
+def _written_key(namespace: str, key) -> str:
+    return f"written:{namespace}:{key}"
+
+
+def _bump_version(namespace: str, key) -> None:
+    version_key = _version_key(namespace, key)
+    try:
+        cache.incr(version_key)
+    except ValueError:
+        cache.set(version_key, _initial_version(), timeout=None)
+    if settings.REPLICA_DATABASES:
+        cache.set(_written_key(namespace, key), True, settings.REPLICA_PIN_SECONDS)
+
+
+def invalidate(namespace: str, key="") -> None:
+    """
+    Move a key to a new version. Entries written under the old one are
+    never read again and simply expire, so no key scans are needed.
+
+    Inside a transaction the key moves on again once it commits: a reader
+    may rebuild the entry from the pre-commit rows in between.
+    """
+    _bump_version(namespace, key)
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(lambda: _bump_version(namespace, key))
+
+
+def get_or_build(namespace: str, key, variant: str, build):
+    version = get_version(namespace, key)
+    data_key = f"{namespace}:{key}:{variant}"
+    data = cache.get(data_key, version=version)
+    if data is None:
+        if settings.REPLICA_DATABASES and cache.get(_written_key(namespace, key)):
+            # Replicas may still lag behind the write that bumped the
+            # version, an entry built from them would outlive the writer's
+            # pin to the primary.
+            with primary_reads():
+                data = build()
+        else:
+            data = build()
+        cache.set(data_key, data, settings.API_CACHE_TIMEOUT, version=version)
+    return data
+
+
+async def aget_or_build(namespace: str, key, variant: str, build):
+    """`get_or_build` for async views, `build` returns an awaitable."""
+    version = await aget_version(namespace, key)
+    data_key = f"{namespace}:{key}:{variant}"
+    data = await cache.aget(data_key, version=version)
+    if data is None:
+        if settings.REPLICA_DATABASES and await cache.aget(
+            _written_key(namespace, key)
+        ):
+            with primary_reads():
+                data = await build()
+        else:
+            data = await build()
+        await cache.aset(data_key, data, settings.API_CACHE_TIMEOUT, version=version)
+    return data
@@ -0,0 +1,171 @@
+import hashlib
+
+from django.db import transaction
+from django.utils.cache import get_conditional_response, quote_etag
+from django.utils.http import http_date
+from rest_framework.response import Response
+
+from .cache import aget_or_build, aget_version, get_or_build, get_version
+
+
+class ConditionalObjectMixin:
+    """
+    Strong ETags and Last-Modified for detail views, built from the row's
+    `version` and `updated_at` columns with one narrow query. Conditional
+    GETs are answered with 304 before the object is loaded or serialized,
+    and PUT/PATCH with a stale If-Match get 412. Reads may take the
+    validators from the shared cache, writes always read the row.
+    """
+
+    etag_prefix = None
+    validator_cache_namespace = None
+
+    def get_validator_queryset(self):
+        return self.get_queryset().model._default_manager.all()
+
+    def get_validator_lookup(self):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        return {self.lookup_field: self.kwargs[lookup_url_kwarg]}
+
+    def get_validator_rows(self, for_update=False):
+        queryset = self.get_validator_queryset().filter(**self.get_validator_lookup())
+        if for_update:
+            queryset = queryset.select_for_update()
+        return queryset.values_list("pk", "version", "updated_at")
+
+    def make_validators(self, row):
+        if row is None:
+            return None, None
+        pk, version, updated_at = row
+        return quote_etag(f"{self.etag_prefix}-{pk}-{version}"), updated_at
+
+    def get_validators(self, for_update=False):
+        return self.make_validators(self.get_validator_rows(for_update).first())
+
+    async def aget_validators(self):
+        return self.make_validators(await self.get_validator_rows().afirst())
+
+    def get_cached_validators(self):
+        """Served from the versioned cache, which the write paths bump."""
+        if self.validator_cache_namespace is None:
+            return self.get_validators()
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        return get_or_build(
+            self.validator_cache_namespace,
+            self.kwargs[lookup_url_kwarg],
+            "validators",
+            self.get_validators,
+        )
+
+    async def aget_cached_validators(self):
+        if self.validator_cache_namespace is None:
+            return await self.aget_validators()
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        return await aget_or_build(
+            self.validator_cache_namespace,
+            self.kwargs[lookup_url_kwarg],
+            "validators",
+            self.aget_validators,
+        )
+
+    def check_preconditions(self, request, for_update=False):
+        if for_update or request.method not in ("GET", "HEAD"):
+            self.etag, self.last_modified = self.get_validators(for_update)
+        else:
+            self.etag, self.last_modified = self.get_cached_validators()
+        return self.get_conditional_response(request)
+
+    async def acheck_preconditions(self, request):
+        self.etag, self.last_modified = await self.aget_cached_validators()
+        return self.get_conditional_response(request)
+
+    def get_conditional_response(self, request):
+        if self.etag is None:
+            return None
+        return get_conditional_response(
+            request._request,
+            etag=self.etag,
+            last_modified=int(self.last_modified.timestamp()),
+        )
+
+    def add_validators(self, response):
+        if self.etag is not None:
+            response["ETag"] = self.etag
+            response["Last-Modified"] = http_date(self.last_modified.timestamp())
+        return response
+
+    def retrieve(self, request, *args, **kwargs):
+        response = self.check_preconditions(request)
+        if response is None:
+            response = Response(self.get_retrieve_data(request, *args, **kwargs))
+        return self.add_validators(response)
+
+    def get_retrieve_data(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs).data
+
+    async def aretrieve(self, request, *args, **kwargs):
+        response = await self.acheck_preconditions(request)
+        if response is None:
+            response = Response(await self.aget_retrieve_data(request, *args, **kwargs))
+        return self.add_validators(response)
+
+    async def aget_retrieve_data(self, request, *args, **kwargs):
+        return (await super().aretrieve(request, *args, **kwargs)).data
+
+    def update(self, request, *args, **kwargs):
+        with transaction.atomic():
+            # Permissions first, a stale If-Match must not tell a caller
+            # who may not write the object anything about its version.
+            self.get_object()
+            failed = self.check_preconditions(
+                request, for_update="HTTP_IF_MATCH" in request.META
+            )
+            if failed is not None:
+                return failed
+            response = super().update(request, *args, **kwargs)
+        self.etag, self.last_modified = self.get_validators()
+        return self.add_validators(response)
+
+
+class ConditionalListMixin:
+    """
+    Collection ETags for list views. The fingerprint is the collection's
+    cache version, which every write to it bumps, plus the query string, so
+    a matching If-None-Match costs one cache read and no table scan.
+    """
+
+    list_cache_namespace = None
+
+    @staticmethod
+    def make_list_etag(version, request):
+        fingerprint = f"{version}:{request.get_full_path()}".encode()
+        return quote_etag(hashlib.sha1(fingerprint).hexdigest())
+
+    def get_list_etag(self, request):
+        return self.make_list_etag(get_version(self.list_cache_namespace), request)
+
+    async def aget_list_etag(self, request):
+        version = await aget_version(self.list_cache_namespace)
+        return self.make_list_etag(version, request)
+
+    def list(self, request, *args, **kwargs):
+        etag = self.get_list_etag(request)
+        response = get_conditional_response(request._request, etag=etag)
+        if response is None:
+            response = Response(self.get_list_data(request, *args, **kwargs))
+        response["ETag"] = etag
+        return response
+
+    def get_list_data(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs).data
+
+    async def alist(self, request, *args, **kwargs):
+        etag = await self.aget_list_etag(request)
+        response = get_conditional_response(request._request, etag=etag)
+        if response is None:
+            response = Response(await self.aget_list_data(request, *args, **kwargs))
+        response["ETag"] = etag
+        return response
+
+    async def aget_list_data(self, request, *args, **kwargs):
+        return (await super().alist(request, *args, **kwargs)).data
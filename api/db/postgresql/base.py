@@ -0,0 +1,102 @@
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.base.base import NO_DB_ALIAS
+from django.db.backends.postgresql import base
+from django.utils.asyncio import async_unsafe
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """
+    The PostgreSQL backend with an optional psycopg_pool ConnectionPool per
+    process and alias, enabled by OPTIONS["pool"]: True or a dict of
+    ConnectionPool arguments (min_size, max_size, timeout...). Opening a
+    Django connection borrows from the pool and closing it gives it back,
+    so requests skip the connect and auth handshake without holding a
+    server connection per thread. Mirrors the `pool` option Django 5.1
+    added to its own backend, for the Django 4.2 pinned here. The
+    regular backend otherwise, with persistent connections if configured.
+    """
+
+    _connection_pools = {}
+
+    @property
+    def pool(self):
+        pool_options = self.settings_dict["OPTIONS"].get("pool")
+        if self.alias == NO_DB_ALIAS or not pool_options:
+            return None
+        # Keyed by database name too, the test runner renames it.
+        key = (self.alias, self.settings_dict["NAME"])
+        if key not in self._connection_pools:
+            if self.settings_dict["CONN_MAX_AGE"] != 0:
+                raise ImproperlyConfigured(
+                    "Pooled connections are returned after every request, "
+                    "set CONN_MAX_AGE to 0."
+                )
+            try:
+                from psycopg_pool import ConnectionPool
+            except ImportError as exc:
+                raise ImproperlyConfigured(
+                    "Connection pooling needs the psycopg-pool package."
+                ) from exc
+
+            connect_kwargs = self.get_connection_params()
+            # Django sets the session's autocommit mode itself on checkout.
+            connect_kwargs["autocommit"] = True
+            check = self.settings_dict["CONN_HEALTH_CHECKS"]
+            pool = ConnectionPool(
+                kwargs=connect_kwargs,
+                open=False,
+                check=ConnectionPool.check_connection if check else None,
+                name=f"django-{self.alias}",
+                **({} if pool_options is True else pool_options),
+            )
+            # Threads racing here build spare pools, only the first is kept
+            # and none of them has opened a connection yet.
+            self._connection_pools.setdefault(key, pool)
+        return self._connection_pools[key]
+
+    def close_pool(self):
+        key = (self.alias, self.settings_dict["NAME"])
+        pool = self._connection_pools.pop(key, None)
+        if pool is not None:
+            pool.close()
+
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        params.pop("pool", None)
+        return params
+
+    @async_unsafe
+    def get_new_connection(self, conn_params):
+        pool = self.pool
+        if pool is None:
+            return super().get_new_connection(conn_params)
+        pool.open()
+        connection = pool.getconn()
+        # The per-checkout setup of the parent's fresh connections.
+        options = self.settings_dict["OPTIONS"]
+        try:
+            self.isolation_level = base.IsolationLevel(
+                options.get("isolation_level", base.IsolationLevel.READ_COMMITTED)
+            )
+        except ValueError:
+            pool.putconn(connection)
+            raise ImproperlyConfigured(
+                f"Invalid transaction isolation level "
+                f"{options['isolation_level']} specified."
+            )
+        if "isolation_level" in options:
+            connection.isolation_level = self.isolation_level
+        connection.cursor_factory = (
+            base.ServerBindingCursor
+            if options.get("server_side_binding") is True
+            else base.Cursor
+        )
+        return connection
+
+    def _close(self):
+        if self.connection is not None and self.pool is not None:
+            with self.wrap_database_errors:
+                self.pool.putconn(self.connection)
+                self.connection = None
+            return
+        return super()._close()
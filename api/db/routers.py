@@ -0,0 +1,149 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import (
+    iscoroutinefunction,
+    markcoroutinefunction,
+    sync_to_async,
+)
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+
+# Reads stay on the primary unless a request has said replicas are safe,
+# so management commands, background tasks and shells read what they write.
+use_primary = ContextVar("use_primary", default=True)
+
+
+@contextmanager
+def primary_reads():
+    token = use_primary.set(True)
+    try:
+        yield
+    finally:
+        use_primary.reset(token)
+
+
+def pin_key(user_id) -> str:
+    return f"db:pin:{user_id}"
+
+
+def pin_to_primary(user_id) -> None:
+    """Send `user_id`'s reads to the primary for REPLICA_PIN_SECONDS."""
+    cache.set(pin_key(user_id), True, settings.REPLICA_PIN_SECONDS)
+
+
+def is_pinned(user_id) -> bool:
+    return cache.get(pin_key(user_id), False)
+
+
+async def ais_pinned(user_id) -> bool:
+    return await cache.aget(pin_key(user_id), False)
+
+
+def bearer_user_id(request):
+    """
+    The user id of a request's JWT, checked but without loading the user:
+    routing is decided before DRF authenticates the request.
+    """
+    authentication = JWTAuthentication()
+    header = authentication.get_header(request)
+    raw_token = header and authentication.get_raw_token(header)
+    if not raw_token:
+        return None
+    try:
+        token = authentication.get_validated_token(raw_token)
+    except TokenError:
+        return None
+    return token.get(api_settings.USER_ID_CLAIM)
+
+
+class ReplicaRouter:
+    """
+    Send reads to a random alias of REPLICA_DATABASES and writes to the
+    primary. Reads stay on the primary while `use_primary` is set, the
+    default outside ReplicaPinningMiddleware, so transactions of unsafe
+    requests and tasks read their own writes.
+    """
+
+    def db_for_read(self, model, **hints):
+        replicas = settings.REPLICA_DATABASES
+        if not replicas or use_primary.get():
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary.
+        databases = {DEFAULT_DB_ALIAS, *settings.REPLICA_DATABASES}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+
+class ReplicaPinningMiddleware:
+    """
+    Let safe requests read from the replicas, unless their user wrote
+    something in the last REPLICA_PIN_SECONDS: a successful unsafe request
+    pins its user to the primary for that long, so they see their own
+    likes, comments and posts despite replication lag. Cached API bodies
+    are covered by `api.cache`, which rebuilds recently written entries
+    from the primary.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        safe = request.method in SAFE_METHODS
+        if safe and settings.REPLICA_DATABASES:
+            user_id = bearer_user_id(request)
+            token = use_primary.set(user_id is not None and is_pinned(user_id))
+        else:
+            token = use_primary.set(True)
+        try:
+            response = self.get_response(request)
+        finally:
+            use_primary.reset(token)
+
+        if not safe and settings.REPLICA_DATABASES and response.status_code < 400:
+            self.pin_writer(request)
+        return response
+
+    async def __acall__(self, request):
+        safe = request.method in SAFE_METHODS
+        if safe and settings.REPLICA_DATABASES:
+            user_id = bearer_user_id(request)
+            pinned = user_id is not None and await ais_pinned(user_id)
+            token = use_primary.set(pinned)
+        else:
+            token = use_primary.set(True)
+        try:
+            response = await self.get_response(request)
+        finally:
+            use_primary.reset(token)
+
+        if not safe and settings.REPLICA_DATABASES and response.status_code < 400:
+            # Non-DRF views leave the lazy session user, which may query.
+            await sync_to_async(self.pin_writer)(request)
+        return response
+
+    def pin_writer(self, request):
+        # DRF sets the user it authenticated on the Django request.
+        user = getattr(request, "user", None)
+        if user is not None and user.is_authenticated:
+            pin_to_primary(user.pk)
@@ -0,0 +1,149 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models import F, Q, Window
+from django.db.models.functions import RowNumber
+
+from .models import Post, Follow, TimelineEntry
+
+# Columns read by PostListSerializer.
+POST_LIST_FIELDS = (
+    "id",
+    "title",
+    "published_date",
+    "hashtags",
+    "likes_count",
+    "comments_count",
+    "author__username",
+    "post_media_asset__width",
+    "post_media_asset__height",
+    "post_media_asset__blurhash",
+    "post_media_asset__renditions",
+    "post_media_asset__processed_at",
+)
+
+
+def follower_count(user_id: int) -> int:
+    return (
+        get_user_model()
+        .objects.filter(pk=user_id)
+        .values_list("followers_count", flat=True)
+        .first()
+        or 0
+    )
+
+
+def is_celebrity(user_id: int) -> bool:
+    return follower_count(user_id) >= settings.FEED_CELEBRITY_FOLLOWER_THRESHOLD
+
+
+def fan_out_post(post: Post) -> None:
+    """
+    Push a freshly created post into the timeline of every follower.
+    Authors above the celebrity threshold are skipped, their posts are
+    merged into timelines at read time instead.
+    """
+    if is_celebrity(post.author_id):
+        return
+    batch_size = settings.FEED_FANOUT_BATCH_SIZE
+    follower_ids = (
+        Follow.objects.filter(followed_user_id=post.author_id)
+        .values_list("follower_id", flat=True)
+        .iterator(chunk_size=batch_size)
+    )
+    batch = []
+    for follower_id in follower_ids:
+        batch.append(TimelineEntry(owner_id=follower_id, post=post))
+        if len(batch) >= batch_size:
+            TimelineEntry.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    if batch:
+        TimelineEntry.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+def backfill_timeline(owner, followed_user) -> None:
+    if is_celebrity(followed_user.id):
+        return
+    recent_posts = Post.objects.filter(author=followed_user).order_by("-id")[
+        : settings.FEED_FOLLOW_BACKFILL_SIZE
+    ]
+    TimelineEntry.objects.bulk_create(
+        [TimelineEntry(owner=owner, post=post) for post in recent_posts],
+        ignore_conflicts=True,
+    )
+
+
+def purge_timeline(owner, followed_user) -> None:
+    TimelineEntry.objects.filter(owner=owner, post__author=followed_user).delete()
+
+
+def backfill_timelines(owner, followed_user_ids) -> None:
+    """`backfill_timeline` for many follows, in one read and one write."""
+    recent_posts = (
+        Post.objects.filter(
+            author_id__in=followed_user_ids,
+            author__followers_count__lt=settings.FEED_CELEBRITY_FOLLOWER_THRESHOLD,
+        )
+        .annotate(
+            recency=Window(
+                RowNumber(), partition_by=F("author_id"), order_by=F("id").desc()
+            )
+        )
+        .filter(recency__lte=settings.FEED_FOLLOW_BACKFILL_SIZE)
+        .values_list("id", flat=True)
+    )
+    TimelineEntry.objects.bulk_create(
+        [TimelineEntry(owner=owner, post_id=post_id) for post_id in recent_posts],
+        ignore_conflicts=True,
+    )
+
+
+def purge_timelines(owner, followed_user_ids) -> None:
+    TimelineEntry.objects.filter(
+        owner=owner, post__author_id__in=followed_user_ids
+    ).delete()
+
+
+def celebrities_followed_by(user):
+    return (
+        get_user_model()
+        .objects.filter(
+            followers__follower=user,
+            followers_count__gte=settings.FEED_CELEBRITY_FOLLOWER_THRESHOLD,
+        )
+        .values_list("id", flat=True)
+    )
+
+
+def celebrity_ids_followed_by(user) -> list[int]:
+    return list(celebrities_followed_by(user))
+
+
+async def acelebrity_ids_followed_by(user) -> list[int]:
+    return [user_id async for user_id in celebrities_followed_by(user)]
+
+
+def timeline_queryset(user, celebrity_ids):
+    """
+    Posts of the user's home timeline, newest first. Post ids grow with
+    publication time, so ordering by id walks the (owner, post) index.
+    """
+    if not celebrity_ids:
+        queryset = Post.objects.filter(timeline_entries__owner=user)
+    else:
+        queryset = Post.objects.filter(
+            Q(pk__in=TimelineEntry.objects.filter(owner=user).values("post"))
+            | Q(author_id__in=celebrity_ids)
+        )
+    return (
+        queryset.select_related("author", "post_media_asset")
+        .only(*POST_LIST_FIELDS)
+        .order_by("-id")
+    )
+
+
+def timeline_for(user):
+    return timeline_queryset(user, celebrity_ids_followed_by(user))
+
+
+async def atimeline_for(user):
+    return timeline_queryset(user, await acelebrity_ids_followed_by(user))
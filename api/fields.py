@@ -0,0 +1,115 @@
+import hashlib
+import io
+import pathlib
+import re
+
+from django.core.files.base import ContentFile
+from django.db.models.fields.files import ImageField, ImageFieldFile
+from PIL import Image, ImageOps
+
+EXTENSIONS = {
+    "image/jpeg": ".jpg",
+    "image/png": ".png",
+    "image/gif": ".gif",
+    "image/webp": ".webp",
+}
+
+
+# Formats whose EXIF block is dropped by re-encoding.
+STRIPPED_FORMATS = ("JPEG", "WEBP", "PNG")
+# The last component of a name is the SHA-256 of the bytes.
+CONTENT_ADDRESSED_NAME = re.compile(r"(^|/)[0-9a-f]{64}\.[0-9a-z]+$")
+
+
+def content_addressed_name(directory: str, digest: str, extension: str) -> str:
+    return f"{directory}/{digest[:2]}/{digest}{extension}"
+
+
+def encode_without_metadata(image: Image.Image, image_format: str) -> bytes:
+    """Re-encode without the EXIF block (GPS, device serials)."""
+    options = {"quality": 95} if image_format in ("JPEG", "WEBP") else {}
+    icc_profile = image.info.get("icc_profile")
+    if icc_profile:
+        options["icc_profile"] = icc_profile
+    if image_format == "JPEG" and image.mode != "RGB":
+        image = image.convert("RGB")
+    buffer = io.BytesIO()
+    image.save(buffer, image_format, **options)
+    return buffer.getvalue()
+
+
+def strip_metadata(content):
+    """
+    The upload re-encoded upright and without EXIF when it carries any,
+    otherwise `content` itself. Done before the content addressed save,
+    so the bytes behind a name never change once it has been served.
+    """
+    content.seek(0)
+    try:
+        image = Image.open(content)
+        image_format = image.format
+        has_exif = image_format in STRIPPED_FORMATS and bool(image.getexif())
+    except (OSError, SyntaxError):
+        has_exif = False
+    if not has_exif:
+        content.seek(0)
+        return content
+    image = ImageOps.exif_transpose(image)
+    stripped = ContentFile(
+        encode_without_metadata(image, image_format), name=content.name
+    )
+    stripped.content_type = getattr(content, "content_type", None)
+    return stripped
+
+
+def content_digest(content) -> str:
+    """SHA-256 of an upload, reusing the one computed while streaming it."""
+    digest = getattr(content, "sha256", None)
+    if digest:
+        return digest
+    sha256 = hashlib.sha256()
+    if hasattr(content, "seek"):
+        content.seek(0)
+    for chunk in content.chunks():
+        sha256.update(chunk)
+    content.seek(0)
+    return sha256.hexdigest()
+
+
+class ContentAddressedFieldFile(ImageFieldFile):
+    def save(self, name, content, save=True):
+        """
+        Store under the hash of the uploaded bytes, stripped of metadata.
+        When that name already exists the upload is a duplicate and nothing
+        is written.
+        """
+        extension = EXTENSIONS.get(
+            getattr(content, "content_type", None), pathlib.Path(name).suffix.lower()
+        )
+        content = strip_metadata(content)
+        digest = content_digest(content)
+        name = content_addressed_name(self.field.upload_to, digest, extension)
+        if self.storage.exists(name):
+            # Kept for `api.media.attach_media_asset`, in case the existing
+            # file is collected before it takes its reference.
+            self.deduplicated_content = content
+        else:
+            name = self.storage.save(name, content, max_length=self.field.max_length)
+        self.name = name
+        # This file rather than its name, to keep `deduplicated_content`.
+        setattr(self.instance, self.field.attname, self)
+        self._committed = True
+        if save:
+            self.instance.save()
+
+    save.alters_data = True
+
+
+class ContentAddressedImageField(ImageField):
+    """
+    An ImageField whose files are named by content hash under `upload_to`,
+    so identical uploads share one file. Files are never deleted with the
+    row, `api.media` reference counts them through `MediaAsset`.
+    """
+
+    attr_class = ContentAddressedFieldFile
@@ -0,0 +1,75 @@
+from datetime import date, datetime, time, timedelta
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework.exceptions import ValidationError
+
+
+def _start_of_day(day: date) -> datetime:
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def _parse_moment(name: str, value: str) -> tuple[datetime, datetime]:
+    """Return the (start, end) of the instant or the whole day `value` names."""
+    try:
+        day = parse_date(value)
+        moment = None if day else parse_datetime(value)
+    except ValueError:
+        day = moment = None
+    if day:
+        return _start_of_day(day), _start_of_day(day + timedelta(days=1))
+    if moment:
+        if timezone.is_naive(moment):
+            moment = timezone.make_aware(moment)
+        return moment, moment
+    raise ValidationError({name: "Use an ISO 8601 date or datetime."})
+
+
+def _calendar_range(year: str, month: str, day: str) -> tuple[datetime, datetime]:
+    try:
+        year = int(year)
+        if not month:
+            start, end = date(year, 1, 1), date(year + 1, 1, 1)
+        elif not day:
+            month = int(month)
+            start = date(year, month, 1)
+            end = date(year + month // 12, month % 12 + 1, 1)
+        else:
+            start = date(year, int(month), int(day))
+            end = start + timedelta(days=1)
+    except (ValueError, OverflowError):
+        raise ValidationError({"year": "Invalid year, month or day."})
+    return _start_of_day(start), _start_of_day(end)
+
+
+def filter_by_date(queryset, query_params, field: str):
+    """
+    Apply `since`/`until` and `year`/`month`/`day` params as plain range
+    predicates on `field` so they can use its index. A month or day without
+    a year spans many disjoint ranges and still falls back to extraction.
+    """
+    since = query_params.get("since")
+    until = query_params.get("until")
+    year = query_params.get("year")
+    month = query_params.get("month")
+    day = query_params.get("day")
+
+    if since:
+        start, _ = _parse_moment("since", since)
+        queryset = queryset.filter(**{f"{field}__gte": start})
+    if until:
+        start, end = _parse_moment("until", until)
+        lookup = "lte" if start == end else "lt"
+        queryset = queryset.filter(**{f"{field}__{lookup}": end})
+
+    if year:
+        start, end = _calendar_range(year, month, day if month else None)
+        queryset = queryset.filter(**{f"{field}__gte": start, f"{field}__lt": end})
+        if day and not month:
+            queryset = queryset.filter(**{f"{field}__day": day})
+    else:
+        if month:
+            queryset = queryset.filter(**{f"{field}__month": month})
+        if day:
+            queryset = queryset.filter(**{f"{field}__day": day})
+    return queryset
@@ -0,0 +1,69 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Exists, OuterRef, Value
+
+from .models import Follow, FollowSuggestion
+
+
+def followed_ids(user):
+    """Subquery of the ids `user` follows, answered from `unique_follow`."""
+    return Follow.objects.filter(follower=user).values("followed_user")
+
+
+def annotate_follows_you(queryset, viewer):
+    """Flag users who follow `viewer`, inside the query that loads them."""
+    if not viewer.is_authenticated:
+        return queryset.annotate(follows_you=Value(False))
+    return queryset.annotate(
+        follows_you=Exists(
+            Follow.objects.filter(follower=OuterRef("pk"), followed_user=viewer)
+        )
+    )
+
+
+def mutual_follows(user, other):
+    """Follows of `user` whose target `other` follows as well."""
+    return Follow.objects.filter(
+        follower=user, followed_user__in=followed_ids(other)
+    ).exclude(followed_user=other)
+
+
+def friends_of_friends(user, limit: int):
+    """
+    Users followed by the people `user` follows, ranked by how many of
+    them do, excluding `user` and anyone already followed.
+    """
+    return (
+        Follow.objects.filter(follower__in=followed_ids(user))
+        .exclude(followed_user=user)
+        .exclude(followed_user__in=followed_ids(user))
+        .values("followed_user")
+        .annotate(shared=Count("follower"))
+        .order_by("-shared", "followed_user")
+        .values_list("followed_user", "shared")[:limit]
+    )
+
+
+def compute_follow_suggestions(user) -> int:
+    suggestions = [
+        FollowSuggestion(user=user, suggested_user_id=user_id, shared_count=shared)
+        for user_id, shared in friends_of_friends(
+            user, settings.FOLLOW_SUGGESTIONS_LIMIT
+        )
+    ]
+    with transaction.atomic():
+        FollowSuggestion.objects.filter(user=user).delete()
+        FollowSuggestion.objects.bulk_create(suggestions)
+    return len(suggestions)
+
+
+def suggestions_for(user):
+    """
+    Precomputed suggestions, minus users followed since the batch job
+    last ran.
+    """
+    return (
+        FollowSuggestion.objects.filter(user=user)
+        .exclude(suggested_user__in=followed_ids(user))
+        .order_by("-shared_count", "suggested_user")
+    )
@@ -0,0 +1,86 @@
+import re
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from .models import Post, Hashtag, PostHashtag, HashtagCounter
+
+HASHTAG_RE = re.compile(r"#?(\w{1,100})")
+CONTENT_HASHTAG_RE = re.compile(r"(?<![\w#])#(\w{1,100})")
+
+TRENDING_WINDOWS = {
+    "1h": timedelta(hours=1),
+    "24h": timedelta(hours=24),
+    "7d": timedelta(days=7),
+}
+
+
+def normalize_hashtag(tag: str) -> str:
+    return tag.strip().lstrip("#").lower()
+
+
+def parse_hashtags(post: Post) -> set[str]:
+    """
+    Tags come from the free-form `hashtags` field ("#art, travel") and
+    from `#words` inside the post content.
+    """
+    tags = set()
+    if post.hashtags:
+        tags.update(match.lower() for match in HASHTAG_RE.findall(post.hashtags))
+    tags.update(match.lower() for match in CONTENT_HASHTAG_RE.findall(post.content))
+    return tags
+
+
+def sync_post_hashtags(post: Post) -> None:
+    names = parse_hashtags(post)
+    if not names:
+        PostHashtag.objects.filter(post=post).delete()
+        return
+    Hashtag.objects.bulk_create(
+        [Hashtag(name=name) for name in names], ignore_conflicts=True
+    )
+    hashtag_ids = list(
+        Hashtag.objects.filter(name__in=names).values_list("id", flat=True)
+    )
+    PostHashtag.objects.filter(post=post).exclude(hashtag_id__in=hashtag_ids).delete()
+    PostHashtag.objects.bulk_create(
+        [PostHashtag(post=post, hashtag_id=hashtag_id) for hashtag_id in hashtag_ids],
+        ignore_conflicts=True,
+    )
+
+
+def hour_bucket(moment: datetime) -> datetime:
+    return moment.astimezone(dt_timezone.utc).replace(minute=0, second=0, microsecond=0)
+
+
+def record_hashtag_usage(post: Post) -> None:
+    """Add one use of every tag on the post to the current hourly bucket."""
+    hashtag_ids = list(post.post_tags.values_list("hashtag_id", flat=True))
+    if not hashtag_ids:
+        return
+    bucket = hour_bucket(post.published_date)
+    HashtagCounter.objects.bulk_create(
+        [HashtagCounter(hashtag_id=pk, bucket=bucket) for pk in hashtag_ids],
+        ignore_conflicts=True,
+    )
+    HashtagCounter.objects.filter(bucket=bucket, hashtag_id__in=hashtag_ids).update(
+        count=F("count") + 1
+    )
+
+
+def trending_hashtags(window: str, limit: int) -> list[dict]:
+    cache_key = f"trending-hashtags:{window}:{limit}"
+    trending = cache.get(cache_key)
+    if trending is None:
+        since = hour_bucket(timezone.now() - TRENDING_WINDOWS[window])
+        trending = list(
+            HashtagCounter.objects.filter(bucket__gte=since)
+            .values(name=F("hashtag__name"))
+            .annotate(uses=Sum("count"))
+            .order_by("-uses", "name")[:limit]
+        )
+        cache.set(cache_key, trending, settings.TRENDING_HASHTAGS_CACHE_TTL)
+    return trending
@@ -0,0 +1,72 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+
+class Command(BaseCommand):
+    help = (
+        "Print query plans and timings for the user search filters. Run it "
+        "with `migrate user 0004` and again after `migrate user 0005` to "
+        "compare sequential scans against the trigram/prefix indexes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--seed",
+            type=int,
+            default=0,
+            help="Create this many synthetic users before measuring",
+        )
+        parser.add_argument("--runs", type=int, default=5)
+        parser.add_argument("--term", default="user42")
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        if options["seed"]:
+            self.seed(User, options["seed"])
+
+        term = options["term"]
+        querysets = {
+            "username__icontains": User.objects.filter(username__icontains=term),
+            "email__icontains": User.objects.filter(email__icontains=term),
+            "first_name__icontains": User.objects.filter(first_name__icontains=term),
+            "last_name__icontains": User.objects.filter(last_name__icontains=term),
+            "username__startswith": User.objects.filter(
+                username__startswith=term
+            ).order_by("username"),
+            "follows by follower__username__icontains": User.objects.filter(
+                following__follower__username__icontains=term
+            ),
+        }
+        explain_options = {"analyze": True} if connection.vendor == "postgresql" else {}
+
+        for name, queryset in querysets.items():
+            queryset = queryset.values("id")[:5]
+            timings = []
+            for _ in range(options["runs"]):
+                start = time.perf_counter()
+                list(queryset)
+                timings.append(time.perf_counter() - start)
+            self.stdout.write(
+                self.style.SUCCESS(f"{name}: best {min(timings) * 1000:.2f} ms")
+            )
+            self.stdout.write(queryset.explain(**explain_options))
+            self.stdout.write("")
+
+    def seed(self, User, count):
+        self.stdout.write(f"Seeding {count} users...")
+        start = User.objects.count()
+        User.objects.bulk_create(
+            [
+                User(
+                    username=f"user{index}",
+                    email=f"user{index}@example.com",
+                    first_name=f"first{index}",
+                    last_name=f"last{index}",
+                )
+                for index in range(start, start + count)
+            ],
+            batch_size=5000,
+        )
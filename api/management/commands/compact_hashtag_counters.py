@@ -0,0 +1,52 @@
+from datetime import timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Sum
+from django.db.models.functions import TruncDay
+from django.utils import timezone
+
+from api.models import HashtagCounter
+
+
+class Command(BaseCommand):
+    help = (
+        "Roll hourly hashtag counters older than a day up into daily buckets "
+        "and drop buckets outside the trending retention window"
+    )
+
+    def handle(self, *args, **options):
+        now = timezone.now().astimezone(dt_timezone.utc)
+        rollup_before = (now - timedelta(days=1)).replace(
+            hour=0, minute=0, second=0, microsecond=0
+        )
+        drop_before = now - settings.TRENDING_HASHTAGS_RETENTION
+
+        with transaction.atomic():
+            dropped, _ = HashtagCounter.objects.filter(bucket__lt=drop_before).delete()
+            old_buckets = HashtagCounter.objects.filter(bucket__lt=rollup_before)
+            daily = list(
+                old_buckets.annotate(day=TruncDay("bucket", tzinfo=dt_timezone.utc))
+                .values("hashtag_id", "day")
+                .annotate(total=Sum("count"))
+                .order_by()
+            )
+            old_buckets.delete()
+            HashtagCounter.objects.bulk_create(
+                [
+                    HashtagCounter(
+                        hashtag_id=row["hashtag_id"],
+                        bucket=row["day"],
+                        count=row["total"],
+                    )
+                    for row in daily
+                ]
+            )
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Dropped {dropped} expired buckets, "
+                f"rolled up into {len(daily)} daily buckets"
+            )
+        )
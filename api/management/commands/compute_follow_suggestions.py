@@ -0,0 +1,34 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from api.graph import compute_follow_suggestions
+from api.models import FollowSuggestion
+
+
+class Command(BaseCommand):
+    help = "Precompute friend-of-friend follow suggestions for every user"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--user",
+            dest="usernames",
+            action="append",
+            help="Only recompute suggestions for this username (repeatable)",
+        )
+
+    def handle(self, *args, usernames=None, **options):
+        users = get_user_model().objects.only("id")
+        if usernames:
+            users = users.filter(username__in=usernames)
+        else:
+            # Nobody followed means no friends of friends either.
+            FollowSuggestion.objects.filter(user__following_count=0).delete()
+            users = users.filter(following_count__gt=0)
+
+        computed = suggested = 0
+        for user in users.iterator(chunk_size=1000):
+            suggested += compute_follow_suggestions(user)
+            computed += 1
+        self.stdout.write(
+            self.style.SUCCESS(f"Stored {suggested} suggestions for {computed} users")
+        )
@@ -0,0 +1,197 @@
+import asyncio
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+import aiohttp
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework_simplejwt.tokens import AccessToken
+
+from api.models import Post
+
+DEFAULT_PATHS = (
+    "/api/social-media/posts/",
+    "/api/social-media/posts/{post}/",
+    "/api/user/{username}/",
+    "/api/social-media/feed/",
+)
+SERVER_MODES = ("wsgi", "asgi")
+
+
+async def run_load(base_url, paths, headers, total, concurrency):
+    """Issue `total` GETs over `paths` from `concurrency` clients."""
+    latencies = []
+    errors = 0
+    issued = 0
+
+    async def client(session):
+        nonlocal errors, issued
+        while issued < total:
+            path = paths[issued % len(paths)]
+            issued += 1
+            start = time.perf_counter()
+            try:
+                async with session.get(base_url + path) as response:
+                    await response.read()
+                    if response.status != 200:
+                        errors += 1
+            except aiohttp.ClientError:
+                errors += 1
+            latencies.append(time.perf_counter() - start)
+
+    timeout = aiohttp.ClientTimeout(total=60)
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(
+        headers=headers, timeout=timeout, connector=connector
+    ) as session:
+        start = time.perf_counter()
+        await asyncio.gather(*(client(session) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    percentiles = statistics.quantiles(latencies, n=100, method="inclusive")
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput": len(latencies) / elapsed,
+        "p50": percentiles[49] * 1000,
+        "p99": percentiles[98] * 1000,
+    }
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_port(port, process, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise CommandError("The server exited during startup")
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise CommandError(f"The server did not listen on {port} in {timeout}s")
+
+
+class Command(BaseCommand):
+    help = (
+        "Load test the read endpoints and report throughput and p50/p99 "
+        "latency. With --serve it starts gunicorn in each SERVER_MODE in turn "
+        "(see gunicorn.conf.py) against the configured database, so WSGI and "
+        "ASGI can be compared on the same data; otherwise it targets --url."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--url", default="http://127.0.0.1:8000")
+        parser.add_argument(
+            "--serve",
+            nargs="*",
+            choices=SERVER_MODES,
+            help="Start gunicorn in these modes (default both) instead of --url",
+        )
+        parser.add_argument("--workers", type=int, help="WEB_CONCURRENCY to use")
+        parser.add_argument("--requests", type=int, default=2000)
+        parser.add_argument("--concurrency", type=int, default=50)
+        parser.add_argument("--warmup", type=int, default=100)
+        parser.add_argument(
+            "--username",
+            help="User to authenticate as, defaults to the one with most follows",
+        )
+        parser.add_argument(
+            "--path",
+            action="append",
+            dest="paths",
+            help="Path to request, may repeat. {post} and {username} are "
+            "filled in. Defaults to post list/detail, user detail and feed",
+        )
+
+    def handle(self, *args, **options):
+        self.options = options
+        user = self.get_user(options["username"])
+        post = Post.objects.order_by("-id").values_list("id", flat=True).first()
+        paths = [
+            path.format(post=post, username=user.username)
+            for path in options["paths"] or DEFAULT_PATHS
+        ]
+        headers = {"Authorization": f"Bearer {AccessToken.for_user(user)}"}
+
+        if options["serve"] is None:
+            runs = {options["url"]: lambda: self.load(options["url"], paths, headers)}
+        else:
+            runs = {
+                mode: lambda mode=mode: self.serve_and_load(
+                    mode, options, paths, headers
+                )
+                for mode in options["serve"] or SERVER_MODES
+            }
+
+        results = {name: run() for name, run in runs.items()}
+        self.stdout.write(
+            f"{'target':<24}{'requests':>10}{'errors':>8}"
+            f"{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}"
+        )
+        for name, result in results.items():
+            self.stdout.write(
+                f"{name:<24}{result['requests']:>10}{result['errors']:>8}"
+                f"{result['throughput']:>10.1f}{result['p50']:>10.1f}"
+                f"{result['p99']:>10.1f}"
+            )
+
+    def get_user(self, username):
+        users = get_user_model().objects.all()
+        if username:
+            user = users.filter(username=username).first()
+        else:
+            user = users.order_by("-following_count", "pk").first()
+        if user is None:
+            raise CommandError("No user to authenticate as, seed some data first")
+        return user
+
+    def load(self, base_url, paths, headers):
+        options = self.options
+        if options["warmup"]:
+            asyncio.run(
+                run_load(
+                    base_url, paths, headers, options["warmup"], options["concurrency"]
+                )
+            )
+        return asyncio.run(
+            run_load(
+                base_url, paths, headers, options["requests"], options["concurrency"]
+            )
+        )
+
+    def serve_and_load(self, mode, options, paths, headers):
+        port = free_port()
+        env = {**os.environ, "SERVER_MODE": mode, "BIND": f"127.0.0.1:{port}"}
+        if options["workers"]:
+            env["WEB_CONCURRENCY"] = str(options["workers"])
+        self.stdout.write(f"Starting gunicorn ({mode}) on port {port}...")
+        process = subprocess.Popen(
+            [
+                sys.executable,
+                "-m",
+                "gunicorn",
+                "-c",
+                str(settings.BASE_DIR / "gunicorn.conf.py"),
+                "--access-logfile",
+                "/dev/null",
+            ],
+            cwd=settings.BASE_DIR,
+            env=env,
+        )
+        try:
+            wait_for_port(port, process)
+            return self.load(f"http://127.0.0.1:{port}", paths, headers)
+        finally:
+            process.terminate()
+            process.wait()
@@ -0,0 +1,34 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, OuterRef, Subquery, IntegerField
+from django.db.models.functions import Coalesce
+
+from api.models import Follow
+
+
+def _count_subquery(field):
+    return Coalesce(
+        Subquery(
+            Follow.objects.filter(**{field: OuterRef("pk")})
+            .order_by()
+            .values(field)
+            .annotate(total=Count("pk"))
+            .values("total"),
+            output_field=IntegerField(),
+        ),
+        0,
+    )
+
+
+class Command(BaseCommand):
+    help = "Recalculate denormalized follower/following counters on every user"
+
+    def handle(self, *args, **options):
+        self.stdout.write("Rebuilding follow counters...")
+        with transaction.atomic():
+            updated = get_user_model().objects.update(
+                followers_count=_count_subquery("followed_user"),
+                following_count=_count_subquery("follower"),
+            )
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt counters for {updated} users"))
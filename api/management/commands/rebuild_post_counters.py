@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, OuterRef, Subquery, IntegerField
+from django.db.models.functions import Coalesce
+
+from api.models import Post, Comment, Like
+
+
+def _count_subquery(model, **filters):
+    return Coalesce(
+        Subquery(
+            model.objects.filter(**filters)
+            .order_by()
+            .values("post")
+            .annotate(total=Count("pk"))
+            .values("total"),
+            output_field=IntegerField(),
+        ),
+        0,
+    )
+
+
+class Command(BaseCommand):
+    help = "Recalculate denormalized like/comment counters on every post"
+
+    def handle(self, *args, **options):
+        self.stdout.write("Rebuilding post counters...")
+        with transaction.atomic():
+            updated = Post.objects.update(
+                likes_count=_count_subquery(Like, post=OuterRef("pk")),
+                comments_count=_count_subquery(Comment, post=OuterRef("pk")),
+            )
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt counters for {updated} posts"))
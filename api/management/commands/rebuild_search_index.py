@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from api.search import get_search_backend
+
+
+class Command(BaseCommand):
+    help = "Rebuild the full-text search index for posts and comments"
+
+    def handle(self, *args, **options):
+        backend = get_search_backend()
+        self.stdout.write(f"Rebuilding search index with {type(backend).__name__}...")
+        with transaction.atomic():
+            backend.rebuild()
+        self.stdout.write(self.style.SUCCESS("Search index rebuilt"))
@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.tasks import run_pending_tasks
+
+
+class Command(BaseCommand):
+    help = "Work off queued background jobs such as image processing"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Run the jobs that are due now and exit",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=1.0,
+            help="Seconds to sleep when the queue is empty",
+        )
+
+    def handle(self, *args, once=False, poll_interval=1.0, **options):
+        if once:
+            done = run_pending_tasks()
+            self.stdout.write(self.style.SUCCESS(f"Ran {done} tasks"))
+            return
+        self.stdout.write("Waiting for tasks...")
+        while True:
+            if not run_pending_tasks(limit=100):
+                time.sleep(poll_interval)
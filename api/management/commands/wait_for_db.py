@@ -1,19 +1,48 @@
 import time
 
 from django.core.management.base import BaseCommand, CommandError
-from psycopg import OperationalError
-from django.db import connections
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connections
 
 
 class Command(BaseCommand):
-    def handle(self, *args, **options):
+    help = (
+        "Block until the database accepts connections and answers a query, "
+        "retrying with exponential backoff"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--database", default=DEFAULT_DB_ALIAS)
+        parser.add_argument(
+            "--timeout",
+            type=float,
+            default=60,
+            help="Give up after this many seconds",
+        )
+        parser.add_argument(
+            "--max-delay",
+            type=float,
+            default=5,
+            help="Longest pause between two attempts, in seconds",
+        )
+
+    def handle(self, *args, database, timeout, max_delay, **options):
         self.stdout.write("Waiting for database...")
-        db_connection = None
-        while not db_connection:
+        connection = connections[database]
+        deadline = time.monotonic() + timeout
+        delay = 0.1
+        while True:
             try:
-                db_connection = connections["default"]
-            except OperationalError:
-                raise CommandError("Database unavailable,waiting 1 seconds")
-            time.sleep(1)
+                with connection.cursor() as cursor:
+                    cursor.execute("SELECT 1")
+                    cursor.fetchone()
+                break
+            except OperationalError as exc:
+                # Drop the failed connection so the next attempt reconnects.
+                connection.close()
+                if time.monotonic() + delay > deadline:
+                    raise CommandError(f"Database unavailable after {timeout}s: {exc}")
+                self.stdout.write(f"Database unavailable, retrying in {delay:.1f}s")
+                time.sleep(delay)
+                delay = min(delay * 2, max_delay)
 
         self.stdout.write(self.style.SUCCESS("Database available!"))
@@ -0,0 +1,310 @@
+import hashlib
+import io
+import math
+import pathlib
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Greatest, Now
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+from .cache import invalidate, POST, POSTS, PROFILE
+from .fields import STRIPPED_FORMATS, content_addressed_name, encode_without_metadata
+from .models import MediaAsset, Post
+from .tasks import enqueue
+
+BASE83 = (
+    "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+    "abcdefghijklmnopqrstuvwxyz#$%*+,-.:;=?@[]^_{|}~"
+)
+BLURHASH_COMPONENTS = (4, 3)
+BLURHASH_SAMPLE_SIZE = 32
+PIL_FORMATS = {"webp": "WEBP", "jpeg": "JPEG"}
+
+
+def _base83(value: int, length: int) -> str:
+    return "".join(
+        BASE83[(value // 83 ** (length - i)) % 83] for i in range(1, length + 1)
+    )
+
+
+def _srgb_to_linear(value: int) -> float:
+    value = value / 255
+    if value <= 0.04045:
+        return value / 12.92
+    return ((value + 0.055) / 1.055) ** 2.4
+
+
+def _linear_to_srgb(value: float) -> int:
+    value = max(0.0, min(1.0, value))
+    if value <= 0.0031308:
+        return int(value * 12.92 * 255 + 0.5)
+    return int((1.055 * value ** (1 / 2.4) - 0.055) * 255 + 0.5)
+
+
+def _sign_pow(value: float, exponent: float) -> float:
+    return math.copysign(abs(value) ** exponent, value)
+
+
+def blurhash(image: Image.Image) -> str:
+    """Encode a downscaled copy of the image as a blurhash placeholder."""
+    components_x, components_y = BLURHASH_COMPONENTS
+    sample = image.convert("RGB")
+    sample.thumbnail((BLURHASH_SAMPLE_SIZE, BLURHASH_SAMPLE_SIZE))
+    width, height = sample.size
+    pixels = [tuple(map(_srgb_to_linear, pixel)) for pixel in sample.getdata()]
+
+    factors = []
+    for j in range(components_y):
+        cos_y = [math.cos(math.pi * j * y / height) for y in range(height)]
+        for i in range(components_x):
+            cos_x = [math.cos(math.pi * i * x / width) for x in range(width)]
+            scale = (1 if i == j == 0 else 2) / (width * height)
+            r = g = b = 0.0
+            for index, (pr, pg, pb) in enumerate(pixels):
+                basis = cos_x[index % width] * cos_y[index // width]
+                r += basis * pr
+                g += basis * pg
+                b += basis * pb
+            factors.append((r * scale, g * scale, b * scale))
+
+    dc, ac = factors[0], factors[1:]
+    result = _base83((components_x - 1) + (components_y - 1) * 9, 1)
+    if ac:
+        actual_max = max(abs(channel) for factor in ac for channel in factor)
+        quantised_max = max(0, min(82, int(actual_max * 166 - 0.5)))
+        maximum = (quantised_max + 1) / 166
+        result += _base83(quantised_max, 1)
+    else:
+        maximum = 1
+        result += _base83(0, 1)
+    r, g, b = (_linear_to_srgb(channel) for channel in dc)
+    result += _base83((r << 16) + (g << 8) + b, 4)
+    for factor in ac:
+        r, g, b = (
+            max(0, min(18, int(_sign_pow(channel / maximum, 0.5) * 9 + 9.5)))
+            for channel in factor
+        )
+        result += _base83(r * 19 * 19 + g * 19 + b, 2)
+    return result
+
+
+def _encode(image: Image.Image, image_format: str, **options) -> bytes:
+    if image_format == "JPEG" and image.mode != "RGB":
+        image = image.convert("RGB")
+    buffer = io.BytesIO()
+    image.save(buffer, image_format, **options)
+    return buffer.getvalue()
+
+
+def _store(directory: str, content: bytes, extension: str) -> str:
+    """Save `content` under its hash in `directory`, unless already there."""
+    name = content_addressed_name(
+        directory, hashlib.sha256(content).hexdigest(), extension
+    )
+    if not default_storage.exists(name):
+        name = default_storage.save(name, ContentFile(content))
+    return name
+
+
+def _restore_stripped_original(asset: MediaAsset, image, source_format: str):
+    """
+    Uploads are stripped before they are stored, files kept from before
+    still carry their EXIF block. The stripped bytes get their own content
+    addressed name, as the old one may already be cached as immutable, and
+    the asset and its owners move over to it. Returns the asset to go on
+    processing, or None when another asset already had that name and the
+    owners were handed to it.
+    """
+    if source_format not in STRIPPED_FORMATS:
+        return asset
+    old_name = asset.file
+    name = _store(
+        Post._meta.get_field("post_media").upload_to,
+        encode_without_metadata(image, source_format),
+        pathlib.PurePosixPath(old_name).suffix,
+    )
+    posts = Post.objects.filter(post_media_asset_id=asset.pk)
+    users = get_user_model().objects.filter(profile_image_asset_id=asset.pk)
+    with transaction.atomic():
+        existing = (
+            MediaAsset.objects.select_for_update()
+            .filter(file=name)
+            .exclude(pk=asset.pk)
+            .first()
+        )
+        if existing is None:
+            MediaAsset.objects.filter(pk=asset.pk).update(file=name)
+            posts.update(post_media=name)
+            users.update(profile_image=name)
+            transaction.on_commit(lambda: default_storage.delete(old_name))
+            asset.file = name
+            return asset
+        refs = posts.update(post_media=name, post_media_asset=existing)
+        refs += users.update(profile_image=name, profile_image_asset=existing)
+        MediaAsset.objects.filter(pk=existing.pk).update(
+            ref_count=F("ref_count") + refs
+        )
+        MediaAsset.objects.filter(pk=asset.pk).update(ref_count=0)
+        enqueue("api.media.collect_media_asset", asset.pk)
+    _touch_owners(existing.pk)
+    return None
+
+
+def make_renditions(asset: MediaAsset, image: Image.Image) -> dict:
+    directory = f"upload/renditions/{asset.pk}"
+    widths = [width for width in settings.MEDIA_RENDITION_WIDTHS if width < image.width]
+    if not widths:
+        widths = [image.width]
+    renditions = {}
+    for width in widths:
+        resized = image.copy()
+        resized.thumbnail((width, image.height), Image.Resampling.LANCZOS)
+        for extension in settings.MEDIA_RENDITION_FORMATS:
+            content = _encode(
+                resized,
+                PIL_FORMATS[extension],
+                quality=settings.MEDIA_RENDITION_QUALITY,
+            )
+            name = _store(directory, content, f".{extension}")
+            renditions[f"{width}.{extension}"] = {
+                "file": name,
+                "width": resized.width,
+                "height": resized.height,
+                "format": extension,
+            }
+    return renditions
+
+
+def _touch_owners(asset_id: int) -> None:
+    """Cached post/profile bodies embed the renditions, move them on."""
+    changed = dict(version=F("version") + 1, updated_at=Now())
+    posts = Post.objects.filter(post_media_asset_id=asset_id)
+    post_ids = list(posts.values_list("id", flat=True))
+    if post_ids:
+        posts.update(**changed)
+        for post_id in post_ids:
+            invalidate(POST, post_id)
+        invalidate(POSTS)
+    users = get_user_model().objects.filter(profile_image_asset_id=asset_id)
+    usernames = list(users.values_list("username", flat=True))
+    if usernames:
+        users.update(**changed)
+        for username in usernames:
+            invalidate(PROFILE, username)
+
+
+def process_media_asset(asset_id: int) -> None:
+    """Worker entry point, see `attach_media_asset`."""
+    asset = MediaAsset.objects.filter(pk=asset_id).first()
+    if asset is None or not default_storage.exists(asset.file):
+        return
+    with default_storage.open(asset.file) as original:
+        image = Image.open(original)
+        source_format = image.format
+        has_exif = bool(image.getexif())
+        image = ImageOps.exif_transpose(image)
+        image.load()
+    if has_exif:
+        asset = _restore_stripped_original(asset, image, source_format)
+        if asset is None:
+            return
+
+    asset.width, asset.height = image.size
+    asset.blurhash = blurhash(image)
+    asset.renditions = make_renditions(asset, image)
+    asset.processed_at = timezone.now()
+    asset.save(
+        update_fields=["width", "height", "blurhash", "renditions", "processed_at"]
+    )
+    _touch_owners(asset.pk)
+
+
+def attach_media_asset(instance, file_field: str, asset_field: str) -> None:
+    """
+    Point `asset_field` at the asset for the file now in `file_field`,
+    taking a reference on it and releasing the previous one. New assets
+    are queued for processing. Called after the instance has been saved,
+    so the upload is already in storage.
+    """
+    file = getattr(instance, file_field)
+    name = file.name if file else None
+    asset_id = getattr(instance, f"{asset_field}_id")
+    if asset_id is not None:
+        current = (
+            MediaAsset.objects.filter(pk=asset_id)
+            .values_list("file", flat=True)
+            .first()
+        )
+        if current == name:
+            return
+    elif name is None:
+        return
+
+    asset = None
+    if name is not None:
+        asset = _take_media_reference(file)
+    type(instance)._default_manager.filter(pk=instance.pk).update(
+        **{asset_field: asset}
+    )
+    setattr(instance, asset_field, asset)
+    if asset_id is not None:
+        release_media_asset(asset_id)
+
+
+def _take_media_reference(file) -> MediaAsset:
+    """
+    Reference the asset for `file`, creating it if needed. The row lock
+    keeps `collect_media_asset` off it meanwhile. If it was collected
+    after the upload was found to be a duplicate, the file is gone and
+    is written again.
+    """
+    with transaction.atomic():
+        asset = MediaAsset.objects.select_for_update().filter(file=file.name).first()
+        created = asset is None
+        if created:
+            asset, created = MediaAsset.objects.get_or_create(file=file.name)
+        MediaAsset.objects.filter(pk=asset.pk).update(ref_count=F("ref_count") + 1)
+    content = getattr(file, "deduplicated_content", None)
+    if created and content is not None and not default_storage.exists(file.name):
+        content.seek(0)
+        name = default_storage.save(file.name, content)
+        if name != file.name:
+            # Another writer put the same bytes back first.
+            default_storage.delete(name)
+    if created:
+        enqueue("api.media.process_media_asset", asset.pk)
+    return asset
+
+
+def release_media_asset(asset_id: int) -> None:
+    """Drop one reference, files without any are collected by the worker."""
+    assets = MediaAsset.objects.filter(pk=asset_id)
+    assets.update(ref_count=Greatest(F("ref_count") - 1, 0))
+    if assets.filter(ref_count=0).exists():
+        enqueue("api.media.collect_media_asset", asset_id)
+
+
+def collect_media_asset(asset_id: int) -> None:
+    """
+    Delete an unreferenced asset with its files. Runs after the releasing
+    transaction committed, and skips assets that were reused meanwhile.
+    """
+    with transaction.atomic():
+        asset = (
+            MediaAsset.objects.select_for_update()
+            .filter(pk=asset_id, ref_count=0)
+            .first()
+        )
+        if asset is None:
+            return
+        asset.delete()
+        # Under the lock, so a new reference to the same content waits and
+        # then writes the file again, see `_take_media_reference`.
+        for name in [asset.file, *(r["file"] for r in asset.renditions.values())]:
+            default_storage.delete(name)
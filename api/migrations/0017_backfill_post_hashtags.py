@@ -0,0 +1,44 @@
+import re
+
+from django.db import migrations
+
+HASHTAG_RE = re.compile(r"#?(\w{1,100})")
+CONTENT_HASHTAG_RE = re.compile(r"(?<![\w#])#(\w{1,100})")
+
+
+def backfill_hashtags(apps, schema_editor):
+    Post = apps.get_model("api", "Post")
+    Hashtag = apps.get_model("api", "Hashtag")
+    PostHashtag = apps.get_model("api", "PostHashtag")
+
+    posts = Post.objects.only("id", "hashtags", "content").iterator(chunk_size=1000)
+    for post in posts:
+        names = set(CONTENT_HASHTAG_RE.findall(post.content))
+        if post.hashtags:
+            names.update(HASHTAG_RE.findall(post.hashtags))
+        names = {name.lower() for name in names}
+        if not names:
+            continue
+        Hashtag.objects.bulk_create(
+            [Hashtag(name=name) for name in names], ignore_conflicts=True
+        )
+        PostHashtag.objects.bulk_create(
+            [
+                PostHashtag(post_id=post.id, hashtag_id=hashtag_id)
+                for hashtag_id in Hashtag.objects.filter(name__in=names).values_list(
+                    "id", flat=True
+                )
+            ],
+            ignore_conflicts=True,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0016_hashtag_posthashtag_post_tags"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_hashtags, migrations.RunPython.noop),
+    ]
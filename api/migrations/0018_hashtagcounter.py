@@ -0,0 +1,44 @@
+# Generated by Django 4.2 on 2026-10-18 16:40
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0017_backfill_post_hashtags"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="HashtagCounter",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("bucket", models.DateTimeField()),
+                ("count", models.PositiveIntegerField(default=0)),
+                (
+                    "hashtag",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="counters",
+                        to="api.hashtag",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name="hashtagcounter",
+            constraint=models.UniqueConstraint(
+                fields=("bucket", "hashtag"), name="unique_hashtag_counter_bucket"
+            ),
+        ),
+    ]
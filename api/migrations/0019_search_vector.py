@@ -0,0 +1,69 @@
+# Generated by Django 4.2 on 2026-10-18 16:42
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+POSTGRES_FORWARD = [
+    "CREATE INDEX api_post_search_vector_gin ON api_post USING gin (search_vector)",
+    "CREATE INDEX api_comment_search_vector_gin ON api_comment "
+    "USING gin (search_vector)",
+    "UPDATE api_post SET search_vector = "
+    "setweight(to_tsvector(coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector(coalesce(content, '')), 'B')",
+    "UPDATE api_comment SET search_vector = "
+    "setweight(to_tsvector(coalesce(body, '')), 'C')",
+]
+POSTGRES_BACKWARD = [
+    "DROP INDEX IF EXISTS api_post_search_vector_gin",
+    "DROP INDEX IF EXISTS api_comment_search_vector_gin",
+]
+SQLITE_FORWARD = [
+    "CREATE VIRTUAL TABLE api_post_fts USING fts5(title, content)",
+    "CREATE VIRTUAL TABLE api_comment_fts USING fts5(body)",
+    "INSERT INTO api_post_fts (rowid, title, content) "
+    "SELECT id, title, content FROM api_post",
+    "INSERT INTO api_comment_fts (rowid, body) SELECT id, body FROM api_comment",
+]
+SQLITE_BACKWARD = [
+    "DROP TABLE IF EXISTS api_post_fts",
+    "DROP TABLE IF EXISTS api_comment_fts",
+]
+
+
+def run_for_vendor(postgres, sqlite):
+    def operation(apps, schema_editor):
+        statements = {"postgresql": postgres, "sqlite": sqlite}.get(
+            schema_editor.connection.vendor, []
+        )
+        for statement in statements:
+            schema_editor.execute(statement)
+
+    return operation
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0018_hashtagcounter"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="comment",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, null=True
+            ),
+        ),
+        migrations.AddField(
+            model_name="post",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, null=True
+            ),
+        ),
+        migrations.RunPython(
+            run_for_vendor(POSTGRES_FORWARD, SQLITE_FORWARD),
+            run_for_vendor(POSTGRES_BACKWARD, SQLITE_BACKWARD),
+        ),
+    ]
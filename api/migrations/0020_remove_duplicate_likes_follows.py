@@ -0,0 +1,52 @@
+# Generated by Django 4.2 on 2026-10-18 16:47
+
+from django.db import migrations
+from django.db.models import Count, F, IntegerField, Min, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def delete_duplicates(model, fields):
+    duplicates = (
+        model.objects.values(*fields)
+        .annotate(keep=Min("id"), total=Count("id"))
+        .filter(total__gt=1)
+        .order_by()
+    )
+    for row in duplicates:
+        keep = row.pop("keep")
+        row.pop("total")
+        model.objects.filter(**row).exclude(id=keep).delete()
+
+
+def remove_duplicates(apps, schema_editor):
+    Like = apps.get_model("api", "Like")
+    Follow = apps.get_model("api", "Follow")
+    Post = apps.get_model("api", "Post")
+
+    delete_duplicates(Like, ["user", "post"])
+    delete_duplicates(Follow, ["follower", "followed_user"])
+    Follow.objects.filter(follower=F("followed_user")).delete()
+    Post.objects.update(
+        likes_count=Coalesce(
+            Subquery(
+                Like.objects.filter(post=OuterRef("pk"))
+                .order_by()
+                .values("post")
+                .annotate(total=Count("pk"))
+                .values("total"),
+                output_field=IntegerField(),
+            ),
+            0,
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0019_search_vector"),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicates, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,38 @@
+from django.db import migrations
+from django.db.models import Count, OuterRef, Subquery, IntegerField
+from django.db.models.functions import Coalesce
+
+
+def backfill_follow_counters(apps, schema_editor):
+    User = apps.get_model("user", "User")
+    Follow = apps.get_model("api", "Follow")
+
+    def count_of(field):
+        return Coalesce(
+            Subquery(
+                Follow.objects.filter(**{field: OuterRef("pk")})
+                .order_by()
+                .values(field)
+                .annotate(total=Count("pk"))
+                .values("total"),
+                output_field=IntegerField(),
+            ),
+            0,
+        )
+
+    User.objects.update(
+        followers_count=count_of("followed_user"),
+        following_count=count_of("follower"),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0022_post_updated_at_post_version"),
+        ("user", "0007_user_followers_count_user_following_count"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_follow_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,68 @@
+from django.db import migrations
+from django.db.models import Count, OuterRef, Subquery, IntegerField
+from django.db.models.functions import Coalesce
+
+BATCH_SIZE = 1000
+
+
+def copy_edges(Follow, rows):
+    """`rows` yields (follower_id, followed_user_id) pairs."""
+    batch = []
+    for follower_id, followed_user_id in rows:
+        if follower_id == followed_user_id:
+            continue
+        batch.append(Follow(follower_id=follower_id, followed_user_id=followed_user_id))
+        if len(batch) >= BATCH_SIZE:
+            Follow.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    if batch:
+        Follow.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+def reconcile_follow_graph(apps, schema_editor):
+    """
+    Fold the legacy User.user_followers/user_following M2M tables into
+    Follow. `a.user_followers` holding `b` means b follows a, and
+    `a.user_following` holding `b` means a follows b.
+    """
+    User = apps.get_model("user", "User")
+    Follow = apps.get_model("api", "Follow")
+
+    followers = User.user_followers.through.objects.values_list(
+        "to_user_id", "from_user_id"
+    )
+    following = User.user_following.through.objects.values_list(
+        "from_user_id", "to_user_id"
+    )
+    copy_edges(Follow, followers.iterator(chunk_size=BATCH_SIZE))
+    copy_edges(Follow, following.iterator(chunk_size=BATCH_SIZE))
+
+    def count_of(field):
+        return Coalesce(
+            Subquery(
+                Follow.objects.filter(**{field: OuterRef("pk")})
+                .order_by()
+                .values(field)
+                .annotate(total=Count("pk"))
+                .values("total"),
+                output_field=IntegerField(),
+            ),
+            0,
+        )
+
+    User.objects.update(
+        followers_count=count_of("followed_user"),
+        following_count=count_of("follower"),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0023_backfill_follow_counters"),
+        ("user", "0007_user_followers_count_user_following_count"),
+    ]
+
+    operations = [
+        migrations.RunPython(reconcile_follow_graph, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 4.2 on 2026-10-18 17:24
+
+import api.fields
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0027_mediaasset_task"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="mediaasset",
+            name="ref_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AlterField(
+            model_name="post",
+            name="post_media",
+            field=api.fields.ContentAddressedImageField(
+                blank=True, null=True, upload_to="upload/media"
+            ),
+        ),
+    ]
@@ -0,0 +1,86 @@
+from django.db import migrations
+from django.db.models import Count, Max, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+BATCH_SIZE = 1000
+
+
+def backfill_media_refs(apps, schema_editor):
+    """
+    Give files uploaded before the pipeline existed an asset, link their
+    owners to it and count references. Existing files keep their names,
+    only new uploads are content addressed. The new assets are queued.
+    """
+    User = apps.get_model("user", "User")
+    Post = apps.get_model("api", "Post")
+    MediaAsset = apps.get_model("api", "MediaAsset")
+    Task = apps.get_model("api", "Task")
+
+    last_pk = MediaAsset.objects.aggregate(last=Max("pk"))["last"] or 0
+    owners = (
+        (Post, "post_media", "post_media_asset"),
+        (User, "profile_image", "profile_image_asset"),
+    )
+    for model, file_field, asset_field in owners:
+        missing = (
+            model.objects.filter(**{f"{asset_field}__isnull": True})
+            .exclude(**{file_field: ""})
+            .exclude(**{f"{file_field}__isnull": True})
+            .values_list(file_field, flat=True)
+            .distinct()
+        )
+        MediaAsset.objects.bulk_create(
+            (MediaAsset(file=name) for name in missing.iterator(BATCH_SIZE)),
+            batch_size=BATCH_SIZE,
+            ignore_conflicts=True,
+        )
+        model.objects.filter(**{f"{asset_field}__isnull": True}).exclude(
+            **{file_field: ""}
+        ).update(
+            **{
+                asset_field: Subquery(
+                    MediaAsset.objects.filter(file=OuterRef(file_field)).values("pk")[
+                        :1
+                    ]
+                )
+            }
+        )
+
+    def count_of(model, asset_field):
+        return Coalesce(
+            Subquery(
+                model.objects.filter(**{asset_field: OuterRef("pk")})
+                .order_by()
+                .values(asset_field)
+                .annotate(total=Count("pk"))
+                .values("total"),
+                output_field=IntegerField(),
+            ),
+            0,
+        )
+
+    MediaAsset.objects.update(
+        ref_count=count_of(Post, "post_media_asset")
+        + count_of(User, "profile_image_asset")
+    )
+
+    pending = MediaAsset.objects.filter(pk__gt=last_pk)
+    Task.objects.bulk_create(
+        (
+            Task(name="api.media.process_media_asset", args=[asset_id])
+            for asset_id in pending.values_list("pk", flat=True).iterator(BATCH_SIZE)
+        ),
+        batch_size=BATCH_SIZE,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0028_mediaasset_ref_count_alter_post_post_media"),
+        ("user", "0010_alter_user_profile_image"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_media_refs, migrations.RunPython.noop),
+    ]
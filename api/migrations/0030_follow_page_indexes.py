@@ -0,0 +1,27 @@
+# Generated by Django 4.2 on 2026-10-18 18:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0029_backfill_media_refs"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="follow",
+            index=models.Index(
+                fields=["followed_user", "followed_at", "id"],
+                name="follow_followers_page_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="follow",
+            index=models.Index(
+                fields=["follower", "followed_at", "id"],
+                name="follow_following_page_idx",
+            ),
+        ),
+    ]
@@ -1,13 +1,21 @@
 import pathlib
 import uuid
 
-from django.db import models
+from django.contrib.postgres.search import SearchVectorField
+from django.core.exceptions import ValidationError
+from django.db import models, connections
+from django.db.models import F
+from django.db.models.signals import post_save
 from django.conf import settings
+from django.utils import timezone
 from django.utils.text import slugify
 
 from user.models import User
 
+from .fields import ContentAddressedImageField
 
+
+# Upload paths before content addressing, kept for historical migrations.
 def post_image_path(instance: "Post", filename: str) -> pathlib.Path:
     filename = (
         f"{slugify(instance.title)}-{uuid.uuid4()}" + pathlib.Path(filename).suffix
@@ -15,6 +23,105 @@ def post_image_path(instance: "Post", filename: str) -> pathlib.Path:
     return pathlib.Path("upload/posts") / pathlib.Path(filename)
 
 
+class InsertIgnoreQuerySet(models.QuerySet):
+    def create_or_ignore(self, **kwargs):
+        """
+        Insert a row with `INSERT ... ON CONFLICT DO NOTHING RETURNING id`.
+        Return the saved instance, or None when a unique constraint already
+        holds an equal row, in one round trip and without a race window.
+        """
+        obj = self.model(**kwargs)
+        inserted = self.bulk_create_or_ignore([obj], self.model._meta.pk.attname)
+        if not inserted:
+            return None
+        obj.pk = inserted[0]
+        obj._state.adding = False
+        obj._state.db = self.db
+        post_save.send(
+            sender=self.model,
+            instance=obj,
+            created=True,
+            update_fields=None,
+            raw=False,
+            using=self.db,
+        )
+        return obj
+
+    def bulk_create_or_ignore(self, objs, returning):
+        """
+        `create_or_ignore` for many rows in one INSERT, without signals like
+        bulk_create(). Return the `returning` column of the rows actually
+        inserted, so callers can count them.
+        """
+        self._for_write = True
+        meta = self.model._meta
+        connection = connections[self.db]
+        quote = connection.ops.quote_name
+        fields = [field for field in meta.concrete_fields if not field.primary_key]
+        values = [
+            field.get_db_prep_save(field.pre_save(obj, add=True), connection)
+            for obj in objs
+            for field in fields
+        ]
+        row = f"({', '.join(['%s'] * len(fields))})"
+        sql = (
+            f"INSERT INTO {quote(meta.db_table)} "
+            f"({', '.join(quote(field.column) for field in fields)}) "
+            f"VALUES {', '.join([row] * len(objs))} "
+            f"ON CONFLICT DO NOTHING "
+            f"RETURNING {quote(meta.get_field(returning).column)}"
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, values)
+            return [value for value, in cursor.fetchall()]
+
+
+class MediaAsset(models.Model):
+    """
+    An uploaded image and what the worker derived from it: dimensions, a
+    blurhash placeholder and resized renditions. `renditions` maps
+    "<width>.<format>" to {"file", "width", "height", "format"}.
+    `ref_count` is the number of posts and profiles using the file, which
+    is deleted with its renditions once nothing does.
+    """
+
+    file = models.CharField(max_length=255, unique=True)
+    width = models.PositiveIntegerField(null=True, editable=False)
+    height = models.PositiveIntegerField(null=True, editable=False)
+    blurhash = models.CharField(max_length=64, blank=True, editable=False)
+    renditions = models.JSONField(default=dict, editable=False)
+    ref_count = models.PositiveIntegerField(default=0, editable=False)
+    processed_at = models.DateTimeField(null=True, editable=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.file
+
+
+class Task(models.Model):
+    """A queued background job, see `api.tasks.DatabaseQueue`."""
+
+    PENDING = "pending"
+    FAILED = "failed"
+    STATUS_CHOICES = [(PENDING, "Pending"), (FAILED, "Failed")]
+
+    name = models.CharField(max_length=255)
+    args = models.JSONField(default=list)
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    run_after = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "run_after", "id"], name="task_queue_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.name}{tuple(self.args)} [{self.status}]"
+
+
 class Post(models.Model):
     author = models.ForeignKey(
         settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="posts"
@@ -23,12 +130,99 @@ class Post(models.Model):
     content = models.TextField()
     published_date = models.DateTimeField(auto_now_add=True)
     hashtags = models.CharField(max_length=255, null=True, blank=True)
-    post_media = models.ImageField(blank=True, null=True, upload_to=post_image_path)
+    post_media = ContentAddressedImageField(
+        blank=True, null=True, upload_to="upload/media"
+    )
+    post_media_asset = models.ForeignKey(
+        MediaAsset,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        editable=False,
+        related_name="+",
+    )
+    tags = models.ManyToManyField(
+        "Hashtag", through="PostHashtag", related_name="posts", blank=True
+    )
+    likes_count = models.PositiveIntegerField(default=0, editable=False)
+    comments_count = models.PositiveIntegerField(default=0, editable=False)
+    search_vector = SearchVectorField(null=True, editable=False)
+    updated_at = models.DateTimeField(auto_now=True)
+    version = models.PositiveIntegerField(default=1, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["published_date", "id"], name="post_keyset_idx"),
+        ]
+
+    # Maintained in SQL by the like and comment signals, a full-row save
+    # from a stale instance must not write them back.
+    counter_fields = ("likes_count", "comments_count")
+
+    def save(self, *args, **kwargs):
+        if self._state.adding:
+            super().save(*args, **kwargs)
+            return
+        update_fields = kwargs.get("update_fields")
+        if update_fields is None:
+            update_fields = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.counter_fields
+            ]
+        kwargs["update_fields"] = {*update_fields, "version", "updated_at"}
+        # The counter signals bump the version in SQL too, an in-memory
+        # increment would hand out an ETag another body already has.
+        self.version = F("version") + 1
+        super().save(*args, **kwargs)
+        self.refresh_from_db(using=self._state.db, fields=["version"])
 
     def __str__(self):
         return f" {self.title}: {self.content[:20]}..."
 
 
+class Hashtag(models.Model):
+    name = models.CharField(max_length=100, unique=True)
+
+    def __str__(self):
+        return f"#{self.name}"
+
+
+class PostHashtag(models.Model):
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name="post_tags")
+    hashtag = models.ForeignKey(
+        Hashtag, on_delete=models.CASCADE, related_name="post_tags"
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["hashtag", "post"], name="unique_post_hashtag"
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.hashtag} on post {self.post_id}"
+
+
+class HashtagCounter(models.Model):
+    hashtag = models.ForeignKey(
+        Hashtag, on_delete=models.CASCADE, related_name="counters"
+    )
+    bucket = models.DateTimeField()
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["bucket", "hashtag"], name="unique_hashtag_counter_bucket"
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.hashtag} x{self.count} since {self.bucket}"
+
+
 class Comment(models.Model):
     comment_author = models.ForeignKey(
         settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="comments"
@@ -36,6 +230,12 @@ class Comment(models.Model):
     post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name="comments")
     body = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["created_at", "id"], name="comment_keyset_idx"),
+        ]
 
     def __str__(self):
         return f"{self.comment_author} left a comment on a  {self.post.author} post"
@@ -47,54 +247,122 @@ class Like(models.Model):
     )
     post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name="post_likes")
 
-    @staticmethod
-    def unique_like(user: str, post: str, error_to_raise):
-        if Like.objects.filter(user__username=user, post__content=post).exists():
-            raise error_to_raise("You have already liked this post.")
-        return {"user": user, "post": post}
-
-    def clean(self):
-        Like.unique_like(self.user, self.post, ValueError)
+    objects = InsertIgnoreQuerySet.as_manager()
 
-    def save(
-        self, force_insert=False, force_update=False, using=None, update_fields=None
-    ):
-        self.full_clean()
-        super(Like, self).save(force_insert, force_update, using, update_fields)
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "post"], name="unique_like")
+        ]
 
     def __str__(self):
         return f"@{self.user.username} liked " f"@{self.post.author.username} post"
 
 
 class Follow(models.Model):
+    """
+    The one store of the social graph. Both directions are served from a
+    composite index led by that direction's user, so the plain FK indexes
+    would only be duplicates.
+    """
+
     follower = models.ForeignKey(
-        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="following"
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="following",
+        db_index=False,
     )
     followed_user = models.ForeignKey(
-        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="followers"
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="followers",
+        db_index=False,
     )
     followed_at = models.DateTimeField(auto_now_add=True)
 
+    objects = InsertIgnoreQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["followed_at", "id"], name="follow_keyset_idx"),
+            # Followers of a user; unique_follow covers the other direction.
+            models.Index(
+                fields=["followed_user", "follower"], name="follow_reverse_idx"
+            ),
+            # A user's followers and followees pages, newest first.
+            models.Index(
+                fields=["followed_user", "followed_at", "id"],
+                name="follow_followers_page_idx",
+            ),
+            models.Index(
+                fields=["follower", "followed_at", "id"],
+                name="follow_following_page_idx",
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["follower", "followed_user"], name="unique_follow"
+            ),
+            models.CheckConstraint(
+                check=~models.Q(follower=models.F("followed_user")),
+                name="follow_not_self",
+            ),
+        ]
+
     def __str__(self):
         return f"{self.follower.username} followed {self.following.username}"
 
-    @staticmethod
-    def unique_follow(follower: str, followed: str, error_to_raise):
-        if follower == followed:
-            raise error_to_raise("You can't follow yourself")
-        if Follow.objects.filter(
-            follower__username=follower, followed_user__username=followed
-        ).exists():
-            raise error_to_raise("You have already followed this user.")
-        return {"follower": follower, "followed": followed}
-
     def clean(self):
-        Follow.unique_follow(
-            self.follower.username, self.followed_user.username, ValueError
+        if self.follower_id == self.followed_user_id:
+            raise ValidationError("You can't follow yourself")
+
+
+class FollowSuggestion(models.Model):
+    """Friend-of-friend suggestion, precomputed by `compute_follow_suggestions`."""
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="follow_suggestions",
+    )
+    suggested_user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="+"
+    )
+    shared_count = models.PositiveIntegerField()
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["user", "-shared_count", "suggested_user"],
+                name="follow_suggestion_rank_idx",
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "suggested_user"], name="unique_follow_suggestion"
+            )
+        ]
+
+    def __str__(self):
+        return (
+            f"Suggest @{self.suggested_user_id} to @{self.user_id} "
+            f"({self.shared_count} shared)"
         )
 
-    def save(
-        self, force_insert=False, force_update=False, using=None, update_fields=None
-    ):
-        self.full_clean()
-        super(Follow, self).save(force_insert, force_update, using, update_fields)
+
+class TimelineEntry(models.Model):
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="timeline"
+    )
+    post = models.ForeignKey(
+        Post, on_delete=models.CASCADE, related_name="timeline_entries"
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["owner", "post"], name="unique_timeline_entry"
+            )
+        ]
+
+    def __str__(self):
+        return f"Post {self.post_id} in @{self.owner_id} timeline"
@@ -0,0 +1,165 @@
+from base64 import b64decode, b64encode
+from urllib import parse
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import LimitOffsetPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(LimitOffsetPagination):
+    """
+    Limit/offset pagination by default, keyset (cursor) pagination on request.
+
+    Clients opt in with `?pagination=cursor` and then follow the `next` link,
+    which carries an opaque `cursor` built from the last row of the page.
+    Pages are read newest first by the view's `keyset_fields`, e.g.
+    `("published_date", "id")`, so every page is an index range scan no
+    matter how deep it is, and rows inserted meanwhile never shift pages.
+    """
+
+    mode_query_param = "pagination"
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = self.use_keyset(request)
+        if not self.keyset:
+            return super().paginate_queryset(queryset, request, view)
+        queryset = self.keyset_queryset(queryset, request, view)
+        return self.keyset_page(list(queryset[: self.page_size + 1]))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """`paginate_queryset` for async views, reading with the async ORM."""
+        self.keyset = self.use_keyset(request)
+        if self.keyset:
+            queryset = self.keyset_queryset(queryset, request, view)
+            return self.keyset_page(
+                [row async for row in queryset[: self.page_size + 1]]
+            )
+
+        self.request = request
+        self.limit = self.get_limit(request)
+        if self.limit is None:
+            return None
+        self.count = await queryset.acount()
+        self.offset = self.get_offset(request)
+        if self.count > self.limit and self.template is not None:
+            self.display_page_controls = True
+        if self.count == 0 or self.offset > self.count:
+            return []
+        return [row async for row in queryset[self.offset : self.offset + self.limit]]
+
+    def keyset_queryset(self, queryset, request, view):
+        self.request = request
+        self.fields = view.keyset_fields
+        self.page_size = self.get_page_size(request)
+        position = self.decode_cursor(request)
+        if position is not None:
+            queryset = queryset.filter(self.after(position))
+        return queryset.order_by(*(f"-{field}" for field in self.fields))
+
+    def keyset_page(self, results):
+        """`results` holds one row past the page to tell if there's a next."""
+        self.has_next = len(results) > self.page_size
+        self.page = results[: self.page_size]
+        return self.page
+
+    def get_paginated_response(self, data):
+        if not self.keyset:
+            return super().get_paginated_response(data)
+        return Response({"next": self.get_next_link(), "results": data})
+
+    def get_next_link(self):
+        if not self.keyset:
+            return super().get_next_link()
+        if not self.has_next:
+            return None
+        last = self.page[-1]
+        position = [str(getattr(last, field)) for field in self.fields]
+        return self.encode_cursor(position)
+
+    def use_keyset(self, request):
+        return (
+            request.query_params.get(self.mode_query_param) == "cursor"
+            or self.cursor_query_param in request.query_params
+        )
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.default_limit
+        if page_size <= 0:
+            return self.default_limit
+        return min(page_size, self.max_page_size)
+
+    def after(self, position):
+        """
+        Build `(f1, f2) < (v1, v2)` as nested OR/AND predicates, which
+        every backend can answer from the composite index.
+        """
+        condition = Q()
+        for index, field in enumerate(self.fields):
+            equal = {self.fields[i]: position[i] for i in range(index)}
+            condition |= Q(**equal, **{f"{field}__lt": position[index]})
+        return condition
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            querystring = b64decode(encoded.encode("ascii")).decode("ascii")
+            values = parse.parse_qs(querystring, strict_parsing=True)["p"]
+        except (TypeError, ValueError, KeyError, UnicodeDecodeError):
+            raise NotFound(self.invalid_cursor_message)
+        if len(values) != len(self.fields):
+            raise NotFound(self.invalid_cursor_message)
+        return [self.parse_value(value) for value in values]
+
+    @staticmethod
+    def parse_value(value):
+        if value.isdigit():
+            return int(value)
+        parsed = parse_datetime(value)
+        if parsed is None:
+            raise NotFound(KeysetPagination.invalid_cursor_message)
+        return parsed
+
+    def encode_cursor(self, position):
+        querystring = parse.urlencode({"p": position}, doseq=True)
+        encoded = b64encode(querystring.encode("ascii")).decode("ascii")
+        url = self.request.build_absolute_uri()
+        url = replace_query_param(url, self.mode_query_param, "cursor")
+        return replace_query_param(url, self.cursor_query_param, encoded)
+
+    def get_schema_operation_parameters(self, view):
+        parameters = super().get_schema_operation_parameters(view)
+        return parameters + [
+            {
+                "name": self.mode_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Set to `cursor` to switch to keyset pagination.",
+                "schema": {"type": "string", "enum": ["cursor"]},
+            },
+            {
+                "name": self.cursor_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Cursor returned in the `next` link.",
+                "schema": {"type": "string"},
+            },
+            {
+                "name": self.page_size_query_param,
+                "required": False,
+                "in": "query",
+                "description": f"Keyset page size, capped at {self.max_page_size}.",
+                "schema": {"type": "integer"},
+            },
+        ]
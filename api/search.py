@@ -0,0 +1,136 @@
+import re
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import connection
+from django.db.models import F
+from django.utils.module_loading import import_string
+
+from .models import Post, Comment
+
+WORD_RE = re.compile(r"\w+")
+
+
+@dataclass
+class SearchHit:
+    kind: str
+    object_id: int
+    rank: float
+
+
+class PostgresSearchBackend:
+    """`tsvector` columns kept up to date on write, matched through a GIN index."""
+
+    post_vector = SearchVector("title", weight="A") + SearchVector(
+        "content", weight="B"
+    )
+    comment_vector = SearchVector("body", weight="C")
+
+    def index_post(self, post):
+        Post.objects.filter(pk=post.pk).update(search_vector=self.post_vector)
+
+    def index_comment(self, comment):
+        Comment.objects.filter(pk=comment.pk).update(search_vector=self.comment_vector)
+
+    def remove_post(self, post_id):
+        """The vector lives on the row itself and goes away with it."""
+
+    def remove_comment(self, comment_id):
+        """The vector lives on the row itself and goes away with it."""
+
+    def rebuild(self):
+        Post.objects.update(search_vector=self.post_vector)
+        Comment.objects.update(search_vector=self.comment_vector)
+
+    def search(self, text, limit):
+        query = SearchQuery(text, search_type="websearch")
+        hits = []
+        for kind, model in (("post", Post), ("comment", Comment)):
+            rows = (
+                model.objects.filter(search_vector=query)
+                .annotate(rank=SearchRank(F("search_vector"), query))
+                .order_by("-rank")
+                .values_list("id", "rank")[:limit]
+            )
+            hits += [SearchHit(kind, object_id, rank) for object_id, rank in rows]
+        return sorted(hits, key=lambda hit: -hit.rank)[:limit]
+
+
+class SQLiteSearchBackend:
+    """FTS5 shadow tables whose rowid is the post/comment id."""
+
+    post_table = "api_post_fts"
+    comment_table = "api_comment_fts"
+
+    def index_post(self, post):
+        self._replace(
+            self.post_table, post.pk, {"title": post.title, "content": post.content}
+        )
+
+    def index_comment(self, comment):
+        self._replace(self.comment_table, comment.pk, {"body": comment.body})
+
+    def remove_post(self, post_id):
+        self._delete(self.post_table, post_id)
+
+    def remove_comment(self, comment_id):
+        self._delete(self.comment_table, comment_id)
+
+    def rebuild(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {self.post_table}")
+            cursor.execute(
+                f"INSERT INTO {self.post_table} (rowid, title, content) "
+                f"SELECT id, title, content FROM {Post._meta.db_table}"
+            )
+            cursor.execute(f"DELETE FROM {self.comment_table}")
+            cursor.execute(
+                f"INSERT INTO {self.comment_table} (rowid, body) "
+                f"SELECT id, body FROM {Comment._meta.db_table}"
+            )
+
+    def search(self, text, limit):
+        words = WORD_RE.findall(text)
+        if not words:
+            return []
+        match = " ".join(f'"{word}"' for word in words)
+        # bm25() is lower-is-better, weights mirror the Postgres A/B/C ranks.
+        sources = (
+            ("post", self.post_table, f"bm25({self.post_table}, 10.0, 4.0)"),
+            ("comment", self.comment_table, f"bm25({self.comment_table}, 1.0)"),
+        )
+        hits = []
+        with connection.cursor() as cursor:
+            for kind, table, rank in sources:
+                cursor.execute(
+                    f"SELECT rowid, -{rank} AS rank FROM {table} "
+                    f"WHERE {table} MATCH %s ORDER BY rank DESC LIMIT %s",
+                    [match, limit],
+                )
+                hits += [SearchHit(kind, row[0], row[1]) for row in cursor.fetchall()]
+        return sorted(hits, key=lambda hit: -hit.rank)[:limit]
+
+    @staticmethod
+    def _replace(table, rowid, values):
+        columns = ", ".join(values)
+        placeholders = ", ".join(["%s"] * (len(values) + 1))
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {table} WHERE rowid = %s", [rowid])
+            cursor.execute(
+                f"INSERT INTO {table} (rowid, {columns}) VALUES ({placeholders})",
+                [rowid, *values.values()],
+            )
+
+    @staticmethod
+    def _delete(table, rowid):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {table} WHERE rowid = %s", [rowid])
+
+
+def get_search_backend():
+    if settings.SEARCH_BACKEND:
+        return import_string(settings.SEARCH_BACKEND)()
+    if connection.vendor == "postgresql":
+        return PostgresSearchBackend()
+    return SQLiteSearchBackend()
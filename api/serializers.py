@@ -1,6 +1,64 @@
+from django.conf import settings
+from django.core.files.storage import default_storage
 from rest_framework import serializers
 from .models import Post, Comment, Like, Follow
 
+POST_PREVIEW_LENGTH = 100
+
+
+class PostPreviewField(serializers.Field):
+    """
+    The first POST_PREVIEW_LENGTH characters of the related post. Views
+    annotate `post_preview` with Left() so the full body is never fetched,
+    plain instances fall back to truncating `post.content`.
+    """
+
+    def __init__(self, **kwargs):
+        kwargs["source"] = "*"
+        kwargs["read_only"] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, instance):
+        preview = getattr(instance, "post_preview", None)
+        if preview is None:
+            preview = instance.post.content[:POST_PREVIEW_LENGTH]
+        return preview
+
+
+class MediaRenditionsField(serializers.Field):
+    """
+    Dimensions, blurhash and rendition URLs of a processed `MediaAsset`,
+    None until the worker has processed the upload.
+    """
+
+    def __init__(self, **kwargs):
+        kwargs["read_only"] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, asset):
+        if asset.processed_at is None:
+            return None
+        request = self.context.get("request")
+        renditions = []
+        for rendition in asset.renditions.values():
+            url = default_storage.url(rendition["file"])
+            if request is not None:
+                url = request.build_absolute_uri(url)
+            renditions.append(
+                {
+                    "url": url,
+                    "width": rendition["width"],
+                    "height": rendition["height"],
+                    "format": rendition["format"],
+                }
+            )
+        return {
+            "width": asset.width,
+            "height": asset.height,
+            "blurhash": asset.blurhash,
+            "renditions": renditions,
+        }
+
 
 class PostSerializer(serializers.ModelSerializer):
     class Meta:
@@ -18,8 +76,9 @@ class PostSerializer(serializers.ModelSerializer):
 
 class PostListSerializer(serializers.ModelSerializer):
     author = serializers.CharField(source="author.username", read_only=True)
-    likes = serializers.IntegerField(source="post_likes.count", read_only=True)
-    comments = serializers.IntegerField(source="comments.count", read_only=True)
+    likes = serializers.IntegerField(source="likes_count", read_only=True)
+    comments = serializers.IntegerField(source="comments_count", read_only=True)
+    media = MediaRenditionsField(source="post_media_asset")
 
     class Meta:
         model = Post
@@ -31,13 +90,22 @@ class PostListSerializer(serializers.ModelSerializer):
             "likes",
             "published_date",
             "hashtags",
+            "media",
         ]
 
 
 class PostRetrieveSerializer(PostListSerializer):
     class Meta:
         model = Post
-        fields = ["title", "author", "comments", "likes", "published_date", "hashtags"]
+        fields = [
+            "title",
+            "author",
+            "comments",
+            "likes",
+            "published_date",
+            "hashtags",
+            "media",
+        ]
 
 
 class CreateCommentSerializer(serializers.ModelSerializer):
@@ -61,11 +129,11 @@ class CommentListSerializer(serializers.ModelSerializer):
     comment_author = serializers.CharField(
         source="comment_author.username", read_only=True
     )
-    commented_post = serializers.CharField(source="post.content", read_only=True)
+    commented_post = PostPreviewField()
 
     class Meta:
         model = Comment
-        exclude = ["body", "post"]
+        fields = ["id", "comment_author", "commented_post", "created_at"]
 
 
 class CommentRetrieveSerializer(serializers.ModelSerializer):
@@ -73,7 +141,7 @@ class CommentRetrieveSerializer(serializers.ModelSerializer):
     comment_author = serializers.CharField(
         source="comment_author.username", read_only=True
     )
-    commented_post = serializers.CharField(source="post.content", read_only=True)
+    commented_post = PostPreviewField()
 
     class Meta:
         model = Comment
@@ -90,13 +158,6 @@ class CreateLikeSerializer(serializers.ModelSerializer):
         validated_data["user"] = request.user
         return super().create(validated_data)
 
-    def validate(self, attrs):
-        Like.unique_like(
-            attrs["user"].username, attrs["post"].content, serializers.ValidationError
-        )
-
-        return attrs
-
 
 class LikeSerializer(serializers.ModelSerializer):
     class Meta:
@@ -106,7 +167,7 @@ class LikeSerializer(serializers.ModelSerializer):
 
 class LikeListSerializer(LikeSerializer):
     user_liked = serializers.CharField(source="user.username", read_only=True)
-    liked_post = serializers.CharField(source="post.content", read_only=True)
+    liked_post = PostPreviewField()
 
     class Meta:
         model = Like
@@ -127,11 +188,8 @@ class FollowSerializer(serializers.ModelSerializer):
         fields = ["id", "follower", "followed_user", "followed_at"]
 
     def validate(self, attrs):
-        Follow.unique_follow(
-            attrs["follower"].username,
-            attrs["followed_user"].username,
-            serializers.ValidationError,
-        )
+        if attrs["follower"] == attrs["followed_user"]:
+            raise serializers.ValidationError("You can't follow yourself")
         return attrs
 
 
@@ -149,4 +207,54 @@ class FollowListSerializer(serializers.ModelSerializer):
 class FollowRetrieveSerializer(FollowListSerializer):
     class Meta:
         model = Follow
-        exclude = ["id"]
+        fields = ["follower", "followed_user", "followed_at"]
+
+
+class FollowConnectionSerializer(serializers.Serializer):
+    id = serializers.IntegerField(source="user_id", read_only=True)
+    username = serializers.CharField(read_only=True)
+    followed_at = serializers.DateTimeField(read_only=True)
+
+
+class FollowSuggestionSerializer(serializers.Serializer):
+    id = serializers.IntegerField(source="suggested_user_id", read_only=True)
+    username = serializers.CharField(source="suggested_user.username", read_only=True)
+    shared_count = serializers.IntegerField(read_only=True)
+
+
+class BulkFollowSerializer(serializers.Serializer):
+    usernames = serializers.ListField(
+        child=serializers.CharField(max_length=63),
+        allow_empty=False,
+        max_length=settings.BULK_ACTION_MAX_ITEMS,
+    )
+
+    def validate_usernames(self, usernames):
+        # One outcome per username, repeats would overwrite the first.
+        return list(dict.fromkeys(usernames))
+
+
+class BulkLikeSerializer(serializers.Serializer):
+    posts = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=settings.BULK_ACTION_MAX_ITEMS,
+    )
+
+    def validate_posts(self, posts):
+        return list(dict.fromkeys(posts))
+
+
+class TrendingHashtagSerializer(serializers.Serializer):
+    name = serializers.CharField(read_only=True)
+    uses = serializers.IntegerField(read_only=True)
+
+
+class SearchResultSerializer(serializers.Serializer):
+    type = serializers.CharField(read_only=True)
+    id = serializers.IntegerField(read_only=True)
+    post = serializers.IntegerField(read_only=True)
+    author = serializers.CharField(read_only=True)
+    title = serializers.CharField(read_only=True)
+    text = serializers.CharField(read_only=True)
+    rank = serializers.FloatField(read_only=True)
@@ -0,0 +1,118 @@
+from django.contrib.auth import get_user_model
+from django.db.models import F
+from django.db.models.functions import Greatest, Now
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .cache import invalidate, POST, POSTS, COMMENTS, PROFILE
+from .hashtags import sync_post_hashtags
+from .media import attach_media_asset, release_media_asset
+from .models import Post, Comment, Like, Follow
+from .search import get_search_backend
+
+
+def _bump_post_counter(post_id: int, field: str, delta: int) -> None:
+    """Apply an in-database increment so concurrent writers don't race."""
+    Post.objects.filter(pk=post_id).update(
+        **{field: Greatest(F(field) + delta, 0)},
+        version=F("version") + 1,
+        updated_at=Now(),
+    )
+    # Lists catch up with counters on expiry, see api.cache.
+    invalidate(POST, post_id)
+
+
+def _invalidate_post(post_id: int) -> None:
+    invalidate(POST, post_id)
+    invalidate(POSTS)
+
+
+def _bump_follow_counters(follow: Follow, delta: int) -> None:
+    """Follower counts are part of both profiles, so both move on."""
+    users = get_user_model().objects
+    changed = dict(version=F("version") + 1, updated_at=Now())
+    users.filter(pk=follow.follower_id).update(
+        following_count=Greatest(F("following_count") + delta, 0), **changed
+    )
+    users.filter(pk=follow.followed_user_id).update(
+        followers_count=Greatest(F("followers_count") + delta, 0), **changed
+    )
+    usernames = users.filter(
+        pk__in=[follow.follower_id, follow.followed_user_id]
+    ).values_list("username", flat=True)
+    for username in usernames:
+        invalidate(PROFILE, username)
+
+
+@receiver(post_save, sender=Like)
+def like_created(sender, instance, created, **kwargs):
+    if created:
+        _bump_post_counter(instance.post_id, "likes_count", 1)
+
+
+@receiver(post_delete, sender=Like)
+def like_deleted(sender, instance, **kwargs):
+    _bump_post_counter(instance.post_id, "likes_count", -1)
+
+
+@receiver(post_save, sender=Comment)
+def comment_created(sender, instance, created, **kwargs):
+    if created:
+        _bump_post_counter(instance.post_id, "comments_count", 1)
+    get_search_backend().index_comment(instance)
+    invalidate(COMMENTS)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    _bump_post_counter(instance.post_id, "comments_count", -1)
+    get_search_backend().remove_comment(instance.pk)
+    invalidate(COMMENTS)
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, **kwargs):
+    update_fields = kwargs.get("update_fields")
+    if update_fields is None or "post_media" in update_fields:
+        attach_media_asset(instance, "post_media", "post_media_asset")
+    if update_fields is None or {"hashtags", "content"} & set(update_fields):
+        sync_post_hashtags(instance)
+    if update_fields is None or {"title", "content"} & set(update_fields):
+        get_search_backend().index_post(instance)
+    _invalidate_post(instance.pk)
+    invalidate(COMMENTS)
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    if instance.post_media_asset_id is not None:
+        release_media_asset(instance.post_media_asset_id)
+    get_search_backend().remove_post(instance.pk)
+    _invalidate_post(instance.pk)
+    invalidate(COMMENTS)
+
+
+@receiver(post_save, sender=Follow)
+def follow_created(sender, instance, created, **kwargs):
+    if created:
+        _bump_follow_counters(instance, 1)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    _bump_follow_counters(instance, -1)
+
+
+@receiver(post_save, sender=get_user_model())
+def user_saved(sender, instance, **kwargs):
+    update_fields = kwargs.get("update_fields")
+    if update_fields is None or "profile_image" in update_fields:
+        attach_media_asset(instance, "profile_image", "profile_image_asset")
+    invalidate(PROFILE, instance.username)
+
+
+@receiver(post_delete, sender=get_user_model())
+def user_deleted(sender, instance, **kwargs):
+    if instance.profile_image_asset_id is not None:
+        release_media_asset(instance.profile_image_asset_id)
+    invalidate(PROFILE, instance.username)
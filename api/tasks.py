@@ -0,0 +1,87 @@
+import logging
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Task
+
+logger = logging.getLogger(__name__)
+
+
+def run_task(name: str, args: list) -> None:
+    import_string(name)(*args)
+
+
+class DatabaseQueue:
+    """
+    Jobs are rows inserted in the caller's transaction, so a job exists
+    exactly when the write that scheduled it committed. `run_tasks` works
+    them off; on Postgres several workers share the table through
+    SKIP LOCKED, on SQLite there is a single worker.
+    """
+
+    def enqueue(self, name: str, args: list) -> None:
+        Task.objects.create(name=name, args=args)
+
+
+class ImmediateQueue:
+    """Run jobs in process once the current transaction commits."""
+
+    def enqueue(self, name: str, args: list) -> None:
+        transaction.on_commit(lambda: run_task(name, args))
+
+
+def get_task_queue():
+    return import_string(settings.TASK_QUEUE_BACKEND)()
+
+
+def enqueue(name: str, *args) -> None:
+    """Schedule `name`, a dotted path to a function, to be called with `args`."""
+    get_task_queue().enqueue(name, list(args))
+
+
+def retry_delay(attempts: int) -> timedelta:
+    return timedelta(seconds=min(2**attempts, 3600))
+
+
+def run_next_task() -> bool:
+    """
+    Claim and run the oldest due job. The row stays locked while it runs,
+    so a crashed worker leaves it pending for the next one. Return False
+    when nothing is due.
+    """
+    with transaction.atomic():
+        task = (
+            Task.objects.select_for_update(skip_locked=True)
+            .filter(status=Task.PENDING, run_after__lte=timezone.now())
+            .order_by("run_after", "id")
+            .first()
+        )
+        if task is None:
+            return False
+        try:
+            with transaction.atomic():
+                run_task(task.name, task.args)
+        except Exception:
+            logger.exception("Task %s failed", task)
+            task.attempts += 1
+            task.last_error = traceback.format_exc()
+            if task.attempts >= settings.TASK_MAX_ATTEMPTS:
+                task.status = Task.FAILED
+            else:
+                task.run_after = timezone.now() + retry_delay(task.attempts)
+            task.save(update_fields=["attempts", "last_error", "status", "run_after"])
+        else:
+            task.delete()
+    return True
+
+
+def run_pending_tasks(limit: int | None = None) -> int:
+    done = 0
+    while (limit is None or done < limit) and run_next_task():
+        done += 1
+    return done
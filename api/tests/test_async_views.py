@@ -0,0 +1,126 @@
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import AsyncRequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient, force_authenticate
+from rest_framework import status
+
+from api.feed import fan_out_post
+from api.models import Post, Follow
+from api.views import PostViewSet, FeedView
+from user.views import UserDetailView
+
+POST_URL = reverse("social_media_api:post-list")
+FEED_URL = reverse("social_media_api:feed")
+
+post_list = PostViewSet.as_view({"get": "list", "post": "create"}, async_dispatch=True)
+post_detail = PostViewSet.as_view({"get": "retrieve"}, async_dispatch=True)
+user_detail = UserDetailView.as_view({"get": "retrieve"}, async_dispatch=True)
+feed = FeedView.as_view(async_dispatch=True)
+
+
+class AsyncReadViewTests(TestCase):
+    """The async handlers answer exactly like the sync ones."""
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.client = APIClient()
+        self.factory = AsyncRequestFactory()
+        self.users = [
+            get_user_model().objects.create_user(
+                email=f"user{i}@test.test", password="Testpsw1", username=f"user{i}"
+            )
+            for i in range(3)
+        ]
+        self.user = self.users[0]
+        for author in self.users[1:]:
+            Follow.objects.create(follower=self.user, followed_user=author)
+        self.posts = []
+        for author in self.users:
+            for index in range(4):
+                post = Post.objects.create(
+                    author=author, title=f"post {index}", content="body"
+                )
+                fan_out_post(post)
+                self.posts.append(post)
+        self.client.force_authenticate(self.user)
+
+    async def call(self, view, url, user=None, headers=None, **kwargs):
+        request = self.factory.get(url, headers=headers)
+        force_authenticate(request, user or self.user)
+        response = await view(request, **kwargs)
+        if hasattr(response, "render"):
+            response.render()
+        return response
+
+    def compare(self, view, url, **kwargs):
+        cache.clear()
+        expected = self.client.get(url)
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = async_to_sync(self.call)(view, url, **kwargs)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, expected.data)
+        return response, queries
+
+    def test_views_are_coroutines(self):
+        for view in (post_list, post_detail, user_detail, feed):
+            self.assertTrue(iscoroutinefunction(view))
+
+    def test_post_list(self):
+        for query in ("", "?limit=3&offset=2", "?pagination=cursor&page_size=5"):
+            with self.subTest(query=query):
+                response, queries = self.compare(post_list, POST_URL + query)
+                self.assertLessEqual(len(queries), PostViewSet.query_budgets["list"])
+
+    def test_post_retrieve_honours_etags(self):
+        post = self.posts[0]
+        url = reverse("social_media_api:post-detail", args=[post.id])
+        response, _ = self.compare(post_detail, url, pk=str(post.id))
+        response = async_to_sync(self.call)(
+            post_detail,
+            url,
+            headers={"If-None-Match": response["ETag"]},
+            pk=str(post.id),
+        )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_missing_post_is_404(self):
+        response = async_to_sync(self.call)(post_detail, POST_URL, pk="0")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_user_detail(self):
+        url = reverse("user:users-detail", args=["user1"])
+        self.compare(user_detail, url, username="user1")
+
+    def test_feed(self):
+        response, queries = self.compare(feed, FEED_URL)
+        self.assertEqual(len(response.data["results"]), 5)
+        self.assertLessEqual(len(queries), FeedView.query_budgets["list"])
+
+    def test_writes_fall_back_to_sync_dispatch(self):
+        async def create():
+            request = self.factory.post(
+                POST_URL,
+                {"author": self.user.id, "title": "new", "content": "body"},
+            )
+            force_authenticate(request, self.user)
+            response = await post_list(request)
+            response.render()
+            return response
+
+        response = async_to_sync(create)()
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(Post.objects.filter(title="new").exists())
+
+    def test_unauthenticated_requests_are_rejected(self):
+        async def anonymous():
+            response = await feed(self.factory.get(FEED_URL))
+            response.render()
+            return response
+
+        response = async_to_sync(anonymous)()
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
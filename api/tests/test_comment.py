@@ -54,6 +54,23 @@ class AuthenticatedCommentApiTests(TestCase):
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         self.assertEqual(res.data["results"], serializer.data)
 
+    def test_comment_list_not_modified(self):
+        etag = self.client.get(COMMENT_URL)["ETag"]
+        with self.assertNumQueries(0):
+            res = self.client.get(COMMENT_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        res = self.client.get(
+            COMMENT_URL, data={"username": "user2"}, HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        Comment.objects.create(
+            comment_author=self.user_2, post=self.post_1, body="new comment"
+        )
+        res = self.client.get(COMMENT_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
     def test_filter_post_by_username(self):
         res = self.client.get(COMMENT_URL, data={"username": "test_us"})
         serializer1 = CommentListSerializer(self.comment_1)
@@ -62,6 +79,15 @@ class AuthenticatedCommentApiTests(TestCase):
         self.assertIn(serializer1.data, res.data["results"])
         self.assertNotIn(serializer2.data, res.data["results"])
 
+    def test_filter_comment_by_date(self):
+        res = self.client.get(
+            COMMENT_URL, data={"year": self.comment_1.created_at.year}
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["count"], 2)
+        res = self.client.get(COMMENT_URL, data={"until": "2000-01-01"})
+        self.assertEqual(res.data["count"], 0)
+
     def test_retrieve_comment_detail(self):
         res = self.client.get(detail_url(self.comment_1.id))
         serializer = CommentRetrieveSerializer(self.comment_1)
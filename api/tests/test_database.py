@@ -0,0 +1,105 @@
+import unittest
+from io import StringIO
+from unittest import mock
+
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import OperationalError, connection
+from django.db.utils import ConnectionHandler
+from django.test import SimpleTestCase, TestCase
+from psycopg_pool import ConnectionPool
+
+
+class WaitForDbTests(TestCase):
+    def flaky_cursor(self, failures):
+        cursor = connection.cursor
+
+        def attempt():
+            if failures:
+                failures.pop()
+                raise OperationalError("connection refused")
+            return cursor()
+
+        return mock.patch.object(connection, "cursor", side_effect=attempt)
+
+    def test_returns_once_the_database_answers(self):
+        out = StringIO()
+        call_command("wait_for_db", stdout=out)
+        self.assertIn("Database available!", out.getvalue())
+
+    @mock.patch("api.management.commands.wait_for_db.time.sleep")
+    def test_backs_off_between_attempts(self, sleep):
+        with self.flaky_cursor([True] * 4):
+            call_command("wait_for_db", "--max-delay=0.3", stdout=StringIO())
+        delays = [call.args[0] for call in sleep.call_args_list]
+        self.assertEqual(delays, [0.1, 0.2, 0.3, 0.3])
+
+    @mock.patch("api.management.commands.wait_for_db.time.sleep")
+    def test_gives_up_after_the_timeout(self, sleep):
+        with self.flaky_cursor([True] * 100):
+            with self.assertRaises(CommandError):
+                call_command("wait_for_db", "--timeout=0", stdout=StringIO())
+        sleep.assert_not_called()
+
+
+def pooled_connection(**settings):
+    handler = ConnectionHandler(
+        {
+            "default": {
+                "ENGINE": "api.db.postgresql",
+                "NAME": "social_media",
+                "OPTIONS": {"pool": {"min_size": 1, "max_size": 3}},
+                **settings,
+            }
+        }
+    )
+    return handler["default"]
+
+
+class PooledBackendTests(SimpleTestCase):
+    def test_pool_is_built_lazily_per_alias(self):
+        db = pooled_connection()
+        pool = db.pool
+        self.addCleanup(db.close_pool)
+        self.assertIsInstance(pool, ConnectionPool)
+        self.assertIs(db.pool, pool)
+        self.assertTrue(pool.closed)
+        self.assertEqual((pool.min_size, pool.max_size), (1, 3))
+        self.assertEqual(pool.kwargs["dbname"], "social_media")
+        self.assertTrue(pool.kwargs["autocommit"])
+        self.assertNotIn("pool", pool.kwargs)
+
+    def test_health_checks_become_pool_checks(self):
+        db = pooled_connection(CONN_HEALTH_CHECKS=True)
+        self.addCleanup(db.close_pool)
+        self.assertEqual(db.pool._check, ConnectionPool.check_connection)
+
+    def test_pool_needs_conn_max_age_zero(self):
+        db = pooled_connection(CONN_MAX_AGE=60)
+        with self.assertRaises(ImproperlyConfigured):
+            db.pool
+
+    def test_without_pool_option(self):
+        self.assertIsNone(pooled_connection(OPTIONS={}).pool)
+
+
+@unittest.skipUnless(connection.vendor == "postgresql", "needs PostgreSQL")
+class PooledConnectionReuseTests(SimpleTestCase):
+    databases = {"default"}
+
+    def test_closing_returns_the_connection_to_the_pool(self):
+        db = pooled_connection(
+            **{
+                key: connection.settings_dict[key]
+                for key in ("NAME", "USER", "PASSWORD", "HOST", "PORT")
+            }
+        )
+        self.addCleanup(db.close_pool)
+        backend_pids = []
+        for _ in range(2):
+            with db.cursor() as cursor:
+                cursor.execute("SELECT pg_backend_pid()")
+                backend_pids.append(cursor.fetchone()[0])
+            db.close()
+        self.assertEqual(backend_pids[0], backend_pids[1])
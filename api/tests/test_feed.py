@@ -0,0 +1,104 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient
+from rest_framework import status
+from api.models import Post, Follow, TimelineEntry
+
+FEED_URL = reverse("social_media_api:feed")
+POST_URL = reverse("social_media_api:post-list")
+
+
+class UnauthenticatedFeedApiTests(TestCase):
+
+    def setUp(self) -> None:
+        self.client = APIClient()
+
+    def test_auth_required(self):
+        res = self.client.get(FEED_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class AuthenticatedFeedApiTests(TestCase):
+
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="Test@test.test", password="Testpsw1", username="test_user"
+        )
+        self.user_2 = get_user_model().objects.create_user(
+            email="Test@test2.test", password="Testpsw2", username="user2"
+        )
+        self.user_3 = get_user_model().objects.create_user(
+            email="Test@test3.test", password="Testpsw3", username="user3"
+        )
+        Follow.objects.create(follower=self.user, followed_user=self.user_2)
+
+    def create_post(self, author, title):
+        self.client.force_authenticate(author)
+        res = self.client.post(
+            POST_URL, {"author": author.id, "title": title, "content": "content"}
+        )
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        return res.data["id"]
+
+    def test_create_post_fans_out_to_followers(self):
+        post_id = self.create_post(self.user_2, "followed post")
+        self.create_post(self.user_3, "unfollowed post")
+
+        self.assertTrue(
+            TimelineEntry.objects.filter(owner=self.user, post_id=post_id).exists()
+        )
+        self.client.force_authenticate(self.user)
+        res = self.client.get(FEED_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([post["id"] for post in res.data["results"]], [post_id])
+
+    def test_feed_is_newest_first(self):
+        first = self.create_post(self.user_2, "first")
+        second = self.create_post(self.user_2, "second")
+        self.client.force_authenticate(self.user)
+        res = self.client.get(FEED_URL)
+        self.assertEqual([post["id"] for post in res.data["results"]], [second, first])
+
+    @override_settings(FEED_CELEBRITY_FOLLOWER_THRESHOLD=1)
+    def test_celebrity_posts_are_merged_on_read(self):
+        post_id = self.create_post(self.user_2, "celebrity post")
+        self.assertFalse(TimelineEntry.objects.exists())
+
+        self.client.force_authenticate(self.user)
+        res = self.client.get(FEED_URL)
+        self.assertEqual([post["id"] for post in res.data["results"]], [post_id])
+
+    def test_follow_backfills_and_unfollow_purges_timeline(self):
+        post = Post.objects.create(author=self.user_3, title="t", content="c")
+        self.client.force_authenticate(self.user)
+        self.client.post(f"/api/user/{self.user_3.username}/follow/")
+        self.assertTrue(
+            TimelineEntry.objects.filter(owner=self.user, post=post).exists()
+        )
+        self.client.delete(f"/api/user/{self.user_3.username}/unfollow/")
+        self.assertFalse(TimelineEntry.objects.filter(owner=self.user).exists())
+
+    @override_settings(FEED_FOLLOW_BACKFILL_SIZE=2)
+    def test_bulk_follow_backfills_recent_posts_per_author(self):
+        posts = [
+            Post.objects.create(author=self.user_3, title=f"t{i}", content="c")
+            for i in range(3)
+        ]
+        self.client.force_authenticate(self.user)
+        self.client.post(
+            "/api/user/me/bulk-follow/", {"usernames": ["user3"]}, format="json"
+        )
+        self.assertEqual(
+            set(
+                TimelineEntry.objects.filter(owner=self.user).values_list(
+                    "post_id", flat=True
+                )
+            ),
+            {posts[1].id, posts[2].id},
+        )
+        self.client.post(
+            "/api/user/me/bulk-unfollow/", {"usernames": ["user3"]}, format="json"
+        )
+        self.assertFalse(TimelineEntry.objects.filter(owner=self.user).exists())
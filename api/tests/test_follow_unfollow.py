@@ -1,9 +1,16 @@
+import io
+from unittest import skipUnless
+
 from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from rest_framework.reverse import reverse
 from rest_framework.test import APIClient
 from rest_framework import status
 from api.models import Follow
+from user.presence import is_online
 from api.serializers import FollowListSerializer, FollowRetrieveSerializer
 
 FOLLOW_URL = reverse("social_media_api:follow-list")
@@ -84,12 +91,236 @@ class AuthenticatedFollowApiTests(TestCase):
         res = self.client.post(url)
         self.assertEqual(res.status_code, status.HTTP_201_CREATED)
 
+    def test_follow_user_twice(self):
+        url = f"/api/user/{self.user_2.username}/follow/"
+        res = self.client.post(url)
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Follow.objects.count(), 2)
+
+    def test_follow_yourself(self):
+        url = f"/api/user/{self.user.username}/follow/"
+        res = self.client.post(url)
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
     def test_unfollow_user(self):
         self.client.force_authenticate(self.user_2)
         url = f"/api/user/{self.user.username}/unfollow/"
         res = self.client.delete(url)
         self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
 
+    def test_follow_counters_track_follows(self):
+        self.user_3 = get_user_model().objects.create_user(
+            email="Test@test.test3", password="Testpsw3", username="test_user3"
+        )
+        self.client.force_authenticate(self.user_3)
+        self.client.post(f"/api/user/{self.user_2.username}/follow/")
+        self.user_2.refresh_from_db()
+        self.user_3.refresh_from_db()
+        self.assertEqual(self.user_2.followers_count, 2)
+        self.assertEqual(self.user_3.following_count, 1)
+
+        self.client.delete(f"/api/user/{self.user_2.username}/unfollow/")
+        self.user_2.refresh_from_db()
+        self.assertEqual(self.user_2.followers_count, 1)
+
+    def test_stale_user_save_keeps_counters(self):
+        stale = get_user_model().objects.get(pk=self.user_2.pk)
+        Follow.objects.filter(follower=self.user_2).delete()
+        stale.bio = "bio"
+        stale.save()
+        stale.refresh_from_db()
+        self.assertEqual(stale.following_count, 0)
+        self.assertEqual(stale.followers_count, 1)
+
+    def test_rebuild_follow_counters_command(self):
+        get_user_model().objects.update(followers_count=7, following_count=7)
+        out = io.StringIO()
+        call_command("rebuild_follow_counters", stdout=out)
+        self.assertIn("Rebuilt counters for 2 users", out.getvalue())
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.followers_count, 1)
+        self.assertEqual(self.user.following_count, 1)
+
+    def test_followers_list(self):
+        user_3 = get_user_model().objects.create_user(
+            email="Test@test.test3", password="Testpsw3", username="test_user3"
+        )
+        Follow.objects.create(follower=user_3, followed_user=self.user_2)
+        res = self.client.get(f"/api/user/{self.user_2.username}/followers/")
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [user["username"] for user in res.data["results"]],
+            ["test_user3", "test_user"],
+        )
+        self.assertEqual(res.data["results"][0]["id"], user_3.id)
+
+    def test_following_list_with_cursor(self):
+        res = self.client.get(
+            f"/api/user/{self.user.username}/following/",
+            {"pagination": "cursor", "page_size": 1},
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["results"][0]["username"], "user2")
+        self.assertIsNone(res.data["next"])
+
+    def test_followers_of_unknown_user(self):
+        res = self.client.get("/api/user/nobody/followers/")
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class BulkFollowApiTests(TestCase):
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.users = [
+            get_user_model().objects.create_user(
+                email=f"user{i}@test.test", password="Testpsw1", username=f"user{i}"
+            )
+            for i in range(25)
+        ]
+        self.user = self.users[0]
+        self.client.force_authenticate(self.user)
+        Follow.objects.create(follower=self.user, followed_user=self.users[1])
+
+    def test_bulk_follow_outcomes(self):
+        res = self.client.post(
+            reverse("user:bulk-follow"),
+            {"usernames": ["user1", "user2", "user0", "nobody"]},
+            format="json",
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            res.data["results"],
+            [
+                {"username": "user1", "status": "already_following"},
+                {"username": "user2", "status": "followed"},
+                {"username": "user0", "status": "self"},
+                {"username": "nobody", "status": "not_found"},
+            ],
+        )
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.following_count, 2)
+        self.assertEqual(
+            get_user_model().objects.get(username="user2").followers_count, 1
+        )
+
+    def test_bulk_follow_moves_counters_without_recounting(self):
+        # Counters move by the rows written, drift is for the rebuild command.
+        get_user_model().objects.filter(username="user2").update(followers_count=7)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.post(
+                reverse("user:bulk-follow"), {"usernames": ["user2"]}, format="json"
+            )
+        self.assertFalse(
+            [query for query in queries if "COUNT(" in query["sql"].upper()]
+        )
+        self.assertEqual(
+            get_user_model().objects.get(username="user2").followers_count, 8
+        )
+
+        self.client.post(
+            reverse("user:bulk-unfollow"),
+            {"usernames": ["user1", "user2"]},
+            format="json",
+        )
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.following_count, 0)
+        self.assertEqual(
+            get_user_model().objects.get(username="user2").followers_count, 7
+        )
+
+    def test_bulk_follow_repeated_username(self):
+        res = self.client.post(
+            reverse("user:bulk-follow"),
+            {"usernames": ["user2", "user2"]},
+            format="json",
+        )
+        self.assertEqual(
+            res.data["results"], [{"username": "user2", "status": "followed"}]
+        )
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.following_count, 2)
+
+    def test_bulk_follow_query_count_does_not_grow(self):
+        url = reverse("user:bulk-follow")
+        with CaptureQueriesContext(connection) as few:
+            self.client.post(url, {"usernames": ["user2"]}, format="json")
+        with CaptureQueriesContext(connection) as many:
+            self.client.post(
+                url,
+                {"usernames": [user.username for user in self.users[3:]]},
+                format="json",
+            )
+        self.assertEqual(len(few), len(many))
+        self.assertEqual(
+            Follow.objects.filter(follower=self.user).count(), len(self.users) - 1
+        )
+
+    def test_bulk_unfollow(self):
+        Follow.objects.create(follower=self.user, followed_user=self.users[2])
+        res = self.client.post(
+            reverse("user:bulk-unfollow"),
+            {"usernames": ["user1", "user2", "user3"]},
+            format="json",
+        )
+        self.assertEqual(
+            [row["status"] for row in res.data["results"]],
+            ["unfollowed", "unfollowed", "not_following"],
+        )
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.following_count, 0)
+        self.assertFalse(Follow.objects.filter(follower=self.user).exists())
+
+    def test_user_named_me_can_be_followed(self):
+        get_user_model().objects.create_user(
+            email="me@test.test", password="Testpsw1", username="me"
+        )
+        res = self.client.post("/api/user/me/follow/")
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(
+            Follow.objects.filter(
+                follower=self.user, followed_user__username="me"
+            ).exists()
+        )
+
+    def test_bulk_follow_rejects_oversized_lists(self):
+        res = self.client.post(
+            reverse("user:bulk-follow"),
+            {"usernames": ["user1"] * 201},
+            format="json",
+        )
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+@skipUnless(connection.vendor == "sqlite", "Postgres plans depend on table stats")
+class FollowGraphIndexTests(TestCase):
+    def assertIndexOnly(self, queryset):
+        self.assertIn("COVERING INDEX", queryset.explain())
+
+    def test_followers_of_user_read_from_index(self):
+        self.assertIndexOnly(
+            Follow.objects.filter(followed_user_id=1).values_list(
+                "follower_id", flat=True
+            )
+        )
+
+    def test_followed_users_read_from_index(self):
+        self.assertIndexOnly(
+            Follow.objects.filter(follower_id=1).values_list(
+                "followed_user_id", flat=True
+            )
+        )
+
+    def test_connection_pages_are_read_in_index_order(self):
+        for field in ("followed_user_id", "follower_id"):
+            with self.subTest(field=field):
+                plan = (
+                    Follow.objects.filter(**{field: 1})
+                    .order_by("-followed_at", "-id")[:20]
+                    .explain()
+                )
+                self.assertIn("_page_idx", plan)
+                self.assertNotIn("TEMP B-TREE", plan)
+
 
 class ManageUserProfile(TestCase):
     def setUp(self) -> None:
@@ -106,7 +337,7 @@ class ManageUserProfile(TestCase):
         url = "/api/user/me/logout"
         response = self.client.post(url)
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
-        self.assertFalse(self.user.online)
+        self.assertFalse(is_online(self.user.username))
 
     def test_delete_user_account(self):
         url = "/api/user/me/"
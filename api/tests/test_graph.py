@@ -0,0 +1,93 @@
+import io
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from api.graph import friends_of_friends
+from api.models import Follow, FollowSuggestion
+
+USERS_URL = reverse("user:users-list")
+SUGGESTIONS_URL = reverse("user:follow-suggestions")
+
+
+class FollowGraphTests(TestCase):
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.me, self.alice, self.bob, self.carol, self.dave = [
+            get_user_model().objects.create_user(
+                email=f"{name}@test.test", password="Testpsw1", username=name
+            )
+            for name in ("me", "alice", "bob", "carol", "dave")
+        ]
+        self.follow(self.me, self.alice)
+        self.follow(self.me, self.bob)
+        self.follow(self.alice, self.carol)
+        self.follow(self.bob, self.carol)
+        self.follow(self.bob, self.dave)
+        self.follow(self.alice, self.me)
+        self.client.force_authenticate(self.me)
+
+    @staticmethod
+    def follow(follower, followed_user):
+        Follow.objects.create(follower=follower, followed_user=followed_user)
+
+    def test_friends_of_friends_ranked_by_shared_connections(self):
+        self.assertEqual(
+            list(friends_of_friends(self.me, 10)),
+            [(self.carol.id, 2), (self.dave.id, 1)],
+        )
+
+    def test_suggestions_are_precomputed(self):
+        res = self.client.get(SUGGESTIONS_URL)
+        self.assertEqual(res.data["results"], [])
+
+        out = io.StringIO()
+        call_command("compute_follow_suggestions", stdout=out)
+        self.assertIn("Stored 3 suggestions for 3 users", out.getvalue())
+        res = self.client.get(SUGGESTIONS_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [(row["username"], row["shared_count"]) for row in res.data["results"]],
+            [("carol", 2), ("dave", 1)],
+        )
+
+    def test_suggestions_skip_users_followed_since_the_batch(self):
+        call_command("compute_follow_suggestions", stdout=io.StringIO())
+        self.follow(self.me, self.carol)
+        res = self.client.get(SUGGESTIONS_URL)
+        self.assertEqual([row["username"] for row in res.data["results"]], ["dave"])
+
+    @override_settings(FOLLOW_SUGGESTIONS_LIMIT=1)
+    def test_suggestions_are_capped_and_replaced(self):
+        call_command("compute_follow_suggestions", stdout=io.StringIO())
+        out = io.StringIO()
+        call_command("compute_follow_suggestions", "--user", "me", stdout=out)
+        self.assertIn("Stored 1 suggestions for 1 users", out.getvalue())
+        self.assertEqual(
+            list(
+                FollowSuggestion.objects.filter(user=self.me).values_list(
+                    "suggested_user__username", flat=True
+                )
+            ),
+            ["carol"],
+        )
+
+    def test_mutual_follows(self):
+        url = reverse("user:user-mutual", args=["bob"])
+        self.follow(self.me, self.carol)
+        res = self.client.get(url)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([row["username"] for row in res.data["results"]], ["carol"])
+
+    def test_follows_you_flag_in_one_query(self):
+        with self.assertNumQueries(2):
+            res = self.client.get(USERS_URL, {"limit": 10})
+        flags = {user["username"]: user["follows_you"] for user in res.data["results"]}
+        self.assertEqual(
+            flags,
+            {"me": False, "alice": True, "bob": False, "carol": False, "dave": False},
+        )
@@ -0,0 +1,93 @@
+import io
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient
+from rest_framework import status
+from api.hashtags import hour_bucket
+from api.models import Hashtag, HashtagCounter
+
+POST_URL = reverse("social_media_api:post-list")
+TRENDING_URL = reverse("social_media_api:hashtags-trending")
+
+
+class TrendingHashtagsApiTests(TestCase):
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="Test@test.test", password="Testpsw1", username="test_user"
+        )
+        self.client.force_authenticate(self.user)
+
+    def create_post(self, hashtags):
+        res = self.client.post(
+            POST_URL,
+            {
+                "author": self.user.id,
+                "title": "title",
+                "content": "content",
+                "hashtags": hashtags,
+            },
+        )
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+    def test_trending_hashtags(self):
+        self.create_post("art,travel")
+        self.create_post("art")
+        res = self.client.get(TRENDING_URL, {"window": "1h"})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            res.data, [{"name": "art", "uses": 2}, {"name": "travel", "uses": 1}]
+        )
+
+    def test_trending_hashtags_excludes_old_buckets(self):
+        hashtag = Hashtag.objects.create(name="old")
+        HashtagCounter.objects.create(
+            hashtag=hashtag,
+            bucket=hour_bucket(timezone.now() - timedelta(days=2)),
+            count=5,
+        )
+        res = self.client.get(TRENDING_URL, {"window": "24h"})
+        self.assertEqual(res.data, [])
+        res = self.client.get(TRENDING_URL, {"window": "7d"})
+        self.assertEqual(res.data, [{"name": "old", "uses": 5}])
+
+    def test_invalid_window(self):
+        res = self.client.get(TRENDING_URL, {"window": "1y"})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_compact_hashtag_counters(self):
+        hashtag = Hashtag.objects.create(name="art")
+        two_days_ago = hour_bucket(timezone.now() - timedelta(days=2)).replace(hour=1)
+        HashtagCounter.objects.bulk_create(
+            [
+                HashtagCounter(hashtag=hashtag, bucket=two_days_ago, count=2),
+                HashtagCounter(
+                    hashtag=hashtag,
+                    bucket=two_days_ago.replace(hour=0),
+                    count=3,
+                ),
+                HashtagCounter(
+                    hashtag=hashtag,
+                    bucket=hour_bucket(timezone.now() - timedelta(days=9)),
+                    count=7,
+                ),
+            ]
+        )
+        out = io.StringIO()
+        call_command("compact_hashtag_counters", stdout=out)
+        self.assertIn(
+            "Dropped 1 expired buckets, rolled up into 1 daily buckets",
+            out.getvalue(),
+        )
+        self.assertEqual(
+            list(HashtagCounter.objects.values_list("bucket", "count")),
+            [(two_days_ago.replace(hour=0), 5)],
+        )
@@ -4,7 +4,12 @@ from rest_framework.reverse import reverse
 from rest_framework.test import APIClient
 from rest_framework import status
 from api.models import Post, Comment, Like
-from api.serializers import CommentListSerializer, CommentRetrieveSerializer, LikeListSerializer, LikeRetrieveSerializer
+from api.serializers import (
+    CommentListSerializer,
+    CommentRetrieveSerializer,
+    LikeListSerializer,
+    LikeRetrieveSerializer,
+)
 
 LIKE_URL = reverse("social_media_api:like-list")
 
@@ -28,14 +33,10 @@ class AuthenticatedLikeApiTests(TestCase):
     def setUp(self) -> None:
         self.client = APIClient()
         self.user = get_user_model().objects.create_user(
-            email="Test@test.test",
-            password="Testpsw1",
-            username="test_user"
+            email="Test@test.test", password="Testpsw1", username="test_user"
         )
         self.user_2 = get_user_model().objects.create_user(
-            email="Test@test2.test",
-            password="Testpsw2",
-            username="user2"
+            email="Test@test2.test", password="Testpsw2", username="user2"
         )
         self.client.force_authenticate(self.user)
 
@@ -45,24 +46,13 @@ class AuthenticatedLikeApiTests(TestCase):
             content="test content",
         )
         self.comment_1 = Comment.objects.create(
-            comment_author=self.user,
-            post=self.post_1,
-            body="test comment"
-
+            comment_author=self.user, post=self.post_1, body="test comment"
         )
         self.comment_2 = Comment.objects.create(
-            comment_author=self.user_2,
-            post=self.post_1,
-            body="test comment"
-        )
-        self.like_1 = Like.objects.create(
-            user=self.user,
-            post=self.post_1
-        )
-        self.like_2 = Like.objects.create(
-            user=self.user_2,
-            post=self.post_1
+            comment_author=self.user_2, post=self.post_1, body="test comment"
         )
+        self.like_1 = Like.objects.create(user=self.user, post=self.post_1)
+        self.like_2 = Like.objects.create(user=self.user_2, post=self.post_1)
 
     def test_like_list(self):
         res = self.client.get(LIKE_URL)
@@ -89,3 +79,46 @@ class AuthenticatedLikeApiTests(TestCase):
     def test_delete_like_from_history_forbidden(self):
         res = self.client.delete(detail_url(self.like_2.id))
         self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_bulk_like(self):
+        post_2 = Post.objects.create(author=self.user_2, title="t", content="c")
+        url = reverse("social_media_api:post-bulk-like")
+        res = self.client.post(
+            url, {"posts": [self.post_1.id, post_2.id, 999999]}, format="json"
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            res.data["results"],
+            [
+                {"post": self.post_1.id, "status": "already_liked"},
+                {"post": post_2.id, "status": "liked"},
+                {"post": 999999, "status": "not_found"},
+            ],
+        )
+        post_2.refresh_from_db()
+        self.assertEqual(post_2.likes_count, 1)
+        self.assertTrue(Like.objects.filter(user=self.user, post=post_2).exists())
+
+    def test_bulk_like_repeated_post(self):
+        post_2 = Post.objects.create(author=self.user_2, title="t", content="c")
+        res = self.client.post(
+            reverse("social_media_api:post-bulk-like"),
+            {"posts": [post_2.id, post_2.id]},
+            format="json",
+        )
+        self.assertEqual(res.data["results"], [{"post": post_2.id, "status": "liked"}])
+        post_2.refresh_from_db()
+        self.assertEqual(post_2.likes_count, 1)
+
+    def test_bulk_like_query_count_does_not_grow(self):
+        posts = [
+            Post.objects.create(author=self.user_2, title="t", content="c")
+            for _ in range(20)
+        ]
+        url = reverse("social_media_api:post-bulk-like")
+        with self.assertNumQueries(6):
+            self.client.post(url, {"posts": [posts[0].id]}, format="json")
+        with self.assertNumQueries(6):
+            self.client.post(
+                url, {"posts": [post.id for post in posts[1:]]}, format="json"
+            )
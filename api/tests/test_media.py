@@ -0,0 +1,262 @@
+import hashlib
+import io
+import shutil
+import tempfile
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from PIL import Image
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from api.fields import ContentAddressedFieldFile
+from api.media import blurhash, collect_media_asset, process_media_asset
+from api.models import Post, MediaAsset, Task
+from api.tasks import enqueue, run_pending_tasks
+
+POST_URL = reverse("social_media_api:post-list")
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def jpeg_with_exif(size=(1600, 900)) -> bytes:
+    image = Image.new("RGB", size, (200, 30, 30))
+    exif = Image.Exif()
+    exif[0x010F] = "PhoneMaker"  # Make
+    exif[0x0112] = 6  # Orientation: rotate 90 CW
+    buffer = io.BytesIO()
+    image.save(buffer, "JPEG", exif=exif)
+    return buffer.getvalue()
+
+
+def failing_task():
+    raise RuntimeError("boom")
+
+
+recorded = []
+
+
+def recording_task(value):
+    recorded.append(value)
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class MediaPipelineTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="Test@test.test", password="Testpsw1", username="test_user"
+        )
+        self.client.force_authenticate(self.user)
+
+    def create_post(self):
+        upload = SimpleUploadedFile(
+            "photo.jpg", jpeg_with_exif(), content_type="image/jpeg"
+        )
+        res = self.client.post(
+            POST_URL,
+            {
+                "author": self.user.id,
+                "title": "photo",
+                "content": "content",
+                "post_media": upload,
+            },
+            format="multipart",
+        )
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        return Post.objects.get(pk=res.data["id"])
+
+    def test_upload_is_queued_not_processed_inline(self):
+        post = self.create_post()
+        self.assertIsNotNone(post.post_media_asset)
+        self.assertIsNone(post.post_media_asset.processed_at)
+        self.assertEqual(
+            list(Task.objects.values_list("name", "args")),
+            [("api.media.process_media_asset", [post.post_media_asset_id])],
+        )
+        res = self.client.get(reverse("social_media_api:post-detail", args=[post.id]))
+        self.assertIsNone(res.data["media"])
+
+    def test_exif_is_stripped_before_the_upload_is_stored(self):
+        post = self.create_post()
+        with default_storage.open(post.post_media.name) as file:
+            image = Image.open(file)
+            self.assertFalse(image.getexif())
+            # The EXIF orientation was applied before it was dropped.
+            self.assertEqual(image.size, (900, 1600))
+        with default_storage.open(post.post_media.name) as file:
+            digest = hashlib.sha256(file.read()).hexdigest()
+        self.assertIn(digest, post.post_media.name)
+
+    def test_worker_moves_legacy_exif_files_to_a_new_name(self):
+        legacy = default_storage.save(
+            "upload/posts/legacy.jpg", ContentFile(jpeg_with_exif())
+        )
+        asset = MediaAsset.objects.create(file=legacy, ref_count=1)
+        post = Post.objects.create(author=self.user, title="old", content="old")
+        Post.objects.filter(pk=post.pk).update(
+            post_media=legacy, post_media_asset=asset
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            process_media_asset(asset.pk)
+        asset.refresh_from_db()
+        post.refresh_from_db()
+        self.assertNotEqual(asset.file, legacy)
+        self.assertEqual(post.post_media.name, asset.file)
+        self.assertFalse(default_storage.exists(legacy))
+        with default_storage.open(asset.file) as file:
+            self.assertFalse(Image.open(file).getexif())
+
+    def test_worker_builds_renditions_and_strips_exif(self):
+        post = self.create_post()
+        self.assertEqual(run_pending_tasks(), 1)
+        self.assertFalse(Task.objects.exists())
+
+        asset = MediaAsset.objects.get(pk=post.post_media_asset_id)
+        # The EXIF orientation was applied before it was dropped.
+        self.assertEqual((asset.width, asset.height), (900, 1600))
+        self.assertEqual(len(asset.blurhash), 28)
+        self.assertEqual(
+            sorted(asset.renditions),
+            ["320.jpeg", "320.webp", "640.jpeg", "640.webp"],
+        )
+        for rendition in asset.renditions.values():
+            with default_storage.open(rendition["file"]) as file:
+                image = Image.open(file)
+                self.assertEqual(image.width, rendition["width"])
+                self.assertFalse(image.getexif())
+        with default_storage.open(asset.file) as file:
+            self.assertFalse(Image.open(file).getexif())
+
+    def test_serializers_expose_rendition_urls(self):
+        post = self.create_post()
+        self.client.get(POST_URL)
+        run_pending_tasks()
+
+        res = self.client.get(POST_URL)
+        media = res.data["results"][0]["media"]
+        self.assertEqual(media["width"], 900)
+        self.assertEqual(len(media["renditions"]), 4)
+        self.assertTrue(
+            media["renditions"][0]["url"].startswith("http://testserver/media/")
+        )
+        res = self.client.get(reverse("social_media_api:post-detail", args=[post.id]))
+        self.assertEqual(res.data["media"]["blurhash"], media["blurhash"])
+
+    def test_profile_image_is_processed(self):
+        upload = SimpleUploadedFile(
+            "me.jpg", jpeg_with_exif((400, 400)), content_type="image/jpeg"
+        )
+        self.client.patch(
+            "/api/user/me/", {"profile_image": upload}, format="multipart"
+        )
+        run_pending_tasks()
+        res = self.client.get(f"/api/user/{self.user.username}/")
+        renditions = res.data["profile_image_renditions"]["renditions"]
+        self.assertEqual([r["width"] for r in renditions], [320, 320])
+
+    def test_identical_uploads_share_one_file(self):
+        first, second = self.create_post(), self.create_post()
+        self.assertEqual(first.post_media.name, second.post_media.name)
+        self.assertEqual(first.post_media_asset_id, second.post_media_asset_id)
+        self.assertEqual(first.post_media_asset.ref_count, 2)
+        self.assertEqual(Task.objects.count(), 1)
+
+    def test_file_is_collected_with_its_last_reference(self):
+        first, second = self.create_post(), self.create_post()
+        run_pending_tasks()
+        asset = MediaAsset.objects.get(pk=first.post_media_asset_id)
+        names = [asset.file, *(r["file"] for r in asset.renditions.values())]
+
+        first.delete()
+        run_pending_tasks()
+        asset.refresh_from_db()
+        self.assertEqual(asset.ref_count, 1)
+        self.assertTrue(default_storage.exists(asset.file))
+
+        second.delete()
+        self.assertEqual(run_pending_tasks(), 1)
+        self.assertFalse(MediaAsset.objects.exists())
+        for name in names:
+            self.assertFalse(default_storage.exists(name))
+
+    def test_reused_asset_is_not_collected(self):
+        post = self.create_post()
+        post.delete()
+        self.create_post()
+        run_pending_tasks()
+        self.assertTrue(default_storage.exists(MediaAsset.objects.get().file))
+
+    def test_upload_is_written_again_if_its_duplicate_is_collected(self):
+        post = self.create_post()
+        asset_id = post.post_media_asset_id
+        post.delete()
+        original_save = ContentAddressedFieldFile.save
+
+        def save_then_collect(field_file, name, content, save=True):
+            original_save(field_file, name, content, save)
+            collect_media_asset(asset_id)
+
+        with mock.patch.object(ContentAddressedFieldFile, "save", save_then_collect):
+            post = self.create_post()
+        asset = MediaAsset.objects.get()
+        self.assertEqual(post.post_media_asset_id, asset.pk)
+        self.assertEqual(asset.ref_count, 1)
+        self.assertTrue(default_storage.exists(asset.file))
+
+    def test_replaced_and_deleted_profile_images_are_released(self):
+        for size in ((400, 400), (300, 300)):
+            upload = SimpleUploadedFile(
+                "me.jpg", jpeg_with_exif(size), content_type="image/jpeg"
+            )
+            self.client.patch(
+                "/api/user/me/", {"profile_image": upload}, format="multipart"
+            )
+        run_pending_tasks()
+        self.assertEqual(MediaAsset.objects.get().ref_count, 1)
+
+        self.client.delete("/api/user/me/")
+        run_pending_tasks()
+        self.assertFalse(MediaAsset.objects.exists())
+
+    def test_blurhash_of_flat_image(self):
+        self.assertEqual(
+            blurhash(Image.new("RGB", (8, 8), (255, 255, 255))),
+            "LfTSUA~qfQ~q~qt7fQt7fQfQfQfQ",
+        )
+
+
+class TaskQueueTests(TestCase):
+    @override_settings(TASK_MAX_ATTEMPTS=2)
+    def test_failed_tasks_are_retried_then_parked(self):
+        enqueue("api.tests.test_media.failing_task")
+        run_pending_tasks()
+        task = Task.objects.get()
+        self.assertEqual((task.status, task.attempts), (Task.PENDING, 1))
+        self.assertIn("boom", task.last_error)
+
+        Task.objects.update(run_after=task.created_at)
+        run_pending_tasks()
+        task.refresh_from_db()
+        self.assertEqual((task.status, task.attempts), (Task.FAILED, 2))
+        self.assertEqual(run_pending_tasks(), 0)
+
+    @override_settings(TASK_QUEUE_BACKEND="api.tasks.ImmediateQueue")
+    def test_immediate_queue_runs_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            enqueue("api.tests.test_media.recording_task", 1)
+            self.assertEqual(recorded, [])
+        self.assertEqual(recorded, [1])
+        self.assertFalse(Task.objects.exists())
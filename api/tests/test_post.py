@@ -1,11 +1,18 @@
+import io
+import time
 from datetime import datetime
+from unittest import mock
 
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
 from django.test import TestCase
 from django.utils import timezone
 from rest_framework.reverse import reverse
 from rest_framework.test import APIClient
 from rest_framework import status
+from api.cache import get_version, POST
 from api.models import Post, Comment, Like
 from api.serializers import PostListSerializer, PostRetrieveSerializer
 
@@ -29,6 +36,7 @@ class UnauthenticatedPostApiTests(TestCase):
 class AuthenticatedPostApiTests(TestCase):
 
     def setUp(self) -> None:
+        cache.clear()
         self.client = APIClient()
         self.user = get_user_model().objects.create_user(
             email="Test@test.test", password="Testpsw1", username="test_user"
@@ -74,12 +82,127 @@ class AuthenticatedPostApiTests(TestCase):
         self.assertIn(serializer1.data, res.data["results"])
         self.assertNotIn(serializer2.data, res.data["results"])
 
+    def test_filter_post_by_hashtag_is_exact(self):
+        party = Post.objects.create(
+            author=self.user_2, title="party", content="#party time"
+        )
+        res = self.client.get(POST_URL, data={"hashtags": "#art"})
+        self.assertEqual(res.data["results"], [])
+        res = self.client.get(POST_URL, data={"hashtags": "Party"})
+        self.assertEqual([post["id"] for post in res.data["results"]], [party.id])
+
+    def test_hashtags_are_synced_on_save(self):
+        self.assertEqual(
+            set(self.post_1.tags.values_list("name", flat=True)),
+            {"weather", "nature"},
+        )
+        self.post_1.hashtags = "#Nature"
+        self.post_1.save()
+        self.assertEqual(
+            list(self.post_1.tags.values_list("name", flat=True)), ["nature"]
+        )
+
+    def test_hashtag_posts_endpoint(self):
+        url = reverse("social_media_api:hashtag-posts", args=["sport"])
+        res = self.client.get(url)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["results"], [PostListSerializer(self.post_2).data])
+
+    def test_filter_post_by_date_range(self):
+        Post.objects.filter(pk=self.post_1.pk).update(
+            published_date=timezone.make_aware(datetime(2024, 6, 30, 23, 30))
+        )
+        Post.objects.filter(pk=self.post_2.pk).update(
+            published_date=timezone.make_aware(datetime(2024, 7, 1, 0, 30))
+        )
+        cases = [
+            ({"year": "2024", "month": "6"}, [self.post_1.id]),
+            ({"year": "2024", "month": "7", "day": "1"}, [self.post_2.id]),
+            ({"year": "2024"}, [self.post_1.id, self.post_2.id]),
+            ({"day": "30"}, [self.post_1.id]),
+            ({"since": "2024-07-01"}, [self.post_2.id]),
+            ({"until": "2024-06-30"}, [self.post_1.id]),
+            ({"until": "2024-07-01T00:00:00"}, [self.post_1.id]),
+        ]
+        for params, expected in cases:
+            res = self.client.get(POST_URL, data=params)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertEqual(
+                sorted(post["id"] for post in res.data["results"]), expected, params
+            )
+
+    def test_filter_post_by_invalid_date(self):
+        res = self.client.get(POST_URL, data={"since": "yesterday"})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
     def test_retrieve_post_detail(self):
         res = self.client.get(detail_url(self.post_1.id))
         serializer = PostRetrieveSerializer(self.post_1)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         self.assertEqual(res.data, serializer.data)
 
+    def test_retrieve_post_is_cached_until_write(self):
+        self.client.get(detail_url(self.post_2.id))
+        with self.assertNumQueries(0):
+            res = self.client.get(detail_url(self.post_2.id))
+        self.assertEqual(res.data["likes"], 0)
+
+        Like.objects.create(user=self.user, post=self.post_2)
+        res = self.client.get(detail_url(self.post_2.id))
+        self.assertEqual(res.data["likes"], 1)
+
+    def test_post_cache_is_invalidated_again_on_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Like.objects.create(user=self.user, post=self.post_2)
+            # What a concurrent reader would cache from pre-commit rows.
+            version = get_version(POST, self.post_2.id)
+        self.assertNotEqual(get_version(POST, self.post_2.id), version)
+
+    def test_post_list_lags_behind_counters_for_one_cache_timeout(self):
+        etag = self.client.get(POST_URL)["ETag"]
+        Like.objects.create(user=self.user, post=self.post_2)
+        res = self.client.get(POST_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        later = time.time() + settings.API_CACHE_TIMEOUT
+        with mock.patch("api.cache.time.time", return_value=later):
+            res = self.client.get(POST_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        likes = {post["id"]: post["likes"] for post in res.data["results"]}
+        self.assertEqual(likes[self.post_2.id], 1)
+
+        etag = self.client.get(POST_URL)["ETag"]
+        Post.objects.create(author=self.user, title="new", content="c")
+        res = self.client.get(POST_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_retrieve_post_not_modified(self):
+        res = self.client.get(detail_url(self.post_1.id))
+        etag = res["ETag"]
+        self.assertIn("Last-Modified", res)
+
+        res = self.client.get(detail_url(self.post_1.id), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res["ETag"], etag)
+
+        Like.objects.create(user=self.user_2, post=self.post_1)
+        res = self.client.get(detail_url(self.post_1.id), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res["ETag"], etag)
+
+    def test_update_post_with_stale_if_match(self):
+        etag = self.client.get(detail_url(self.post_1.id))["ETag"]
+        payload = {"author": self.user.id, "title": "first", "content": "content"}
+        res = self.client.put(detail_url(self.post_1.id), payload, HTTP_IF_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res["ETag"], etag)
+
+        payload["title"] = "second"
+        res = self.client.put(detail_url(self.post_1.id), payload, HTTP_IF_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_412_PRECONDITION_FAILED)
+        self.post_1.refresh_from_db()
+        self.assertEqual(self.post_1.title, "first")
+
     def test_update_post(self):
         payload = {
             "author": self.user.id,
@@ -94,6 +217,26 @@ class AuthenticatedPostApiTests(TestCase):
         res = self.client.put(detail_url(self.post_2.id), payload)
         self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
 
+    def test_stale_post_save_keeps_counters(self):
+        stale = Post.objects.get(pk=self.post_1.pk)
+        Like.objects.create(user=self.user_2, post=self.post_1)
+        liked = Post.objects.get(pk=self.post_1.pk)
+
+        stale.title = "edited"
+        stale.save()
+        self.post_1.refresh_from_db()
+        self.assertEqual(self.post_1.title, "edited")
+        self.assertEqual(self.post_1.likes_count, 1)
+        self.assertEqual(self.post_1.version, liked.version + 1)
+        self.assertEqual(stale.version, self.post_1.version)
+
+    def test_update_post_forbidden_with_stale_if_match(self):
+        payload = {"title": "updated title", "content": "updated content"}
+        res = self.client.put(
+            detail_url(self.post_2.id), payload, HTTP_IF_MATCH='"post-0-0"'
+        )
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
     def test_delete_post(self):
         res = self.client.delete(detail_url(self.post_1.id))
         self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
@@ -123,6 +266,15 @@ class AuthenticatedPostApiTests(TestCase):
         self.assertEqual(res.status_code, status.HTTP_201_CREATED)
         self.assertEqual(Like.objects.count(), 1)
 
+    def test_like_post_twice(self):
+        url = f"/api/social-media/posts/{self.post_2.id}/like-post/"
+        self.client.post(url)
+        res = self.client.post(url)
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Like.objects.count(), 1)
+        self.post_2.refresh_from_db()
+        self.assertEqual(self.post_2.likes_count, 1)
+
     def test_unlike_post(self):
         Like.objects.create(user=self.user, post=self.post_2)
         url = f"/api/social-media/posts/{self.post_2.id}/unlike-post/"
@@ -130,6 +282,56 @@ class AuthenticatedPostApiTests(TestCase):
         self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
         self.assertEqual(Like.objects.count(), 0)
 
+    def test_like_and_comment_update_post_counters(self):
+        self.client.post(
+            f"/api/social-media/posts/{self.post_2.id}/like-post/",
+            data={"user": self.user.id, "post": self.post_2.id},
+        )
+        self.client.post(
+            f"/api/social-media/posts/{self.post_2.id}/add-comment/",
+            data={
+                "comment_author": self.user.id,
+                "post": self.post_2.id,
+                "body": "test comment",
+            },
+        )
+        self.post_2.refresh_from_db()
+        self.assertEqual(self.post_2.likes_count, 1)
+        self.assertEqual(self.post_2.comments_count, 1)
+
+        self.client.post(f"/api/social-media/posts/{self.post_2.id}/unlike-post/")
+        self.post_2.refresh_from_db()
+        self.assertEqual(self.post_2.likes_count, 0)
+
+    def test_cascade_delete_updates_post_counters(self):
+        user_3 = get_user_model().objects.create_user(
+            email="Test@test3.test", password="Testpsw3", username="user3"
+        )
+        Like.objects.create(user=user_3, post=self.post_1)
+        Comment.objects.create(comment_author=user_3, post=self.post_1, body="hi")
+        user_3.delete()
+        self.post_1.refresh_from_db()
+        self.assertEqual(self.post_1.likes_count, 0)
+        self.assertEqual(self.post_1.comments_count, 0)
+
+    def test_post_list_query_count_is_constant(self):
+        for i in range(4):
+            post = Post.objects.create(author=self.user_2, title=f"t{i}", content="c")
+            Like.objects.create(user=self.user, post=post)
+        with self.assertNumQueries(2):
+            res = self.client.get(POST_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_rebuild_post_counters_command(self):
+        Like.objects.create(user=self.user, post=self.post_2)
+        Post.objects.update(likes_count=42, comments_count=42)
+        out = io.StringIO()
+        call_command("rebuild_post_counters", stdout=out)
+        self.assertIn("Rebuilt counters for 2 posts", out.getvalue())
+        self.post_2.refresh_from_db()
+        self.assertEqual(self.post_2.likes_count, 1)
+        self.assertEqual(self.post_2.comments_count, 0)
+
 
 class AdminPostTests(TestCase):
 
@@ -162,3 +364,43 @@ class AdminPostTests(TestCase):
         invalid_id = self.post_2.id + 1
         res = self.client.get(detail_url(invalid_id))
         self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class KeysetPaginationPostTests(TestCase):
+
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="Test@test.test", password="Testpsw1", username="test_user"
+        )
+        self.client.force_authenticate(self.user)
+        self.posts = [
+            Post.objects.create(author=self.user, title=f"post {i}", content="c")
+            for i in range(7)
+        ]
+
+    def test_cursor_pages_are_stable_while_inserting(self):
+        res = self.client.get(POST_URL, {"pagination": "cursor", "page_size": 3})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        seen = [post["id"] for post in res.data["results"]]
+
+        Post.objects.create(author=self.user, title="new post", content="c")
+        while res.data["next"]:
+            res = self.client.get(res.data["next"])
+            seen += [post["id"] for post in res.data["results"]]
+
+        self.assertEqual(seen, [post.id for post in reversed(self.posts)])
+
+    def test_page_size_is_capped(self):
+        res = self.client.get(POST_URL, {"pagination": "cursor", "page_size": 1000})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data["results"]), 7)
+        self.assertIsNone(res.data["next"])
+
+    def test_invalid_cursor(self):
+        res = self.client.get(POST_URL, {"cursor": "not-a-cursor"})
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_limit_offset_is_default(self):
+        res = self.client.get(POST_URL)
+        self.assertEqual(res.data["count"], 7)
@@ -0,0 +1,105 @@
+import time
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient
+
+from user.presence import is_online, mark_offline, mark_online
+
+TOKEN_URL = "/api/user/token/"
+LOGOUT_URL = reverse("user:logout-user")
+USERS_URL = reverse("user:users-list")
+
+
+class PresenceTests(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.client = APIClient()
+        self.users = [
+            get_user_model().objects.create_user(
+                email=f"user{i}@test.test", password="Testpsw1", username=f"user{i}"
+            )
+            for i in range(3)
+        ]
+        self.user = self.users[0]
+
+    def login(self):
+        response = self.client.post(
+            TOKEN_URL, {"email": self.user.email, "password": "Testpsw1"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['access']}")
+
+    def test_login_and_logout_do_not_write_the_user_row(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.login()
+        self.assertTrue(is_online(self.user.username))
+
+        with CaptureQueriesContext(connection) as logout_queries:
+            response = self.client.post(LOGOUT_URL)
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(is_online(self.user.username))
+
+        for query in [*queries, *logout_queries]:
+            self.assertNotIn("UPDATE", query["sql"])
+
+    def test_authenticated_requests_are_heartbeats(self):
+        self.login()
+        mark_offline(self.user.username)
+        self.client.get(USERS_URL)
+        self.assertTrue(is_online(self.user.username))
+
+    def test_heartbeats_write_the_cache_once_per_half_timeout(self):
+        self.login()
+        with mock.patch.object(cache, "set", wraps=cache.set) as set_:
+            for _ in range(3):
+                self.client.get(USERS_URL)
+        set_presence = [
+            call for call in set_.call_args_list if call.args[0].startswith("presence:")
+        ]
+        self.assertEqual(set_presence, [])
+
+        later = time.time() + settings.PRESENCE_TIMEOUT / 2 + 1
+        with mock.patch("user.presence.time.time", return_value=later):
+            with mock.patch.object(cache, "set", wraps=cache.set) as set_:
+                self.client.get(USERS_URL)
+        set_presence = [
+            call for call in set_.call_args_list if call.args[0].startswith("presence:")
+        ]
+        self.assertEqual(len(set_presence), 1)
+        self.assertTrue(is_online(self.user.username))
+
+    def test_user_list_looks_presence_up_in_one_round_trip(self):
+        self.client.force_authenticate(self.user)
+        mark_online(self.users[1].username)
+        with mock.patch("user.serializers.is_online") as is_online_:
+            with mock.patch.object(cache, "get_many", wraps=cache.get_many) as get_many:
+                response = self.client.get(USERS_URL, {"limit": 10})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        online = {user["username"]: user["online"] for user in response.data["results"]}
+        self.assertEqual(online, {"user0": False, "user1": True, "user2": False})
+        get_many.assert_called_once()
+        is_online_.assert_not_called()
+
+    def test_profile_etag_follows_presence(self):
+        self.client.force_authenticate(self.user)
+        url = reverse("user:users-detail", args=[self.users[1].username])
+        response = self.client.get(url)
+        self.assertFalse(response.data["online"])
+        etag = response["ETag"]
+
+        mark_online(self.users[1].username)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.data["online"])
+        self.assertNotEqual(response["ETag"], etag)
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
@@ -0,0 +1,109 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from api.feed import fan_out_post
+from api.models import Post, Comment, Like, Follow
+from api.views import (
+    PostViewSet,
+    CommentViewSet,
+    LikeViewSet,
+    FollowViewSet,
+    FeedView,
+    HashtagPostListView,
+    UserFollowersView,
+)
+from user.views import UserListView, UserDetailView
+
+
+class QueryBudgetTests(TestCase):
+    """Every read endpoint stays within its declared `query_budgets`."""
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.client = APIClient()
+        self.users = [
+            get_user_model().objects.create_user(
+                email=f"user{i}@test.test", password="Testpsw1", username=f"user{i}"
+            )
+            for i in range(5)
+        ]
+        self.user = self.users[0]
+        for author in self.users:
+            if author != self.user:
+                Follow.objects.create(follower=self.user, followed_user=author)
+            post = Post.objects.create(
+                author=author, title="title", content="body #art " * 20
+            )
+            for other in self.users:
+                Comment.objects.create(comment_author=other, post=post, body="nice")
+                Like.objects.create(user=other, post=post)
+            fan_out_post(post)
+        self.client.force_authenticate(self.user)
+
+    def assertWithinBudget(self, view, action, url):
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(url)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertLessEqual(
+            len(queries),
+            view.query_budgets[action],
+            "\n".join(query["sql"] for query in queries),
+        )
+        return res
+
+    def test_list_budgets(self):
+        endpoints = [
+            (PostViewSet, "social_media_api:post-list"),
+            (CommentViewSet, "social_media_api:comment-list"),
+            (LikeViewSet, "social_media_api:like-list"),
+            (FollowViewSet, "social_media_api:follow-list"),
+            (FeedView, "social_media_api:feed"),
+            (UserListView, "user:users-list"),
+        ]
+        endpoints = [(view, reverse(name)) for view, name in endpoints] + [
+            (UserFollowersView, reverse("user:user-followers", args=["user1"]))
+        ]
+        for view, url in endpoints:
+            with self.subTest(view=view.__name__):
+                self.assertWithinBudget(view, "list", url)
+
+    def test_list_budget_holds_with_cursor_pagination(self):
+        url = reverse("social_media_api:comment-list") + "?pagination=cursor"
+        self.assertWithinBudget(CommentViewSet, "list", url)
+
+    def test_hashtag_posts_budget(self):
+        url = reverse("social_media_api:hashtag-posts", args=["art"])
+        res = self.assertWithinBudget(HashtagPostListView, "list", url)
+        self.assertEqual(res.data["count"], len(self.users))
+
+    def test_retrieve_budgets(self):
+        endpoints = [
+            (PostViewSet, "social_media_api:post-detail", Post.objects.first().pk),
+            (
+                CommentViewSet,
+                "social_media_api:comment-detail",
+                Comment.objects.first().pk,
+            ),
+            (LikeViewSet, "social_media_api:like-detail", Like.objects.first().pk),
+            (
+                FollowViewSet,
+                "social_media_api:follow-detail",
+                Follow.objects.first().pk,
+            ),
+            (UserDetailView, "user:users-detail", self.users[1].username),
+        ]
+        for view, name, lookup in endpoints:
+            with self.subTest(view=view.__name__):
+                self.assertWithinBudget(view, "retrieve", reverse(name, args=[lookup]))
+
+    def test_previews_are_truncated(self):
+        res = self.client.get(reverse("social_media_api:comment-list"))
+        preview = res.data["results"][0]["commented_post"]
+        self.assertEqual(len(preview), 100)
@@ -0,0 +1,175 @@
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connections
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from api.db.routers import (
+    ReplicaPinningMiddleware,
+    ReplicaRouter,
+    pin_key,
+    pin_to_primary,
+    use_primary,
+)
+from api.models import Like, Post
+
+
+def detail_url(post_id):
+    return reverse("social_media_api:post-detail", args=[post_id])
+
+
+@override_settings(REPLICA_DATABASES=["replica"])
+class ReplicaRoutingTests(TestCase):
+    """`replica` is a second SQLite database that lags behind `default`."""
+
+    databases = {"default", "replica"}
+
+    def setUp(self) -> None:
+        self.users = [
+            get_user_model().objects.create_user(
+                email=f"user{i}@test.test", password="Testpsw1", username=f"user{i}"
+            )
+            for i in range(2)
+        ]
+        self.post = Post.objects.create(
+            author=self.users[1], title="replicated", content="body"
+        )
+        get_user_model().objects.using("replica").bulk_create(self.users)
+        Post.objects.using("replica").bulk_create([self.post])
+        self.lagging = Post.objects.create(
+            author=self.users[1], title="lagging", content="body"
+        )
+        # As if these writes were older than the pins and replication lag.
+        cache.clear()
+
+    def client_for(self, user):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(user)}")
+        return client
+
+    def get(self, client, url):
+        with CaptureQueriesContext(connections["default"]) as primary:
+            with CaptureQueriesContext(connections["replica"]) as replica:
+                response = client.get(url)
+        return response, len(primary), len(replica)
+
+    def test_reads_go_to_the_replica(self):
+        response, primary, replica = self.get(
+            self.client_for(self.users[0]), detail_url(self.post.id)
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(primary, 0)
+        self.assertGreater(replica, 0)
+
+        response, _, _ = self.get(
+            self.client_for(self.users[0]), detail_url(self.lagging.id)
+        )
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_writes_go_to_the_primary(self):
+        client = self.client_for(self.users[0])
+        response = client.post(
+            reverse("social_media_api:post-like-post", args=[self.lagging.id])
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(self.lagging.post_likes.filter(user=self.users[0]).exists())
+        self.assertFalse(Post.objects.using("replica")[0].post_likes.exists())
+
+    def comment(self, client):
+        response = client.post(
+            reverse("social_media_api:post-add-comment", args=[self.post.id]),
+            {
+                "comment_author": self.users[0].id,
+                "post": self.post.id,
+                "body": "first",
+            },
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_writers_read_their_writes_from_the_primary(self):
+        client = self.client_for(self.users[0])
+        self.comment(client)
+
+        # Other users still read from the replica.
+        response, _, _ = self.get(
+            self.client_for(self.users[1]), detail_url(self.lagging.id)
+        )
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+        response, primary, replica = self.get(client, detail_url(self.lagging.id))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertGreater(primary, 0)
+        self.assertEqual(replica, 0)
+
+        # Until the pin expires.
+        cache.clear()
+        response, _, _ = self.get(client, detail_url(self.lagging.id))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_cached_entries_are_rebuilt_from_the_primary_after_a_write(self):
+        writer = self.client_for(self.users[0])
+        self.comment(writer)
+
+        # An unpinned reader fills the cache the writer then reads from.
+        response, primary, _ = self.get(
+            self.client_for(self.users[1]), detail_url(self.post.id)
+        )
+        self.assertEqual(response.data["comments"], 1)
+        self.assertGreater(primary, 0)
+
+        response, _, _ = self.get(writer, detail_url(self.post.id))
+        self.assertEqual(response.data["comments"], 1)
+
+        # Once the write is older than the pins, misses go to replicas.
+        cache.clear()
+        response, primary, _ = self.get(
+            self.client_for(self.users[1]), detail_url(self.post.id)
+        )
+        self.assertEqual(response.data["comments"], 0)
+        self.assertEqual(primary, 0)
+
+    def test_failed_writes_do_not_pin(self):
+        client = self.client_for(self.users[0])
+        response = client.post(
+            reverse("social_media_api:post-add-comment", args=[self.post.id]), {}
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIsNone(cache.get(pin_key(self.users[0].pk)))
+
+    def test_router(self):
+        router = ReplicaRouter()
+        # Outside a request, e.g. tasks and commands.
+        self.assertEqual(router.db_for_read(Post), "default")
+        token = use_primary.set(False)
+        self.addCleanup(use_primary.reset, token)
+        self.assertEqual(router.db_for_read(Post), "replica")
+        self.assertEqual(router.db_for_write(Post), "default")
+        self.assertTrue(
+            router.allow_relation(self.post, Post.objects.using("replica")[0])
+        )
+
+    def test_insert_or_ignore_writes_to_the_primary(self):
+        token = use_primary.set(False)
+        self.addCleanup(use_primary.reset, token)
+        like = Like.objects.create_or_ignore(user=self.users[0], post=self.post)
+        self.assertEqual(like._state.db, "default")
+        self.assertTrue(Like.objects.using("default").filter(pk=like.pk).exists())
+
+    def test_middleware_runs_on_the_event_loop(self):
+        async def view(request):
+            return HttpResponse(str(use_primary.get()))
+
+        middleware = ReplicaPinningMiddleware(view)
+        self.assertTrue(iscoroutinefunction(middleware))
+        token = AccessToken.for_user(self.users[0])
+        request = RequestFactory().get("/", HTTP_AUTHORIZATION=f"Bearer {token}")
+        self.assertEqual(async_to_sync(middleware)(request).content, b"False")
+
+        pin_to_primary(self.users[0].pk)
+        self.assertEqual(async_to_sync(middleware)(request).content, b"True")
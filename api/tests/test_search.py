@@ -0,0 +1,62 @@
+import io
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient
+from rest_framework import status
+from api.models import Post, Comment
+
+SEARCH_URL = reverse("social_media_api:search")
+
+
+class SearchApiTests(TestCase):
+
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="Test@test.test", password="Testpsw1", username="test_user"
+        )
+        self.client.force_authenticate(self.user)
+        self.post_1 = Post.objects.create(
+            author=self.user, title="Mountain hiking", content="Alps trip"
+        )
+        self.post_2 = Post.objects.create(
+            author=self.user, title="Cooking", content="Pasta after hiking"
+        )
+        self.comment = Comment.objects.create(
+            comment_author=self.user, post=self.post_2, body="Great pasta recipe"
+        )
+
+    def search(self, text):
+        res = self.client.get(SEARCH_URL, {"q": text})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return [(item["type"], item["id"]) for item in res.data["results"]]
+
+    def test_search_ranks_title_above_content(self):
+        self.assertEqual(
+            self.search("hiking"),
+            [("post", self.post_1.id), ("post", self.post_2.id)],
+        )
+
+    def test_search_comments(self):
+        self.assertIn(("comment", self.comment.id), self.search("recipe"))
+
+    def test_index_follows_updates_and_deletes(self):
+        self.post_1.title = "Sea kayaking"
+        self.post_1.save()
+        self.assertEqual(self.search("kayaking"), [("post", self.post_1.id)])
+        self.post_1.delete()
+        self.assertEqual(self.search("kayaking"), [])
+
+    def test_query_is_required(self):
+        res = self.client.get(SEARCH_URL)
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_rebuild_search_index(self):
+        Post.objects.filter(pk=self.post_1.pk).update(title="Glacier")
+        out = io.StringIO()
+        call_command("rebuild_search_index", stdout=out)
+        self.assertIn("Search index rebuilt", out.getvalue())
+        self.assertEqual(self.search("glacier"), [("post", self.post_1.id)])
@@ -0,0 +1,123 @@
+import hashlib
+import io
+import os
+import shutil
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from PIL import Image
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from api.models import Post
+from api.tests.test_media import jpeg_with_exif
+from api.uploads import (
+    PayloadTooLarge,
+    StreamingImageUploadHandler,
+    UnsupportedImageType,
+    sniff_image_type,
+)
+
+POST_URL = reverse("social_media_api:post-list")
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class StreamingUploadTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="Test@test.test", password="Testpsw1", username="test_user"
+        )
+        self.client.force_authenticate(self.user)
+
+    def upload(self, name, content):
+        return self.client.post(
+            POST_URL,
+            {
+                "author": self.user.id,
+                "title": "photo",
+                "content": "content",
+                "post_media": SimpleUploadedFile(name, content),
+            },
+            format="multipart",
+        )
+
+    def test_image_is_moved_into_storage(self):
+        buffer = io.BytesIO()
+        Image.new("RGB", (64, 64)).save(buffer, "JPEG")
+        content = buffer.getvalue()
+        res = self.upload("photo.jpg", content)
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        post = Post.objects.get(pk=res.data["id"])
+        with post.post_media.open() as file:
+            self.assertEqual(file.read(), content)
+        staging = os.path.join(MEDIA_ROOT, "upload/tmp")
+        self.assertEqual(os.listdir(staging), [])
+
+    @override_settings(MEDIA_MAX_UPLOAD_SIZE=1024)
+    def test_oversized_upload_is_rejected(self):
+        res = self.upload("photo.jpg", jpeg_with_exif((640, 640)))
+        self.assertEqual(res.status_code, status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        self.assertFalse(Post.objects.exists())
+
+    def test_non_image_is_rejected_whatever_its_name(self):
+        res = self.upload("photo.jpg", b"<?php echo 'hello'; ?>" * 10)
+        self.assertEqual(res.status_code, status.HTTP_415_UNSUPPORTED_MEDIA_TYPE)
+        self.assertFalse(Post.objects.exists())
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class StreamingImageUploadHandlerTests(TestCase):
+    def start(self, field_name="post_media"):
+        handler = StreamingImageUploadHandler(None, ["post_media"])
+        handler.new_file(field_name, "photo.jpg", "image/jpeg", None)
+        return handler
+
+    def test_rejects_on_first_chunk(self):
+        handler = self.start()
+        with self.assertRaises(UnsupportedImageType):
+            handler.receive_data_chunk(b"MZ\x90\x00" * 8, 0)
+
+    @override_settings(MEDIA_MAX_UPLOAD_SIZE=100)
+    def test_rejects_declared_length_before_reading(self):
+        handler = self.start()
+        with self.assertRaises(PayloadTooLarge):
+            handler.handle_raw_input(None, {}, 10**9, b"")
+
+    @override_settings(MEDIA_MAX_UPLOAD_SIZE=100)
+    def test_rejects_once_cap_is_crossed(self):
+        handler = self.start()
+        handler.receive_data_chunk(b"\xff\xd8\xff" + b"0" * 60, 0)
+        with self.assertRaises(PayloadTooLarge):
+            handler.receive_data_chunk(b"0" * 60, 63)
+
+    def test_hashes_incrementally(self):
+        handler = self.start()
+        chunks = [b"\x89PNG\r\n\x1a\n" + b"a" * 100, b"b" * 100]
+        for chunk in chunks:
+            self.assertIsNone(handler.receive_data_chunk(chunk, 0))
+        file = handler.file_complete(208)
+        self.assertEqual(file.sha256, hashlib.sha256(b"".join(chunks)).hexdigest())
+        self.assertEqual(file.content_type, "image/png")
+        file.close()
+
+    def test_other_fields_pass_through(self):
+        handler = self.start(field_name="attachment")
+        self.assertEqual(handler.receive_data_chunk(b"data", 0), b"data")
+        self.assertIsNone(handler.file_complete(4))
+
+    def test_sniff_image_type(self):
+        self.assertEqual(
+            sniff_image_type(b"RIFF\x00\x00\x00\x00WEBPVP8 "), "image/webp"
+        )
+        self.assertEqual(sniff_image_type(b"GIF89a\x01\x00"), "image/gif")
+        self.assertIsNone(sniff_image_type(b"%PDF-1.7"))
@@ -1,7 +1,10 @@
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.test import TestCase
 from rest_framework.test import APIClient
 from rest_framework import status
+from api.models import Follow
+from user.presence import is_online
 
 class ManageUserProfile(TestCase):
     def setUp(self) -> None:
@@ -22,10 +25,65 @@ class ManageUserProfile(TestCase):
         url = "/api/user/me/logout"
         response = self.client.post(url)
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
-        self.assertFalse(self.user.online)
+        self.assertFalse(is_online(self.user.username))
 
     def test_delete_user_account(self):
         url = f"/api/user/me/"
         res = self.client.delete(url)
         self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
         self.assertEqual(get_user_model().objects.count(),1)
+
+
+class UserListFilterTests(TestCase):
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="Test@test.test",
+            password="Testpsw1",
+            username="test_user"
+        )
+        get_user_model().objects.create_user(
+            email="Test@test2.test",
+            password="Testpsw2",
+            username="my_test"
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_username_prefix_filter(self):
+        res = self.client.get("/api/user/users/", {"username__startswith": "test"})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [user["username"] for user in res.data["results"]], ["test_user"]
+        )
+
+    def test_username_substring_filter(self):
+        res = self.client.get("/api/user/users/", {"username": "test"})
+        self.assertEqual(res.data["count"], 2)
+
+
+class UserDetailCacheTests(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="Test@test.test",
+            password="Testpsw1",
+            username="test_user"
+        )
+        self.user_2 = get_user_model().objects.create_user(
+            email="Test@test2.test",
+            password="Testpsw2",
+            username="user2"
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_profile_is_cached_until_follow(self):
+        url = "/api/user/user2/"
+        self.client.get(url)
+        with self.assertNumQueries(0):
+            res = self.client.get(url)
+        self.assertEqual(res.data["users_followed"], 0)
+
+        Follow.objects.create(follower=self.user, followed_user=self.user_2)
+        res = self.client.get(url)
+        self.assertEqual(res.data["users_followed"], 1)
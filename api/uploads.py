@@ -0,0 +1,136 @@
+import hashlib
+import os
+import tempfile
+
+from django.conf import settings
+from django.core.files.uploadedfile import TemporaryUploadedFile, UploadedFile
+from django.core.files.uploadhandler import FileUploadHandler
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+SNIFF_BYTES = 16
+
+
+class PayloadTooLarge(APIException):
+    status_code = status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    default_code = "payload_too_large"
+
+    def __init__(self):
+        limit = settings.MEDIA_MAX_UPLOAD_SIZE // (1024 * 1024)
+        super().__init__(f"Images may be at most {limit} MB.")
+
+
+class UnsupportedImageType(APIException):
+    status_code = status.HTTP_415_UNSUPPORTED_MEDIA_TYPE
+    default_detail = "Upload a JPEG, PNG, GIF or WebP image."
+    default_code = "unsupported_image_type"
+
+
+def sniff_image_type(head: bytes) -> str | None:
+    """Content type from the magic bytes, whatever the client claimed."""
+    if head.startswith(b"\xff\xd8\xff"):
+        return "image/jpeg"
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "image/png"
+    if head[:6] in (b"GIF87a", b"GIF89a"):
+        return "image/gif"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    return None
+
+
+class StagedUploadedFile(TemporaryUploadedFile):
+    """
+    Spooled inside MEDIA_ROOT rather than the system temp dir, so saving it
+    to the file system storage is a rename and the bytes are written once.
+    `sha256` holds the hex digest once the upload is complete.
+    """
+
+    def __init__(self, name, content_type, charset, content_type_extra=None):
+        staging_dir = os.path.join(
+            settings.MEDIA_ROOT, settings.MEDIA_UPLOAD_STAGING_DIR
+        )
+        os.makedirs(staging_dir, exist_ok=True)
+        file = tempfile.NamedTemporaryFile(suffix=".upload", dir=staging_dir)
+        UploadedFile.__init__(
+            self, file, name, content_type, 0, charset, content_type_extra
+        )
+        self.sha256 = None
+
+
+class StreamingImageUploadHandler(FileUploadHandler):
+    """
+    Stream image fields straight to the staging file while enforcing
+    MEDIA_MAX_UPLOAD_SIZE, checking the magic bytes of the first chunk and
+    hashing as the bytes arrive. Bad uploads fail on the first offending
+    chunk, before the rest of the body is read. Other fields fall through
+    to the next handler.
+    """
+
+    def __init__(self, request=None, field_names=()):
+        super().__init__(request)
+        self.field_names = set(field_names)
+        self.file = None
+
+    def handle_raw_input(
+        self, input_data, META, content_length, boundary, encoding=None
+    ):
+        limit = settings.MEDIA_MAX_UPLOAD_SIZE + settings.DATA_UPLOAD_MAX_MEMORY_SIZE
+        if content_length and content_length > limit:
+            raise PayloadTooLarge()
+
+    def new_file(self, field_name, *args, **kwargs):
+        super().new_file(field_name, *args, **kwargs)
+        self.file = None
+        if field_name in self.field_names:
+            self.file = StagedUploadedFile(
+                self.file_name, self.content_type, self.charset, self.content_type_extra
+            )
+            self.size = 0
+            self.head = b""
+            self.digest = hashlib.sha256()
+
+    def receive_data_chunk(self, raw_data, start):
+        if self.file is None:
+            return raw_data
+        self.size += len(raw_data)
+        if self.size > settings.MEDIA_MAX_UPLOAD_SIZE:
+            self.abort(PayloadTooLarge())
+        if len(self.head) < SNIFF_BYTES:
+            self.head += raw_data[: SNIFF_BYTES - len(self.head)]
+            if len(self.head) >= SNIFF_BYTES:
+                self.check_type()
+        self.digest.update(raw_data)
+        self.file.write(raw_data)
+
+    def file_complete(self, file_size):
+        if self.file is None:
+            return None
+        self.check_type()
+        self.file.seek(0)
+        self.file.size = file_size
+        self.file.sha256 = self.digest.hexdigest()
+        return self.file
+
+    def check_type(self):
+        content_type = sniff_image_type(self.head)
+        if content_type is None:
+            self.abort(UnsupportedImageType())
+        self.file.content_type = content_type
+
+    def abort(self, exc):
+        self.file.close()
+        self.file = None
+        raise exc
+
+
+class StreamingUploadMixin:
+    """Views list the image fields to route through the streaming handler."""
+
+    streaming_upload_fields = ()
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        request.upload_handlers.insert(
+            0, StreamingImageUploadHandler(request, self.streaming_upload_fields)
+        )
@@ -5,6 +5,10 @@ from .views import (
     CommentViewSet,
     LikeViewSet,
     FollowViewSet,
+    FeedView,
+    HashtagPostListView,
+    TrendingHashtagsView,
+    SearchView,
 )
 
 router = routers.DefaultRouter()
@@ -13,6 +17,20 @@ router.register("comments", CommentViewSet)
 router.register("likes", LikeViewSet)
 router.register("follows", FollowViewSet)
 
-urlpatterns = [path("", include(router.urls))]
+urlpatterns = [
+    path("feed/", FeedView.as_view(), name="feed"),
+    path("search/", SearchView.as_view(), name="search"),
+    path(
+        "hashtags/trending/",
+        TrendingHashtagsView.as_view(),
+        name="hashtags-trending",
+    ),
+    path(
+        "hashtags/<str:tag>/posts/",
+        HashtagPostListView.as_view(),
+        name="hashtag-posts",
+    ),
+    path("", include(router.urls)),
+]
 
 app_name = "social_media_api"
@@ -1,4 +1,22 @@
+import os
+import re
+import urllib.parse
+
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Left
+from django.http import (
+    FileResponse,
+    Http404,
+    HttpResponse,
+    HttpResponseNotModified,
+    StreamingHttpResponse,
+)
+from django.utils.http import http_date
 from drf_spectacular.utils import (
     extend_schema_view,
     extend_schema,
@@ -7,11 +25,36 @@ from drf_spectacular.utils import (
 )
 from rest_framework import status, generics, mixins
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.generics import get_object_or_404
 from rest_framework.response import Response
 from rest_framework.viewsets import ModelViewSet
 
+from .async_views import AsyncReadMixin
+from .bulk import follow_many, unfollow_many, like_many
+from .cache import aget_or_build, get_or_build, POST, POSTS, COMMENTS
+from .conditional import ConditionalListMixin, ConditionalObjectMixin
+from .feed import (
+    POST_LIST_FIELDS,
+    atimeline_for,
+    fan_out_post,
+    backfill_timeline,
+    purge_timeline,
+    timeline_for,
+)
+from .filters import filter_by_date
+from .graph import mutual_follows, suggestions_for
+from .hashtags import (
+    normalize_hashtag,
+    record_hashtag_usage,
+    trending_hashtags,
+    TRENDING_WINDOWS,
+)
 from .models import Post, Comment, Like, Follow
+from .pagination import KeysetPagination
+from .search import get_search_backend
+from .storage import LocalMediaStorage, cache_control_for, content_type_for
+from .uploads import StreamingUploadMixin
 
 from .serializers import (
     PostSerializer,
@@ -27,10 +70,22 @@ from .serializers import (
     FollowSerializer,
     FollowListSerializer,
     FollowRetrieveSerializer,
+    FollowConnectionSerializer,
+    FollowSuggestionSerializer,
+    BulkFollowSerializer,
+    BulkLikeSerializer,
     CreateLikeSerializer,
+    TrendingHashtagSerializer,
+    SearchResultSerializer,
+    POST_PREVIEW_LENGTH,
 )
 
 
+def with_post_preview(queryset):
+    """Fetch only the head of the related post's body for previews."""
+    return queryset.annotate(post_preview=Left("post__content", POST_PREVIEW_LENGTH))
+
+
 @extend_schema_view(
     create=extend_schema(summary="Create a post", description="User can create a post"),
     retrieve=extend_schema(
@@ -50,8 +105,22 @@ from .serializers import (
         description="User can delete own post or admin can delete any post",
     ),
 )
-class PostViewSet(ModelViewSet):
+class PostViewSet(
+    StreamingUploadMixin,
+    ConditionalListMixin,
+    ConditionalObjectMixin,
+    AsyncReadMixin,
+    ModelViewSet,
+):
     queryset = Post.objects.all()
+    streaming_upload_fields = ("post_media",)
+    async_handlers = {"list": "alist", "retrieve": "aretrieve"}
+    query_budgets = {"list": 2, "retrieve": 2}
+    etag_prefix = "post"
+    validator_cache_namespace = POST
+    list_cache_namespace = POSTS
+    pagination_class = KeysetPagination
+    keyset_fields = ("published_date", "id")
     serializer_class = PostSerializer
 
     def get_serializer_class(self):
@@ -70,27 +139,27 @@ class PostViewSet(ModelViewSet):
         username = self.request.query_params.get("username")
         title = self.request.query_params.get("title")
         hashtags = self.request.query_params.get("hashtags")
-        year = self.request.query_params.get("year")
-        month = self.request.query_params.get("month")
-        day = self.request.query_params.get("day")
 
         if username:
             queryset = queryset.filter(author__username__icontains=username)
         if title:
             queryset = queryset.filter(title__icontains=title)
         if hashtags:
-            queryset = queryset.filter(hashtags__icontains=hashtags)
-        if year:
-            queryset = queryset.filter(published_date__year=year)
-        if month:
-            queryset = queryset.filter(published_date__month=month)
-
-        if day:
-            queryset = queryset.filter(published_date__day=day)
+            for tag in hashtags.split(","):
+                queryset = queryset.filter(tags__name=normalize_hashtag(tag))
+        queryset = filter_by_date(queryset, self.request.query_params, "published_date")
         if self.action in ("list", "retrieve"):
-            return queryset.select_related("author")
+            return queryset.select_related("author", "post_media_asset").only(
+                *POST_LIST_FIELDS
+            )
         return queryset
 
+    @transaction.atomic
+    def perform_create(self, serializer):
+        post = serializer.save()
+        record_hashtag_usage(post)
+        fan_out_post(post)
+
     @extend_schema(
         methods=["GET"],
         summary="Get list of all posts",
@@ -108,6 +177,24 @@ class PostViewSet(ModelViewSet):
                 type=str,
                 examples=[OpenApiExample("Example")],
             ),
+            OpenApiParameter(
+                name="hashtags",
+                description="Filter by hashtags (ex. ?hashtags=art,travel)",
+                type=str,
+                examples=[OpenApiExample("Example")],
+            ),
+            OpenApiParameter(
+                name="since",
+                description="Posts created at or after this ISO date/datetime",
+                type=str,
+                examples=[OpenApiExample("Example", value="2024-06-01")],
+            ),
+            OpenApiParameter(
+                name="until",
+                description="Posts created up to this ISO date/datetime",
+                type=str,
+                examples=[OpenApiExample("Example", value="2024-06-30T18:00:00")],
+            ),
             OpenApiParameter(
                 name="year",
                 description="Filter by post creation year",
@@ -131,6 +218,42 @@ class PostViewSet(ModelViewSet):
     def list(self, request, *args, **kwargs):
         return super().list(request, *args, **kwargs)
 
+    def get_list_data(self, request, *args, **kwargs):
+        return get_or_build(
+            POSTS,
+            "",
+            request.get_full_path(),
+            lambda: super(PostViewSet, self).get_list_data(request, *args, **kwargs),
+        )
+
+    async def aget_list_data(self, request, *args, **kwargs):
+        return await aget_or_build(
+            POSTS,
+            "",
+            request.get_full_path(),
+            lambda: super(PostViewSet, self).aget_list_data(request, *args, **kwargs),
+        )
+
+    def get_retrieve_data(self, request, *args, **kwargs):
+        return get_or_build(
+            POST,
+            kwargs["pk"],
+            "detail",
+            lambda: super(PostViewSet, self).get_retrieve_data(
+                request, *args, **kwargs
+            ),
+        )
+
+    async def aget_retrieve_data(self, request, *args, **kwargs):
+        return await aget_or_build(
+            POST,
+            kwargs["pk"],
+            "detail",
+            lambda: super(PostViewSet, self).aget_retrieve_data(
+                request, *args, **kwargs
+            ),
+        )
+
     @extend_schema(
         summary="Add comment to a specific post",
         description="User can leave a comment on a specific post",
@@ -140,6 +263,7 @@ class PostViewSet(ModelViewSet):
         methods=["post"],
         url_path="add-comment",
     )
+    @transaction.atomic
     def add_comment(self, request, pk=None):
         post = self.get_object()
         serializer = CreateCommentSerializer(
@@ -155,21 +279,43 @@ class PostViewSet(ModelViewSet):
         description="User can leave a like on a specific post",
     )
     @action(detail=True, methods=["post"], url_path="like-post")
+    @transaction.atomic
     def like_post(self, request, pk=None):
         post = get_object_or_404(Post, pk=pk)
-        serializer = CreateLikeSerializer(
-            data=request.data,
-            context={"request": request, "post_id": pk},
-        )
-        serializer.is_valid(raise_exception=True)
-        serializer.save(post=post)
+        like = Like.objects.create_or_ignore(user=request.user, post=post)
+        if like is None:
+            raise ValidationError("You have already liked this post.")
+        serializer = CreateLikeSerializer(like)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
+    @extend_schema(
+        summary="Like many posts at once",
+        description=(
+            "User can like a list of posts in one request and gets an "
+            "outcome per post: liked, already_liked or not_found"
+        ),
+        request=BulkLikeSerializer,
+    )
+    @action(detail=False, methods=["post"], url_path="bulk-like")
+    def bulk_like(self, request):
+        serializer = BulkLikeSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        outcomes = like_many(request.user, serializer.validated_data["posts"])
+        return Response(
+            {
+                "results": [
+                    {"post": post_id, "status": outcome}
+                    for post_id, outcome in outcomes.items()
+                ]
+            }
+        )
+
     @extend_schema(
         summary="Unlike a specific post",
         description="User can unlike a specific post",
     )
     @action(detail=True, methods=["post"], url_path="unlike-post")
+    @transaction.atomic
     def unlike_post(self, request, pk):
         post = get_object_or_404(Post, pk=pk)
         like = Like.objects.get(user=request.user, post=post)
@@ -183,30 +329,30 @@ class PostViewSet(ModelViewSet):
         description="Admin can delete a specific comment",
     ),
 )
-class CommentViewSet(ModelViewSet):
+class CommentViewSet(ConditionalListMixin, ModelViewSet):
     queryset = Comment.objects.all()
+    query_budgets = {"list": 2, "retrieve": 1}
+    list_cache_namespace = COMMENTS
+    pagination_class = KeysetPagination
+    keyset_fields = ("created_at", "id")
     serializer_class = CommentSerializer
 
     def get_queryset(self):
         queryset = self.queryset
         username = self.request.query_params.get("username")
-        year = self.request.query_params.get("year")
-        month = self.request.query_params.get("month")
-        day = self.request.query_params.get("day")
         if username:
             queryset = queryset.filter(comment_author__username__icontains=username)
 
-        if year:
-            queryset = queryset.filter(published_date__year=year)
-
-        if month:
-            queryset = queryset.filter(published_date__month=month)
-
-        if day:
-            queryset = queryset.filter(published_date__day=day)
+        queryset = filter_by_date(queryset, self.request.query_params, "created_at")
 
-        if self.action in ("list", "retrieve"):
-            return queryset.select_related("comment_author", "post")
+        if self.action == "list":
+            return with_post_preview(queryset.select_related("comment_author")).only(
+                "id", "post_id", "created_at", "comment_author__username"
+            )
+        if self.action == "retrieve":
+            return with_post_preview(queryset.select_related("comment_author")).only(
+                "id", "post_id", "body", "created_at", "comment_author__username"
+            )
         return queryset
 
     def get_serializer_class(self):
@@ -225,6 +371,18 @@ class CommentViewSet(ModelViewSet):
                 type=str,
                 examples=[OpenApiExample("Example")],
             ),
+            OpenApiParameter(
+                name="since",
+                description="Comments created at or after this ISO date/datetime",
+                type=str,
+                examples=[OpenApiExample("Example", value="2024-06-01")],
+            ),
+            OpenApiParameter(
+                name="until",
+                description="Comments created up to this ISO date/datetime",
+                type=str,
+                examples=[OpenApiExample("Example", value="2024-06-30T18:00:00")],
+            ),
             OpenApiParameter(
                 name="year",
                 description="Filter by comment creation year",
@@ -257,6 +415,9 @@ class CommentViewSet(ModelViewSet):
 )
 class LikeViewSet(ModelViewSet):
     queryset = Like.objects.all()
+    query_budgets = {"list": 2, "retrieve": 1}
+    pagination_class = KeysetPagination
+    keyset_fields = ("id",)
     serializer_class = LikeSerializer
 
     def get_serializer_class(self):
@@ -269,8 +430,14 @@ class LikeViewSet(ModelViewSet):
         username = self.request.query_params.get("username")
         if username:
             queryset = queryset.filter(user__username__icontains=username)
-        if self.action in ("list", "retrieve"):
-            return queryset.select_related("user", "post")
+        if self.action == "list":
+            return with_post_preview(queryset.select_related("user")).only(
+                "id", "post_id", "user__username"
+            )
+        if self.action == "retrieve":
+            return with_post_preview(
+                queryset.select_related("user", "post__author")
+            ).only("id", "user__username", "post__author__username")
         return queryset
 
     @extend_schema(
@@ -298,6 +465,9 @@ class LikeViewSet(ModelViewSet):
 )
 class FollowViewSet(ModelViewSet):
     queryset = Follow.objects.all()
+    query_budgets = {"list": 2, "retrieve": 1}
+    pagination_class = KeysetPagination
+    keyset_fields = ("followed_at", "id")
     serializer_class = FollowSerializer
 
     def get_serializer_class(self):
@@ -314,7 +484,9 @@ class FollowViewSet(ModelViewSet):
         if followed_user:
             queryset = queryset.filter(followed_user__username__icontains=followed_user)
         if self.action in ("list", "retrieve"):
-            return queryset.select_related("follower", "followed_user")
+            return queryset.select_related("follower", "followed_user").only(
+                "id", "followed_at", "follower__username", "followed_user__username"
+            )
         return queryset
 
     @extend_schema(
@@ -340,6 +512,160 @@ class FollowViewSet(ModelViewSet):
         return super().list(request, *args, **kwargs)
 
 
+class FeedView(AsyncReadMixin, generics.ListAPIView):
+    serializer_class = PostListSerializer
+    pagination_class = KeysetPagination
+    keyset_fields = ("id",)
+    query_budgets = {"list": 3}
+    async_handlers = {"get": "alist"}
+
+    def get_queryset(self):
+        return timeline_for(self.request.user)
+
+    async def aget_queryset(self):
+        return await atimeline_for(self.request.user)
+
+    @extend_schema(
+        methods=["GET"],
+        summary="Get home timeline",
+        description="User can get posts of followed users, newest first",
+    )
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
+
+class TrendingHashtagsView(generics.GenericAPIView):
+    serializer_class = TrendingHashtagSerializer
+    pagination_class = None
+    max_limit = 50
+
+    @extend_schema(
+        methods=["GET"],
+        summary="Get trending hashtags",
+        description="User can get the most used hashtags over the last 1h/24h/7d",
+        parameters=[
+            OpenApiParameter(
+                name="window",
+                description="Time window: 1h, 24h or 7d (default 24h)",
+                type=str,
+                examples=[OpenApiExample("Example", value="24h")],
+            ),
+            OpenApiParameter(
+                name="limit",
+                description=f"Number of hashtags to return (max {max_limit})",
+                type=int,
+            ),
+        ],
+    )
+    def get(self, request, *args, **kwargs):
+        window = request.query_params.get("window", "24h")
+        if window not in TRENDING_WINDOWS:
+            return Response(
+                {"window": f"Choose one of: {', '.join(TRENDING_WINDOWS)}"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        try:
+            limit = int(request.query_params.get("limit", 10))
+        except ValueError:
+            limit = 10
+        limit = max(1, min(limit, self.max_limit))
+        serializer = self.get_serializer(trending_hashtags(window, limit), many=True)
+        return Response(serializer.data)
+
+
+class HashtagPostListView(generics.ListAPIView):
+    serializer_class = PostListSerializer
+    query_budgets = {"list": 2}
+    pagination_class = KeysetPagination
+    keyset_fields = ("published_date", "id")
+
+    def get_queryset(self):
+        return (
+            Post.objects.filter(
+                post_tags__hashtag__name=normalize_hashtag(self.kwargs["tag"])
+            )
+            .select_related("author", "post_media_asset")
+            .only(*POST_LIST_FIELDS)
+        )
+
+    @extend_schema(
+        methods=["GET"],
+        summary="Get posts with a specific hashtag",
+        description="User can get a list of posts tagged with a hashtag",
+    )
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
+
+class SearchView(generics.GenericAPIView):
+    serializer_class = SearchResultSerializer
+
+    @extend_schema(
+        methods=["GET"],
+        summary="Search posts and comments",
+        description="User can search post titles, post content and comments, "
+        "results are ranked by relevance",
+        parameters=[
+            OpenApiParameter(
+                name="q",
+                description="Search text",
+                type=str,
+                required=True,
+                examples=[OpenApiExample("Example")],
+            ),
+        ],
+    )
+    def get(self, request, *args, **kwargs):
+        text = request.query_params.get("q", "").strip()
+        if not text:
+            return Response(
+                {"q": "This query parameter is required."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        hits = get_search_backend().search(text, settings.SEARCH_MAX_RESULTS)
+        page = self.paginate_queryset(hits)
+        serializer = self.get_serializer(self.load_results(page), many=True)
+        return self.get_paginated_response(serializer.data)
+
+    @staticmethod
+    def load_results(hits):
+        posts = Post.objects.select_related("author").in_bulk(
+            [hit.object_id for hit in hits if hit.kind == "post"]
+        )
+        comments = Comment.objects.select_related("comment_author", "post").in_bulk(
+            [hit.object_id for hit in hits if hit.kind == "comment"]
+        )
+        results = []
+        for hit in hits:
+            if hit.kind == "post" and hit.object_id in posts:
+                post = posts[hit.object_id]
+                results.append(
+                    {
+                        "type": "post",
+                        "id": post.id,
+                        "post": post.id,
+                        "author": post.author.username,
+                        "title": post.title,
+                        "text": post.content,
+                        "rank": hit.rank,
+                    }
+                )
+            elif hit.kind == "comment" and hit.object_id in comments:
+                comment = comments[hit.object_id]
+                results.append(
+                    {
+                        "type": "comment",
+                        "id": comment.id,
+                        "post": comment.post_id,
+                        "author": comment.comment_author.username,
+                        "title": comment.post.title,
+                        "text": comment.body,
+                        "rank": hit.rank,
+                    }
+                )
+        return results
+
+
 class FollowUserView(generics.GenericAPIView, mixins.CreateModelMixin):
     queryset = Follow.objects.all()
     serializer_class = FollowSerializer
@@ -353,10 +679,14 @@ class FollowUserView(generics.GenericAPIView, mixins.CreateModelMixin):
         username = kwargs.get("username")
         followed_user = get_object_or_404(get_user_model(), username=username)
         follower = request.user
-        follow_data = {"follower": follower.id, "followed_user": followed_user.id}
-        serializer = self.get_serializer(data=follow_data)
-        serializer.is_valid(raise_exception=True)
-        serializer.save()
+        if follower == followed_user:
+            raise ValidationError("You can't follow yourself")
+        follow = Follow.objects.create_or_ignore(
+            follower=follower, followed_user=followed_user
+        )
+        if follow is None:
+            raise ValidationError("You have already followed this user.")
+        backfill_timeline(follower, followed_user)
         return Response(
             {"detail": "Followed successfully"}, status=status.HTTP_201_CREATED
         )
@@ -375,12 +705,250 @@ class UnfollowUserView(generics.GenericAPIView, mixins.CreateModelMixin):
         username = kwargs.get("username")
         followed_user = get_object_or_404(get_user_model(), username=username)
         follower = request.user
-        follow_instance = Follow.objects.filter(
+        deleted, _ = Follow.objects.filter(
             follower=follower, followed_user=followed_user
-        ).first()
-        if follow_instance:
-            follow_instance.delete()
+        ).delete()
+        if deleted:
+            purge_timeline(follower, followed_user)
 
         return Response(
             {"detail": "Unfollowed successfully"}, status=status.HTTP_204_NO_CONTENT
         )
+
+
+class FollowConnectionListView(generics.ListAPIView):
+    """
+    One page of a user's followers or followees, newest first, read from
+    the follow table by index instead of loading the whole graph.
+    """
+
+    serializer_class = FollowConnectionSerializer
+    pagination_class = KeysetPagination
+    keyset_fields = ("followed_at", "id")
+    query_budgets = {"list": 3}
+    user_field = None
+    other_field = None
+
+    def get_follows(self, user_id):
+        return Follow.objects.filter(**{f"{self.user_field}_id": user_id})
+
+    def get_queryset(self):
+        user_id = get_object_or_404(
+            get_user_model().objects.only("id"), username=self.kwargs["username"]
+        ).id
+        return (
+            self.get_follows(user_id)
+            .annotate(
+                user_id=F(f"{self.other_field}_id"),
+                username=F(f"{self.other_field}__username"),
+            )
+            .only("id", "followed_at")
+            .order_by("-followed_at", "-id")
+        )
+
+
+class UserFollowersView(FollowConnectionListView):
+    user_field = "followed_user"
+    other_field = "follower"
+
+    @extend_schema(
+        methods=["GET"],
+        summary="Get followers of a specific user",
+        description="User can get a paginated list of a user's followers",
+    )
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
+
+class UserFollowingView(FollowConnectionListView):
+    user_field = "follower"
+    other_field = "followed_user"
+
+    @extend_schema(
+        methods=["GET"],
+        summary="Get users followed by a specific user",
+        description="User can get a paginated list of users a user follows",
+    )
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
+
+class MutualFollowsView(FollowConnectionListView):
+    user_field = "follower"
+    other_field = "followed_user"
+
+    def get_follows(self, user_id):
+        return mutual_follows(self.request.user.id, user_id)
+
+    @extend_schema(
+        methods=["GET"],
+        summary="Get users followed by both you and a specific user",
+        description="User can get a paginated list of follows shared with a user",
+    )
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
+
+class FollowSuggestionListView(generics.ListAPIView):
+    serializer_class = FollowSuggestionSerializer
+    query_budgets = {"list": 2}
+
+    def get_queryset(self):
+        return (
+            suggestions_for(self.request.user)
+            .select_related("suggested_user")
+            .only("id", "shared_count", "suggested_user__username")
+        )
+
+    @extend_schema(
+        methods=["GET"],
+        summary="Get people you may know",
+        description=(
+            "User can get accounts followed by the people they follow, "
+            "ranked by the number of shared connections"
+        ),
+    )
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
+
+class BulkFollowView(generics.GenericAPIView):
+    """Follow or unfollow a list of usernames with a handful of queries."""
+
+    serializer_class = BulkFollowSerializer
+    action_func = None
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        outcomes = self.action_func(
+            request.user, serializer.validated_data["usernames"]
+        )
+        return Response(
+            {
+                "results": [
+                    {"username": username, "status": outcome}
+                    for username, outcome in outcomes.items()
+                ]
+            }
+        )
+
+
+class BulkFollowUsersView(BulkFollowView):
+    action_func = staticmethod(follow_many)
+
+    @extend_schema(
+        methods=["POST"],
+        summary="Follow many users at once",
+        description=(
+            "User can follow a list of users and gets an outcome per "
+            "username: followed, already_following, self or not_found"
+        ),
+    )
+    def post(self, request, *args, **kwargs):
+        return super().post(request, *args, **kwargs)
+
+
+class BulkUnfollowUsersView(BulkFollowView):
+    action_func = staticmethod(unfollow_many)
+
+    @extend_schema(
+        methods=["POST"],
+        summary="Unfollow many users at once",
+        description=(
+            "User can unfollow a list of users and gets an outcome per "
+            "username: unfollowed, not_following or not_found"
+        ),
+    )
+    def post(self, request, *args, **kwargs):
+        return super().post(request, *args, **kwargs)
+
+
+BYTE_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+MEDIA_CHUNK_SIZE = 64 * 1024
+
+
+def byte_range(header: str, size: int) -> tuple[int, int] | None:
+    """
+    The inclusive (start, end) of a single `Range: bytes=...` header, None
+    when it should be ignored (absent, malformed or multipart) and
+    ValueError when it can't be satisfied.
+    """
+    match = BYTE_RANGE_RE.match(header.strip())
+    if not match or match.groups() == ("", ""):
+        return None
+    start, end = match.groups()
+    if not start:
+        if int(end) == 0:
+            raise ValueError(header)
+        return max(size - int(end), 0), size - 1
+    start, end = int(start), min(int(end), size - 1) if end else size - 1
+    if start >= size or start > end:
+        raise ValueError(header)
+    return start, end
+
+
+def read_span(path: str, start: int, length: int):
+    with open(path, "rb") as file:
+        file.seek(start)
+        while length > 0:
+            chunk = file.read(min(MEDIA_CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+def serve_media(request, path):
+    """
+    Media from the local storage backend. Content addressed names are
+    cached as immutable, any other name is revalidated. With MEDIA_ACCEL_REDIRECT the front
+    web server sends the bytes, otherwise this streams them and answers
+    single range requests. Other backends hand out their own URLs.
+    """
+    if not isinstance(default_storage, LocalMediaStorage):
+        raise Http404
+    try:
+        full_path = default_storage.path(path)
+    except SuspiciousFileOperation:
+        raise Http404
+    if not os.path.isfile(full_path):
+        raise Http404
+    stat = os.stat(full_path)
+    etag = f'"{stat.st_size:x}-{int(stat.st_mtime):x}"'
+    headers = {
+        "Cache-Control": cache_control_for(path),
+        "ETag": etag,
+        "Last-Modified": http_date(stat.st_mtime),
+        "Accept-Ranges": "bytes",
+    }
+    if request.headers.get("If-None-Match") == etag:
+        return HttpResponseNotModified(headers=headers)
+    content_type = content_type_for(path)
+
+    if settings.MEDIA_ACCEL_REDIRECT:
+        headers["X-Accel-Redirect"] = (
+            settings.MEDIA_ACCEL_REDIRECT.rstrip("/") + "/" + urllib.parse.quote(path)
+        )
+        return HttpResponse(content_type=content_type, headers=headers)
+
+    span = None
+    if request.headers.get("If-Range", etag) == etag:
+        try:
+            span = byte_range(request.headers.get("Range", ""), stat.st_size)
+        except ValueError:
+            headers["Content-Range"] = f"bytes */{stat.st_size}"
+            return HttpResponse(status=416, headers=headers)
+    if span is None:
+        return FileResponse(
+            open(full_path, "rb"), content_type=content_type, headers=headers
+        )
+    start, end = span
+    headers["Content-Range"] = f"bytes {start}-{end}/{stat.st_size}"
+    headers["Content-Length"] = str(end - start + 1)
+    return StreamingHttpResponse(
+        read_span(full_path, start, end - start + 1),
+        status=206,
+        content_type=content_type,
+        headers=headers,
+    )
@@ -0,0 +1,38 @@
+"""
+Gunicorn settings for the production server profile.
+
+SERVER_MODE=wsgi (the default) serves `social_media_api.wsgi` from threaded
+sync workers, 2 * CPUs + 1 as gunicorn recommends. SERVER_MODE=asgi serves
+`social_media_api.asgi` from Uvicorn workers, one per CPU: each worker
+interleaves many requests on its event loop, and the read-heavy views run
+natively async there. WEB_CONCURRENCY and WEB_THREADS override the counts.
+"""
+
+import os
+
+server_mode = os.getenv("SERVER_MODE", "wsgi")
+# CPUs this process may run on, which respects container CPU sets.
+cpu_count = (
+    len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count()
+)
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+if server_mode == "asgi":
+    wsgi_app = "social_media_api.asgi:application"
+    worker_class = "uvicorn.workers.UvicornWorker"
+    workers = int(os.getenv("WEB_CONCURRENCY", cpu_count))
+elif server_mode == "wsgi":
+    wsgi_app = "social_media_api.wsgi:application"
+    worker_class = "gthread"
+    workers = int(os.getenv("WEB_CONCURRENCY", cpu_count * 2 + 1))
+    threads = int(os.getenv("WEB_THREADS", 4))
+else:
+    raise ValueError(f"SERVER_MODE must be asgi or wsgi, not {server_mode!r}")
+
+timeout = 30
+graceful_timeout = 30
+keepalive = 5
+# Recycle workers now and then so slow leaks can't accumulate.
+max_requests = 2000
+max_requests_jitter = 200
+accesslog = "-"
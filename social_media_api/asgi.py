@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'social_media_api.settings')
+# Read-heavy views have async handlers, see api.async_views.AsyncReadMixin.
+os.environ.setdefault('ASYNC_VIEWS', '1')
 
 application = get_asgi_application()
@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/5.0/ref/settings/
 """
 
 import os
+from copy import deepcopy
 from datetime import timedelta
 from pathlib import Path
 from dotenv import load_dotenv
@@ -51,6 +52,7 @@ AUTH_USER_MODEL = "user.User"
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    "api.db.routers.ReplicaPinningMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -84,24 +86,101 @@ WSGI_APPLICATION = "social_media_api.wsgi.application"
 
 DJANGO_ENV = os.getenv("DJANGO_ENV")
 
+# Serve the read-heavy views natively async. `asgi.py` turns this on, under
+# WSGI they stay synchronous.
+ASYNC_VIEWS = os.getenv("ASYNC_VIEWS", "0") == "1"
+
+# Connections are reused rather than opened per request: by a psycopg pool
+# per process with DB_POOL=1 (DB_POOL_MIN_SIZE/DB_POOL_MAX_SIZE), otherwise
+# kept open per thread for DB_CONN_MAX_AGE seconds. Reused connections are
+# health checked before each request. Under ASGI a request's queries may run
+# on any thread, leaking per-thread connections, so it defaults to the pool.
+DB_POOL = os.getenv("DB_POOL", "1" if ASYNC_VIEWS else "0") == "1"
+
 if DJANGO_ENV == "production":
     DATABASES = {
         "default": {
-            "ENGINE": "django.db.backends.postgresql",
+            "ENGINE": "api.db.postgresql",
             "NAME": os.environ.get("POSTGRES_DB"),
             "USER": os.environ.get("POSTGRES_USER"),
             "PASSWORD": os.environ.get("POSTGRES_PASSWORD"),
             "HOST": os.environ.get("POSTGRES_HOST"),
             "PORT": os.environ.get("POSTGRES_PORT"),
+            "CONN_MAX_AGE": 0 if DB_POOL else int(os.getenv("DB_CONN_MAX_AGE", 60)),
+            "CONN_HEALTH_CHECKS": True,
+            "OPTIONS": {},
         }
     }
+    if DB_POOL:
+        DATABASES["default"]["OPTIONS"]["pool"] = {
+            "min_size": int(os.getenv("DB_POOL_MIN_SIZE", 2)),
+            "max_size": int(os.getenv("DB_POOL_MAX_SIZE", 10)),
+            "timeout": int(os.getenv("DB_POOL_TIMEOUT", 10)),
+        }
+    # Streaming replicas of the primary, same credentials, one per host.
+    for index, host in enumerate(
+        filter(None, os.getenv("POSTGRES_REPLICA_HOSTS", "").split(","))
+    ):
+        DATABASES[f"replica_{index}"] = {
+            **deepcopy(DATABASES["default"]),
+            "HOST": host.strip(),
+            "TEST": {"MIRROR": "default"},
+        }
+    REPLICA_DATABASES = [alias for alias in DATABASES if alias != "default"]
 else:
     DATABASES = {
         "default": {
             "ENGINE": "django.db.backends.sqlite3",
             "NAME": BASE_DIR / "db.sqlite3",
+        },
+        # Stands in for a replica so the router can be tried and tested
+        # locally. Nothing replicates to it: copy db.sqlite3 over and set
+        # REPLICA_DATABASES=replica to read a snapshot.
+        "replica": {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": BASE_DIR / "db.replica.sqlite3",
+            # Tables straight from the models, the data migrations query
+            # through the router.
+            "TEST": {"MIGRATE": False},
+        },
+    }
+    REPLICA_DATABASES = list(
+        filter(None, os.getenv("REPLICA_DATABASES", "").split(","))
+    )
+
+# Safe requests read from a random replica and everything else uses the
+# primary. A user who wrote reads from the primary for REPLICA_PIN_SECONDS,
+# which should exceed the replication lag, so they see their own writes.
+DATABASE_ROUTERS = ["api.db.routers.ReplicaRouter"]
+REPLICA_PIN_SECONDS = int(os.getenv("REPLICA_PIN_SECONDS", 5))
+
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+# Redis is shared by every worker (API responses, throttling), the local
+# memory cache stands in for it in development and tests.
+
+REDIS_URL = os.getenv("REDIS_URL")
+
+if REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+            "KEY_PREFIX": "social_media",
         }
     }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+
+API_CACHE_TIMEOUT = 60
+
+# Users are online while their requests keep refreshing a cache key, presence
+# never writes to the user table.
+PRESENCE_TIMEOUT = int(os.getenv("PRESENCE_TIMEOUT", 300))
 
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
@@ -141,6 +220,61 @@ MEDIA_ROOT = BASE_DIR / "media"
 
 MEDIA_URL = "/media/"
 
+# Media goes to MEDIA_ROOT unless an S3-compatible bucket is configured.
+# Local files are served by `api.views.serve_media`; set
+# MEDIA_ACCEL_REDIRECT to the internal nginx location aliasing MEDIA_ROOT
+# so nginx streams the bytes. Bucket URLs are presigned for
+# MEDIA_S3_URL_EXPIRE seconds unless MEDIA_S3_PUBLIC_URL (a CDN or public
+# bucket) is set.
+MEDIA_S3_BUCKET = os.getenv("MEDIA_S3_BUCKET")
+MEDIA_S3 = {
+    "ENDPOINT_URL": os.getenv("MEDIA_S3_ENDPOINT_URL", "https://s3.amazonaws.com"),
+    "BUCKET": MEDIA_S3_BUCKET,
+    "ACCESS_KEY": os.getenv("MEDIA_S3_ACCESS_KEY"),
+    "SECRET_KEY": os.getenv("MEDIA_S3_SECRET_KEY"),
+    "REGION": os.getenv("MEDIA_S3_REGION", "us-east-1"),
+    "PUBLIC_URL": os.getenv("MEDIA_S3_PUBLIC_URL"),
+    "URL_EXPIRE": int(os.getenv("MEDIA_S3_URL_EXPIRE", 6 * 60 * 60)),
+    "TIMEOUT": float(os.getenv("MEDIA_S3_TIMEOUT", 10)),
+}
+
+STORAGES = {
+    "default": {
+        "BACKEND": (
+            "api.storage.S3MediaStorage"
+            if MEDIA_S3_BUCKET
+            else "api.storage.LocalMediaStorage"
+        ),
+    },
+    "staticfiles": {
+        "BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage",
+    },
+}
+
+MEDIA_ACCEL_REDIRECT = os.getenv("MEDIA_ACCEL_REDIRECT", "")
+
+# Content addressed media names never change content, they're cached for a
+# year. Other names (files stored before content addressing) are revalidated.
+MEDIA_CACHE_CONTROL = "public, max-age=31536000, immutable"
+MEDIA_MUTABLE_CACHE_CONTROL = "public, no-cache"
+
+# Image uploads are streamed into this directory under MEDIA_ROOT and
+# rejected as soon as they exceed the size cap or fail the type sniff.
+MEDIA_UPLOAD_STAGING_DIR = "upload/tmp"
+MEDIA_MAX_UPLOAD_SIZE = int(os.getenv("MEDIA_MAX_UPLOAD_SIZE", 10 * 1024 * 1024))
+
+# Uploaded images are processed by a background worker into resized
+# renditions of these widths, in each of these formats.
+MEDIA_RENDITION_WIDTHS = (320, 640, 1280)
+MEDIA_RENDITION_FORMATS = ("webp", "jpeg")
+MEDIA_RENDITION_QUALITY = 80
+
+# Background jobs are rows in the database, worked off by
+# `python manage.py run_tasks`. "api.tasks.ImmediateQueue" runs them in
+# process after the request's transaction commits instead.
+TASK_QUEUE_BACKEND = os.getenv("TASK_QUEUE_BACKEND", "api.tasks.DatabaseQueue")
+TASK_MAX_ATTEMPTS = 5
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.0/ref/settings/#default-auto-field
 
@@ -148,7 +282,7 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "user.authentication.PresenceJWTAuthentication",
     ),
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.LimitOffsetPagination",
     "PAGE_SIZE": 5,
@@ -163,6 +297,30 @@ REST_FRAMEWORK = {
     "DEFAULT_THROTTLE_RATES": {"anon": "1000/day", "user": "10000/day"},
 }
 
+# Home timeline: posts are pushed to followers in batches on write, authors
+# with more followers than the threshold are merged into timelines on read.
+FEED_FANOUT_BATCH_SIZE = 1000
+FEED_CELEBRITY_FOLLOWER_THRESHOLD = 10000
+FEED_FOLLOW_BACKFILL_SIZE = 20
+
+# People-you-may-know: how many friend-of-friend suggestions the batch job
+# keeps per user.
+FOLLOW_SUGGESTIONS_LIMIT = 50
+
+# Upper bound on usernames/post ids accepted by one bulk follow/like call.
+BULK_ACTION_MAX_ITEMS = 200
+
+# Trending hashtags are served from cache for this many seconds, hourly
+# counter buckets older than a day are rolled up into daily buckets and
+# dropped once they fall out of the widest trending window.
+TRENDING_HASHTAGS_CACHE_TTL = 30
+TRENDING_HASHTAGS_RETENTION = timedelta(days=7)
+
+# Full-text search backend, picked from the database vendor when unset:
+# tsvector + GIN on PostgreSQL, FTS5 virtual tables on SQLite.
+SEARCH_BACKEND = os.getenv("SEARCH_BACKEND")
+SEARCH_MAX_RESULTS = 200
+
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=1440),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=1),
@@ -0,0 +1,13 @@
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from .presence import heartbeat
+
+
+class PresenceJWTAuthentication(JWTAuthentication):
+    """JWT authentication that records each authenticated request as presence."""
+
+    def authenticate(self, request):
+        result = super().authenticate(request)
+        if result is not None:
+            heartbeat(result[0].username)
+        return result
@@ -0,0 +1,36 @@
+# Generated by Django 4.2 on 2026-10-18 16:43
+
+from django.db import migrations
+
+# icontains compiles to UPPER(col::text) LIKE UPPER(%s) on PostgreSQL, so the
+# trigram indexes are built over that exact expression.
+TRIGRAM_COLUMNS = ["username", "email", "first_name", "last_name"]
+
+
+def create_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for column in TRIGRAM_COLUMNS:
+        schema_editor.execute(
+            f"CREATE INDEX IF NOT EXISTS user_{column}_trgm_idx ON user_user "
+            f'USING gin ((UPPER("{column}"::text)) gin_trgm_ops)'
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for column in TRIGRAM_COLUMNS:
+        schema_editor.execute(f"DROP INDEX IF EXISTS user_{column}_trgm_idx")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("user", "0004_alter_user_profile_image"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2 on 2026-10-18 17:04
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("user", "0007_user_followers_count_user_following_count"),
+        # The legacy edges are copied into api.Follow before the tables go.
+        ("api", "0024_reconcile_follow_graph"),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name="user",
+            name="user_followers",
+        ),
+        migrations.RemoveField(
+            model_name="user",
+            name="user_following",
+        ),
+    ]
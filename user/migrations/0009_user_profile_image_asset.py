@@ -0,0 +1,27 @@
+# Generated by Django 4.2 on 2026-10-18 17:14
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0027_mediaasset_task"),
+        ("user", "0008_remove_user_user_followers_user_following"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="user",
+            name="profile_image_asset",
+            field=models.ForeignKey(
+                blank=True,
+                editable=False,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="+",
+                to="api.mediaasset",
+            ),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2 on 2026-10-18 17:24
+
+import api.fields
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("user", "0009_user_profile_image_asset"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="user",
+            name="profile_image",
+            field=api.fields.ContentAddressedImageField(
+                blank=True, null=True, upload_to="upload/media"
+            ),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2 on 2026-10-18 17:52
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("user", "0010_alter_user_profile_image"),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name="user",
+            name="online",
+        ),
+    ]
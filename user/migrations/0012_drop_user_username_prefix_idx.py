@@ -0,0 +1,19 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """
+    0005 used to add a pattern-ops index on username, a duplicate of the
+    `_like` index PostgreSQL already gets for the unique column.
+    """
+
+    dependencies = [
+        ("user", "0011_remove_user_online"),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            "DROP INDEX IF EXISTS user_username_prefix_idx",
+            migrations.RunSQL.noop,
+        ),
+    ]
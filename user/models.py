@@ -3,10 +3,11 @@ import uuid
 
 from django.contrib.auth.models import AbstractUser, BaseUserManager
 from django.db import models
-from django.conf import settings
 from django.utils.text import slugify
 from django.utils.translation import gettext as _
 
+from api.fields import ContentAddressedImageField
+
 
 class UserManager(BaseUserManager):
     """Define a model manager for User model with no username field."""
@@ -42,6 +43,7 @@ class UserManager(BaseUserManager):
         return self._create_user(email, password, **extra_fields)
 
 
+# Upload paths before content addressing, kept for historical migrations.
 def user_profile_image_path(instance: "User", filename: str) -> pathlib.Path:
     filename = (
         f"{slugify(instance.username)}-{uuid.uuid4()}" + pathlib.Path(filename).suffix
@@ -53,16 +55,38 @@ class User(AbstractUser):
     username = models.CharField(max_length=63, unique=True, null=True)
     email = models.EmailField(_("email address"), unique=True)
     bio = models.TextField(null=True, blank=True)
-    profile_image = models.ImageField(
-        blank=True, null=True, upload_to=user_profile_image_path
-    )
-    online = models.BooleanField(default=False)
-    user_followers = models.ManyToManyField(
-        settings.AUTH_USER_MODEL, related_name="follow_users", blank=True
+    profile_image = ContentAddressedImageField(
+        blank=True, null=True, upload_to="upload/media"
     )
-    user_following = models.ManyToManyField(
-        settings.AUTH_USER_MODEL, related_name="following_users", blank=True
+    profile_image_asset = models.ForeignKey(
+        "api.MediaAsset",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        editable=False,
+        related_name="+",
     )
+    followers_count = models.PositiveIntegerField(default=0, editable=False)
+    following_count = models.PositiveIntegerField(default=0, editable=False)
+    updated_at = models.DateTimeField(auto_now=True)
+    version = models.PositiveIntegerField(default=1, editable=False)
+
+    # Maintained in SQL by the follow signals, a full-row save from a
+    # stale instance must not write them back.
+    counter_fields = ("followers_count", "following_count")
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            self.version += 1
+            update_fields = kwargs.get("update_fields")
+            if update_fields is None:
+                update_fields = [
+                    field.name
+                    for field in self._meta.concrete_fields
+                    if not field.primary_key and field.name not in self.counter_fields
+                ]
+            kwargs["update_fields"] = {*update_fields, "version", "updated_at"}
+        super().save(*args, **kwargs)
 
     @property
     def full_name(self):
@@ -0,0 +1,47 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+def _presence_key(username) -> str:
+    return f"presence:{username}"
+
+
+def mark_online(username) -> None:
+    """Online until PRESENCE_TIMEOUT passes without another heartbeat."""
+    if username is not None:
+        cache.set(_presence_key(username), time.time(), settings.PRESENCE_TIMEOUT)
+
+
+def heartbeat(username) -> None:
+    """
+    Refresh presence from an authenticated request. The key holds the time
+    it was written and is only rewritten once half of PRESENCE_TIMEOUT has
+    passed, so busy users cost a cache read per request instead of a write.
+    """
+    if username is None:
+        return
+    written = cache.get(_presence_key(username))
+    if written is None or written < time.time() - settings.PRESENCE_TIMEOUT / 2:
+        mark_online(username)
+
+
+def mark_offline(username) -> None:
+    cache.delete(_presence_key(username))
+
+
+def is_online(username) -> bool:
+    return username is not None and cache.get(_presence_key(username)) is not None
+
+
+async def ais_online(username) -> bool:
+    return (
+        username is not None and await cache.aget(_presence_key(username)) is not None
+    )
+
+
+def online_usernames(usernames) -> set:
+    """The online ones among `usernames`, in one cache round trip."""
+    keys = {_presence_key(username): username for username in usernames if username}
+    return {keys[key] for key in cache.get_many(keys)}
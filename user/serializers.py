@@ -3,6 +3,10 @@ from rest_framework import serializers
 from django.utils.translation import gettext as _
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 
+from api.serializers import MediaRenditionsField
+
+from .presence import is_online, mark_online, online_usernames
+
 
 class UserSerializer(serializers.ModelSerializer):
     class Meta:
@@ -32,15 +36,48 @@ class UserSerializer(serializers.ModelSerializer):
         return user
 
 
+class PresenceField(serializers.ReadOnlyField):
+    """
+    Whether the user is online, from the presence cache. A page of users
+    is looked up at once by PresenceListSerializer, views that already
+    know can pass the `online_usernames` set in the context.
+    """
+
+    def __init__(self, **kwargs):
+        kwargs["source"] = "*"
+        super().__init__(**kwargs)
+
+    def to_representation(self, user):
+        online = self.context.get("online_usernames")
+        if online is None:
+            online = getattr(self.parent.parent, "online_usernames", None)
+        if online is None:
+            return is_online(user.username)
+        return user.username in online
+
+
+class PresenceListSerializer(serializers.ListSerializer):
+    def to_representation(self, data):
+        users = list(data)
+        self.online_usernames = online_usernames(user.username for user in users)
+        return super().to_representation(users)
+
+
 class UserListSerializer(serializers.ModelSerializer):
+    follows_you = serializers.BooleanField(read_only=True)
+    online = PresenceField()
+
     class Meta:
         model = get_user_model()
-        fields = ["id", "email", "username", "full_name"]
+        fields = ["id", "email", "username", "full_name", "follows_you", "online"]
+        list_serializer_class = PresenceListSerializer
 
 
 class UserRetrieveSerializer(serializers.ModelSerializer):
-    followers = serializers.IntegerField(source="following.count", read_only=True)
-    users_followed = serializers.IntegerField(source="followers.count", read_only=True)
+    followers = serializers.IntegerField(source="following_count", read_only=True)
+    users_followed = serializers.IntegerField(source="followers_count", read_only=True)
+    profile_image_renditions = MediaRenditionsField(source="profile_image_asset")
+    online = PresenceField()
 
     class Meta:
         model = get_user_model()
@@ -54,15 +91,14 @@ class UserRetrieveSerializer(serializers.ModelSerializer):
             "followers",
             "users_followed",
             "profile_image",
+            "profile_image_renditions",
         ]
 
 
 class MyTokenObtainPairSerializer(TokenObtainPairSerializer):
     def validate(self, attrs):
         data = super().validate(attrs)
-        user = self.user
-        user.online = True
-        user.save()
+        mark_online(self.user.username)
         return data
 
 
@@ -9,7 +9,16 @@ from .views import (
     UserListView,
     UserDetailView,
 )
-from api.views import FollowUserView, UnfollowUserView
+from api.views import (
+    FollowUserView,
+    UnfollowUserView,
+    UserFollowersView,
+    UserFollowingView,
+    MutualFollowsView,
+    FollowSuggestionListView,
+    BulkFollowUsersView,
+    BulkUnfollowUsersView,
+)
 
 urlpatterns = [
     path("register/", CreateUserView.as_view(), name="register"),
@@ -27,6 +36,13 @@ urlpatterns = [
         name="manage_user",
     ),
     path("me/logout", LogoutUserView.as_view(), name="logout-user"),
+    path("me/bulk-follow/", BulkFollowUsersView.as_view(), name="bulk-follow"),
+    path("me/bulk-unfollow/", BulkUnfollowUsersView.as_view(), name="bulk-unfollow"),
+    path(
+        "me/suggestions/",
+        FollowSuggestionListView.as_view(),
+        name="follow-suggestions",
+    ),
     path("api/token/", TokenObtainPairView.as_view(), name="token_obtain_pair"),
     path("api/token/refresh/", TokenRefreshView.as_view(), name="token_refresh"),
     path("users/", UserListView.as_view(actions={"get": "list"}), name="users-list"),
@@ -35,6 +51,21 @@ urlpatterns = [
         UserDetailView.as_view(actions={"get": "retrieve"}),
         name="users-detail",
     ),
+    path(
+        "<str:username>/followers/",
+        UserFollowersView.as_view(),
+        name="user-followers",
+    ),
+    path(
+        "<str:username>/following/",
+        UserFollowingView.as_view(),
+        name="user-following",
+    ),
+    path(
+        "<str:username>/mutual/",
+        MutualFollowsView.as_view(),
+        name="user-mutual",
+    ),
     path("<str:username>/follow/", FollowUserView.as_view(), name="follow-user"),
     path("<str:username>/unfollow/", UnfollowUserView.as_view(), name="follow-user"),
 ]
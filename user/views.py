@@ -13,6 +13,13 @@ from rest_framework.response import Response
 from rest_framework.viewsets import ModelViewSet
 from rest_framework_simplejwt.views import TokenObtainPairView
 
+from api.async_views import AsyncReadMixin
+from api.cache import aget_or_build, get_or_build, invalidate, PROFILE, POSTS, COMMENTS
+from api.conditional import ConditionalObjectMixin
+from api.graph import annotate_follows_you
+from api.uploads import StreamingUploadMixin
+
+from .presence import ais_online, is_online, mark_offline
 from .serializers import (
     UserSerializer,
     UserRetrieveSerializer,
@@ -31,14 +38,6 @@ class MyTokenObtainPairView(TokenObtainPairView):
     serializer_class = MyTokenObtainPairSerializer
     permission_classes = [AllowAny]
 
-    def post(self, request, *args, **kwargs):
-        response = super().post(request, *args, **kwargs)
-        if response.status_code == 200 and not request.user.is_anonymous:
-            user = request.user
-            user.online = True
-            user.save()
-        return response
-
 
 @extend_schema_view(
     retrieve=extend_schema(
@@ -58,13 +57,30 @@ class MyTokenObtainPairView(TokenObtainPairView):
         description="User can delete own account",
     ),
 )
-class ManageUserView(ModelViewSet):
+class ManageUserView(StreamingUploadMixin, ConditionalObjectMixin, ModelViewSet):
     serializer_class = UserRetrieveSerializer
     permission_classes = [IsAuthenticated]
+    etag_prefix = "user"
+    streaming_upload_fields = ("profile_image",)
 
     def get_object(self):
         return self.request.user
 
+    def get_validator_queryset(self):
+        return get_user_model().objects.all()
+
+    def get_validator_lookup(self):
+        return {"pk": self.request.user.pk}
+
+    def perform_update(self, serializer):
+        username = serializer.instance.username
+        invalidate(PROFILE, username)
+        super().perform_update(serializer)
+        if serializer.instance.username != username:
+            # Post and comment lists embed author usernames.
+            invalidate(POSTS)
+            invalidate(COMMENTS)
+
     def delete(self, request, *args, **kwargs):
         instance = self.get_object()
         instance.delete()
@@ -79,8 +95,7 @@ class LogoutUserView(
     def post(self, request, *args, **kwargs):
         user = request.user
         logout(request)
-        user.online = False
-        user.save()
+        mark_offline(user.username)
         return Response(
             {"status": "You have logged out"}, status=status.HTTP_204_NO_CONTENT
         )
@@ -88,16 +103,24 @@ class LogoutUserView(
 
 class UserListView(ModelViewSet):
     serializer_class = UserListSerializer
+    query_budgets = {"list": 2}
 
     def get_queryset(self):
-        queryset = get_user_model().objects.all()
+        queryset = get_user_model().objects.only(
+            "id", "email", "username", "first_name", "last_name"
+        )
         email = self.request.query_params.get("email")
         username = self.request.query_params.get("username")
+        username_prefix = self.request.query_params.get("username__startswith")
         first_name = self.request.query_params.get("first_name")
         last_name = self.request.query_params.get("last_name")
 
         if username:
             queryset = queryset.filter(username__icontains=username)
+        if username_prefix:
+            queryset = queryset.filter(username__startswith=username_prefix).order_by(
+                "username"
+            )
         if email:
             queryset = queryset.filter(email__icontains=email)
 
@@ -106,7 +129,7 @@ class UserListView(ModelViewSet):
         if last_name is not None and last_name != "":
             queryset = queryset.filter(last_name__icontains=last_name)
 
-        return queryset
+        return annotate_follows_you(queryset, self.request.user)
 
     @extend_schema(
         methods=["GET"],
@@ -119,6 +142,12 @@ class UserListView(ModelViewSet):
                 type=str,
                 examples=[OpenApiExample("Example")],
             ),
+            OpenApiParameter(
+                name="username__startswith",
+                description="Autocomplete users by username prefix",
+                type=str,
+                examples=[OpenApiExample("Example")],
+            ),
             OpenApiParameter(
                 name="email",
                 description="Filter by user email",
@@ -131,16 +160,18 @@ class UserListView(ModelViewSet):
         return super().list(request, *args, **kwargs)
 
 
-class UserDetailView(ModelViewSet):
+class UserDetailView(ConditionalObjectMixin, AsyncReadMixin, ModelViewSet):
     queryset = get_user_model()
+    etag_prefix = "user"
+    validator_cache_namespace = PROFILE
     permission_classes = [IsAuthenticated]
     serializer_class = UserRetrieveSerializer
     lookup_field = "username"
+    query_budgets = {"retrieve": 2}
+    async_handlers = {"retrieve": "aretrieve"}
 
     def get_queryset(self):
-        return get_user_model().objects.prefetch_related(
-            "user_followers", "user_following"
-        )
+        return get_user_model().objects.select_related("profile_image_asset")
 
     @extend_schema(
         methods=["GET"],
@@ -149,3 +180,45 @@ class UserDetailView(ModelViewSet):
     )
     def retrieve(self, request, *args, **kwargs):
         return super().retrieve(request, *args, **kwargs)
+
+    def check_preconditions(self, request, for_update=False):
+        self.online = is_online(self.kwargs["username"])
+        return super().check_preconditions(request, for_update)
+
+    async def acheck_preconditions(self, request):
+        self.online = await ais_online(self.kwargs["username"])
+        return await super().acheck_preconditions(request)
+
+    def get_conditional_response(self, request):
+        # Presence isn't in the row the validators come from.
+        if self.etag is not None and self.online:
+            self.etag = self.etag[:-1] + '-online"'
+        return super().get_conditional_response(request)
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        # The cached body gets presence per request, see get_retrieve_data.
+        context["online_usernames"] = set()
+        return context
+
+    def get_retrieve_data(self, request, *args, **kwargs):
+        data = get_or_build(
+            PROFILE,
+            kwargs["username"],
+            "detail",
+            lambda: super(UserDetailView, self).get_retrieve_data(
+                request, *args, **kwargs
+            ),
+        )
+        return {**data, "online": self.online}
+
+    async def aget_retrieve_data(self, request, *args, **kwargs):
+        data = await aget_or_build(
+            PROFILE,
+            kwargs["username"],
+            "detail",
+            lambda: super(UserDetailView, self).aget_retrieve_data(
+                request, *args, **kwargs
+            ),
+        )
+        return {**data, "online": self.online}